@@ -0,0 +1,34 @@
+"""
+Script to apply usage analytics retention (run from cron, e.g. nightly)
+Usage: python analytics_maintenance.py [--rebuild-days N]
+"""
+
+import sys
+from datetime import datetime, timedelta
+from app import create_app
+from app.utils.analytics import apply_retention, rebuild_rollups, rebuildable_start
+
+def run_maintenance(rebuild_days=0):
+    app = create_app()
+    with app.app_context():
+        if rebuild_days:
+            end = datetime.utcnow() + timedelta(days=1)
+            start = end - timedelta(days=rebuild_days + 1)
+            earliest = rebuildable_start()
+            events = rebuild_rollups(start, end)
+            if start < earliest:
+                print(f"[X] Raw events before {earliest.date()} are purged; kept the rollups for those days")
+            print(f"[✓] Rebuilt rollups for the last {rebuild_days} days ({events} events)")
+        
+        result = apply_retention()
+        print(f"[✓] Deleted {result['raw_deleted']} raw events and {result['hourly_deleted']} hourly rollups")
+
+if __name__ == '__main__':
+    rebuild_days = 0
+    if len(sys.argv) == 3 and sys.argv[1] == '--rebuild-days':
+        rebuild_days = int(sys.argv[2])
+    elif len(sys.argv) != 1:
+        print("Usage: python analytics_maintenance.py [--rebuild-days N]")
+        sys.exit(1)
+    
+    run_maintenance(rebuild_days)
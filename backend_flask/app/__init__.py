@@ -13,6 +13,11 @@ from .chat.routes import chat_bp
 from .files.routes import files_bp
 from .activity.routes import activity_bp
 from .projects.routes import projects_bp
+from .analytics.routes import analytics_bp
+from .utils.query_stats import init_query_stats
+from .utils.metrics import init_metrics
+from .utils.profiler import init_profiler
+from .utils.log import init_logging
 from . import models  # ensure models are registered for migrations
 
 
@@ -26,12 +31,18 @@ def create_app() -> Flask:
     # Disable strict slashes to prevent redirects
     app.url_map.strict_slashes = False
 
+    # Logging first, so every later request hook already sees the request id
+    init_logging(app)
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
     socketio.init_app(app)
+    init_query_stats(app)
+    init_metrics(app)
+    init_profiler(app)
     
     # Initialize OAuth
     init_oauth(app)
@@ -42,7 +53,8 @@ def create_app() -> Flask:
         resources={r"/api/*": {
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Profile", "X-Request-ID"],
+            "expose_headers": ["X-Profile-Id", "X-Request-ID"],
             "supports_credentials": True
         }}
     )
@@ -57,9 +69,23 @@ def create_app() -> Flask:
     app.register_blueprint(files_bp, url_prefix="/api/files")
     app.register_blueprint(activity_bp, url_prefix="/api/activity")
     app.register_blueprint(projects_bp, url_prefix="/api/projects")
+    app.register_blueprint(analytics_bp, url_prefix="/api/analytics")
     
     # Register Socket.IO events
     from .sockets import register_socket_events
     register_socket_events(socketio)
 
+    # Background maintenance runs only in processes that serve the app: wsgi.py
+    # starts it before serving, other servers (flask run, gunicorn) on their first
+    # request. CLI commands, scripts and password hashing workers never start it
+    app.before_request(lambda: start_background_tasks(app))
+
     return app
+
+
+def start_background_tasks(app):
+    """Start the reaper and the invite sweeper for `app` (once; a 0 interval disables each)"""
+    from .utils.reaper import reaper
+    from .utils.invites import invite_sweeper
+    reaper.start(app)
+    invite_sweeper.start(app)
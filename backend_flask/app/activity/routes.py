@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
 from ..models import WorkspaceActivity, Workspace, WorkspaceMember
+from ..utils.archive import read_archived
 
 activity_bp = Blueprint("activity", __name__)
 
@@ -13,7 +14,7 @@ def get_activities(workspace_id):
     user_id = int(get_jwt_identity())
     
     # Check if user is a member of the workspace
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     member = WorkspaceMember.query.filter_by(
         workspace_id=workspace_id,
         user_id=user_id
@@ -31,9 +32,17 @@ def get_activities(workspace_id):
     if before_id:
         query = query.filter(WorkspaceActivity.id < before_id)
     
-    activities = query.order_by(WorkspaceActivity.created_at.desc()).limit(limit).all()
+    hot = query.order_by(WorkspaceActivity.created_at.desc()).limit(limit).all()
+    activities = [activity.to_dict() for activity in hot]
+    
+    # Ran out of hot rows: continue into the cold archive
+    if len(activities) < limit:
+        activities += read_archived(
+            'workspace_activity', workspace_id, limit - len(activities),
+            before_id=hot[-1].id if hot else before_id
+        )
     
     return jsonify({
-        "activities": [activity.to_dict() for activity in activities],
+        "activities": activities,
         "has_more": len(activities) == limit
     })
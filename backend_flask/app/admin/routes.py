@@ -1,10 +1,20 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from functools import wraps
 from ..models import User, ProjectTopic, GeneratedProject, SavedProject, UserActivity
 from ..extensions import db
-from sqlalchemy import func, desc
+from ..utils.cache import invalidate_profile
+from ..utils.archive import run_archive
+from ..utils.reaper import tombstone_user, reaper
+from ..sockets import disconnect_user
+from ..utils.query_stats import query_stats
+from ..utils.profiler import call_tree, clear_profiles, collapsed, list_profiles, load_profile
+from ..utils.user_management import VALID_ROLES, UserImportError, parse_user_csv, import_users, set_roles
+from sqlalchemy import func, desc, select
 from datetime import datetime, timedelta
+import csv
+import io
+import json
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -22,7 +32,7 @@ def admin_required(fn):
             return jsonify({"message": "Invalid token"}), 401
         
         user = User.query.get(user_id)
-        if not user or not user.is_admin():
+        if not user or user.deleted_at is not None or not user.is_admin():
             return jsonify({"message": "Admin access required"}), 403
         return fn(*args, **kwargs)
     return wrapper
@@ -32,22 +42,25 @@ def admin_required(fn):
 @admin_required
 def get_overview_stats():
     """Get system overview statistics"""
-    total_users = User.query.count()
-    total_students = User.query.filter_by(role='student').count()
-    total_admins = User.query.filter_by(role='admin').count()
+    # Deleted (tombstoned) accounts are not counted while they wait to be reaped
+    users = User.query.filter_by(deleted_at=None)
+    total_users = users.count()
+    total_students = users.filter_by(role='student').count()
+    total_admins = users.filter_by(role='admin').count()
     total_topics = ProjectTopic.query.count()
     total_generated = GeneratedProject.query.count()
     total_saved = SavedProject.query.count()
     
     # Users registered in last 30 days
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    new_users_30d = User.query.filter(User.created_at >= thirty_days_ago).count()
+    new_users_30d = users.filter(User.created_at >= thirty_days_ago).count()
     
     # Active users (users who generated/saved projects in last 30 days)
     active_users_30d = db.session.query(User.id).join(
         GeneratedProject
     ).filter(
-        GeneratedProject.created_at >= thirty_days_ago
+        GeneratedProject.created_at >= thirty_days_ago,
+        User.deleted_at.is_(None)
     ).distinct().count()
     
     return jsonify({
@@ -83,7 +96,8 @@ def get_usage_stats():
         User.program,
         func.count(User.id).label('count')
     ).filter(
-        User.program.isnot(None)
+        User.program.isnot(None),
+        User.deleted_at.is_(None)
     ).group_by(
         User.program
     ).order_by(desc('count')).limit(10).all()
@@ -123,7 +137,7 @@ def get_all_users():
     search = request.args.get('search', '', type=str)
     role_filter = request.args.get('role', '', type=str)
     
-    query = User.query
+    query = User.query.filter_by(deleted_at=None)
     
     if search:
         query = query.filter(
@@ -174,7 +188,7 @@ def update_user_role(user_id):
         return jsonify({"message": "Cannot change your own role"}), 400
     
     user = User.query.get(user_id)
-    if not user:
+    if not user or user.deleted_at is not None:
         return jsonify({"message": "User not found"}), 404
     
     data = request.get_json()
@@ -185,6 +199,7 @@ def update_user_role(user_id):
     
     user.role = new_role
     db.session.commit()
+    invalidate_profile(user.id)
     
     return jsonify({
         "message": "User role updated successfully",
@@ -196,6 +211,104 @@ def update_user_role(user_id):
     })
 
 
+
+@admin_bp.delete("/users/<int:user_id>")
+@admin_required
+def delete_user(user_id):
+    """Delete a user account; their data is removed in the background"""
+    current_user_id = get_jwt_identity()
+    if str(user_id) == str(current_user_id):
+        return jsonify({"message": "Cannot delete your own account"}), 400
+    
+    user = User.query.get(user_id)
+    if not user or user.deleted_at is not None:
+        return jsonify({"message": "User not found"}), 404
+    
+    tombstone_user(user)
+    db.session.commit()
+    invalidate_profile(user_id)
+    disconnect_user(user_id)
+    reaper.wake()
+    
+    return jsonify({"message": "User deleted successfully"}), 202
+
+def _flag(value):
+    """Interpret a query string / form / JSON flag"""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').lower() in ('1', 'true', 'yes')
+
+
+@admin_bp.post("/users/import")
+@admin_required
+def import_users_bulk():
+    """Import many users from a CSV upload (or a JSON list) in one transaction"""
+    data = request.get_json(silent=True) or {}
+    options = {**request.args.to_dict(), **request.form.to_dict(), **data}
+    
+    default_role = options.get('default_role', 'student')
+    if default_role not in VALID_ROLES:
+        return jsonify({"message": "Invalid role. Must be 'student' or 'admin'"}), 400
+    
+    try:
+        if 'file' in request.files:
+            rows = parse_user_csv(request.files['file'].read())
+        elif isinstance(data.get('users'), list):
+            rows = [
+                {key: str(value).strip() for key, value in user.items() if value is not None}
+                for user in data['users'] if isinstance(user, dict)
+            ]
+        elif isinstance(data.get('csv'), str):
+            rows = parse_user_csv(data['csv'])
+        else:
+            return jsonify({"message": "Provide a CSV file, a 'csv' string or a 'users' list"}), 400
+    except (UserImportError, UnicodeDecodeError) as e:
+        return jsonify({"message": str(e)}), 400
+    
+    report = import_users(
+        rows,
+        default_role=default_role,
+        update_existing=_flag(options.get('update_existing')),
+        dry_run=_flag(options.get('dry_run')),
+        acting_user_id=int(get_jwt_identity())
+    )
+    
+    if report['errors']:
+        return jsonify({"message": "Import aborted, no users were written", "report": report}), 400
+    
+    status = 200 if report['dry_run'] else 201
+    return jsonify({"message": "Dry run completed" if report['dry_run'] else "Users imported successfully", "report": report}), status
+
+
+@admin_bp.patch("/users/roles")
+@admin_required
+def update_user_roles():
+    """Assign a role to many users at once"""
+    data = request.get_json(silent=True) or {}
+    new_role = data.get('role')
+    user_ids = data.get('user_ids') or []
+    emails = data.get('emails') or []
+    
+    if new_role not in VALID_ROLES:
+        return jsonify({"message": "Invalid role. Must be 'student' or 'admin'"}), 400
+    
+    if not isinstance(user_ids, list) or not isinstance(emails, list) or not (user_ids or emails):
+        return jsonify({"message": "Provide a list of user_ids and/or emails"}), 400
+    
+    if not all(isinstance(user_id, int) for user_id in user_ids):
+        return jsonify({"message": "user_ids must be integers"}), 400
+    
+    report = set_roles(
+        new_role,
+        user_ids=user_ids,
+        emails=[str(email).strip() for email in emails],
+        exclude_user_id=int(get_jwt_identity()),
+        dry_run=_flag(data.get('dry_run'))
+    )
+    
+    return jsonify({"message": "User roles updated successfully", "report": report})
+
+
 @admin_bp.get("/topics")
 @admin_required
 def get_all_topics():
@@ -294,3 +407,161 @@ def get_ai_settings():
         },
         "default_provider": os.getenv('DEFAULT_AI_PROVIDER', 'gemini')
     })
+
+
+# Columns exported per dataset. Only plain columns are selected so rows stream
+# as tuples and never enter the session identity map.
+EXPORT_DATASETS = {
+    'users': [
+        User.id, User.email, User.full_name, User.university, User.program, User.academic_year,
+        User.role, User.auth_provider, User.onboarding_completed, User.created_at
+    ],
+    'topics': [
+        ProjectTopic.id, ProjectTopic.title, ProjectTopic.description, ProjectTopic.difficulty,
+        ProjectTopic.duration, ProjectTopic.program_area, ProjectTopic.tags, ProjectTopic.source_type,
+        ProjectTopic.ai_provider, ProjectTopic.created_at
+    ],
+    'generated_projects': [
+        GeneratedProject.id, GeneratedProject.user_id, GeneratedProject.project_topic_id,
+        GeneratedProject.ai_provider, GeneratedProject.generation_session_id,
+        GeneratedProject.created_at, GeneratedProject.viewed_at, GeneratedProject.last_interaction_at
+    ],
+    'saved_projects': [
+        SavedProject.id, SavedProject.user_id, SavedProject.project_topic_id, SavedProject.custom_title,
+        SavedProject.is_favorite, SavedProject.status, SavedProject.progress_percentage,
+        SavedProject.progress_tracking_enabled, SavedProject.saved_at, SavedProject.start_date,
+        SavedProject.expected_completion_date, SavedProject.actual_completion_date
+    ]
+}
+# Row filters per dataset: deleted accounts are left out of exports
+EXPORT_FILTERS = {
+    'users': [User.deleted_at.is_(None)]
+}
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_value(value):
+    """Convert a column value into something csv/json can write"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _export_rows(columns, criteria=()):
+    """Yield result rows in primary key order using a server-side cursor"""
+    stmt = select(*columns).where(*criteria).order_by(columns[0]).execution_options(
+        stream_results=True, yield_per=EXPORT_BATCH_SIZE
+    )
+    for row in db.session.execute(stmt):
+        yield [_export_value(value) for value in row]
+
+
+def _generate_csv(columns, criteria=()):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in columns])
+
+    for count, row in enumerate(_export_rows(columns, criteria), 1):
+        writer.writerow([json.dumps(v) if isinstance(v, (list, dict)) else v for v in row])
+        # Flush in chunks rather than per row to keep the number of writes low
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def _generate_jsonl(columns, criteria=()):
+    keys = [column.key for column in columns]
+    chunk = []
+
+    for row in _export_rows(columns, criteria):
+        chunk.append(json.dumps(dict(zip(keys, row))))
+        if len(chunk) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+@admin_bp.get("/export/<string:dataset>")
+@admin_required
+def export_dataset(dataset):
+    """Stream a full table export as CSV or JSON Lines"""
+    columns = EXPORT_DATASETS.get(dataset)
+    if columns is None:
+        return jsonify({"message": f"Unknown dataset. Must be one of: {', '.join(EXPORT_DATASETS)}"}), 404
+    
+    criteria = EXPORT_FILTERS.get(dataset, ())
+    export_format = request.args.get('format', 'csv', type=str)
+    if export_format == 'csv':
+        body, mimetype = _generate_csv(columns, criteria), 'text/csv'
+    elif export_format == 'jsonl':
+        body, mimetype = _generate_jsonl(columns, criteria), 'application/x-ndjson'
+    else:
+        return jsonify({"message": "Invalid format. Must be 'csv' or 'jsonl'"}), 400
+    
+    filename = f"{dataset}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@admin_bp.post("/archive")
+@admin_required
+def archive_history():
+    """Move old chat/activity rows into the cold archive (optional `days` overrides ARCHIVE_AFTER_DAYS)"""
+    data = request.get_json(silent=True) or {}
+    days = data.get('days')
+    
+    if days is not None and (not isinstance(days, int) or days < 0):
+        return jsonify({"message": "days must be a non-negative integer"}), 400
+    
+    return jsonify(run_archive(days))
+
+
+@admin_bp.get("/sql-stats")
+@admin_required
+def get_sql_stats():
+    """Per-endpoint query counts, DB time and repeated (N+1) statements since startup/reset"""
+    return jsonify({"endpoints": query_stats.snapshot()})
+
+
+@admin_bp.delete("/sql-stats")
+@admin_required
+def reset_sql_stats():
+    """Clear the collected SQL statistics"""
+    query_stats.reset()
+    return jsonify({"message": "SQL statistics reset"})
+
+
+@admin_bp.get("/profiles")
+@admin_required
+def get_profiles():
+    """Stored request profiles, newest first (profile a request with `X-Profile: 1` or `?_profile=1`)"""
+    return jsonify({"profiles": list_profiles()})
+
+
+@admin_bp.get("/profiles/<profile_id>")
+@admin_required
+def get_profile(profile_id):
+    """One profile with its call tree and SQL timings; ?format=collapsed gives flame graph input"""
+    profile = load_profile(profile_id)
+    if profile is None:
+        return jsonify({"message": "Profile not found"}), 404
+    if request.args.get('format') == 'collapsed':
+        return Response(collapsed(profile), mimetype='text/plain')
+    profile['call_tree'] = call_tree(profile['stacks'])
+    return jsonify(profile)
+
+
+@admin_bp.delete("/profiles")
+@admin_required
+def delete_profiles():
+    """Remove all stored profiles"""
+    return jsonify({"message": "Profiles removed", "removed": clear_profiles()})
@@ -0,0 +1,134 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta, timezone
+from ..models import User
+from ..admin.routes import admin_required
+from ..utils.analytics import (
+    GRANULARITIES, record_events, apply_retention, rebuild_rollups, rebuildable_start, get_timeseries
+)
+
+analytics_bp = Blueprint("analytics", __name__)
+
+# Cap the number of buckets a single time series request can return
+MAX_BUCKETS = {'hour': 24 * 31, 'day': 366 * 2}
+
+
+def _parse_timestamp(value):
+    """ISO 8601 -> naive UTC (how timestamps are stored); values without an offset are taken as UTC"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@analytics_bp.post("/events")
+@jwt_required()
+def ingest_events():
+    """Record one or more client usage events for the current user"""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user is None:
+        return jsonify({"message": "user not found"}), 404
+
+    data = request.get_json(silent=True) or {}
+    raw_events = data.get('events') if 'events' in data else [data]
+
+    if not isinstance(raw_events, list) or not raw_events:
+        return jsonify({"message": "events must be a non-empty list"}), 400
+
+    if len(raw_events) > current_app.config['ANALYTICS_MAX_BATCH']:
+        return jsonify({"message": f"At most {current_app.config['ANALYTICS_MAX_BATCH']} events per request"}), 400
+
+    now = datetime.utcnow()
+    events = []
+    for raw in raw_events:
+        activity_type = raw.get('activity_type') if isinstance(raw, dict) else None
+        if not activity_type or not isinstance(activity_type, str) or len(activity_type) > 50:
+            return jsonify({"message": "Each event needs an activity_type of at most 50 characters"}), 400
+
+        try:
+            created_at = _parse_timestamp(raw.get('created_at')) or now
+        except (TypeError, ValueError):
+            return jsonify({"message": "created_at must be an ISO 8601 timestamp"}), 400
+
+        events.append({
+            'activity_type': activity_type,
+            'activity_data': raw.get('activity_data') if isinstance(raw.get('activity_data'), dict) else None,
+            'session_id': raw.get('session_id'),
+            'project_topic_id': raw.get('project_topic_id') if isinstance(raw.get('project_topic_id'), int) else None,
+            # Never trust client clocks ahead of ours
+            'created_at': min(created_at, now)
+        })
+
+    recorded = record_events(user, events)
+
+    return jsonify({"recorded": recorded}), 201
+
+
+@analytics_bp.get("/timeseries")
+@admin_required
+def get_activity_timeseries():
+    """Get activity counts over time from the rollup tables"""
+    granularity = request.args.get('granularity', 'day', type=str)
+    if granularity not in GRANULARITIES:
+        return jsonify({"message": "granularity must be 'hour' or 'day'"}), 400
+
+    try:
+        end = _parse_timestamp(request.args.get('end')) or datetime.utcnow()
+        start = _parse_timestamp(request.args.get('start')) or end - timedelta(days=30)
+    except ValueError:
+        return jsonify({"message": "start and end must be ISO 8601 timestamps"}), 400
+
+    if start >= end:
+        return jsonify({"message": "start must be before end"}), 400
+
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+    if (end - start) / step > MAX_BUCKETS[granularity]:
+        return jsonify({"message": f"Range too large for {granularity} granularity"}), 400
+
+    activity_types = [t for t in request.args.getlist('activity_type') if t]
+    program = request.args.get('program', type=str)
+
+    series = get_timeseries(granularity, start, end, activity_types=activity_types, program=program)
+
+    return jsonify({
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": series
+    })
+
+
+@analytics_bp.post("/rollups/rebuild")
+@admin_required
+def rebuild_activity_rollups():
+    """Recompute rollups for a date range from the raw events still retained"""
+    data = request.get_json(silent=True) or {}
+    try:
+        start = _parse_timestamp(data.get('start'))
+        end = _parse_timestamp(data.get('end'))
+    except (TypeError, ValueError):
+        return jsonify({"message": "start and end must be ISO 8601 timestamps"}), 400
+
+    if not start or not end:
+        return jsonify({"message": "start and end are required"}), 400
+
+    # Days whose raw events were purged keep their rollups untouched
+    earliest = rebuildable_start()
+    events = rebuild_rollups(start, end)
+
+    return jsonify({
+        "message": "Rollups rebuilt",
+        "events": events,
+        "start": max(start, earliest).isoformat(),
+        "clamped": start < earliest
+    })
+
+
+@analytics_bp.post("/retention")
+@admin_required
+def run_retention():
+    """Purge raw events and hourly rollups older than the configured windows"""
+    return jsonify(apply_retention())
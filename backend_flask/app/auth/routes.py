@@ -1,12 +1,25 @@
-from flask import Blueprint, request, jsonify, url_for, redirect
+from flask import Blueprint, request, jsonify, url_for, redirect, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from authlib.integrations.flask_client import OAuth
-from ..extensions import db
+from ..extensions import db, jwt
 from ..models import User
+from ..utils.cache import profile_cache, invalidate_profile
+from ..utils.accounts import is_active_account
+import hashlib
+import json
+import logging
 import os
 
 
 auth_bp = Blueprint("auth", __name__)
+logger = logging.getLogger(__name__)
+
+
+@jwt.token_in_blocklist_loader
+def _token_of_deleted_account(jwt_header, jwt_payload):
+    """Reject every token of a deleted account at once instead of when it expires"""
+    return not is_active_account(jwt_payload.get("sub"))
+
 
 # Initialize OAuth
 oauth = OAuth()
@@ -57,6 +70,11 @@ def login():
     if user is None or not user.check_password(password):
         return jsonify({"message": "invalid credentials"}), 401
 
+    # Upgrade hashes created with a different BCRYPT_LOG_ROUNDS while we have the plaintext
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+
     token = create_access_token(identity=str(user.id))
     return jsonify({"access_token": token})
 
@@ -116,6 +134,7 @@ def google_callback():
                 user.full_name = full_name
         
         db.session.commit()
+        invalidate_profile(user.id)
         
         # Create JWT token
         jwt_token = create_access_token(identity=str(user.id))
@@ -124,8 +143,8 @@ def google_callback():
         frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
         return redirect(f"{frontend_url}?token={jwt_token}")
         
-    except Exception as e:
-        print(f"Google OAuth error: {str(e)}")
+    except Exception:
+        logger.exception("Google OAuth callback failed")
         return redirect(f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}?error=oauth_failed")
 
 
@@ -146,6 +165,7 @@ def complete_onboarding():
     
     user.onboarding_completed = True
     db.session.commit()
+    invalidate_profile(user.id)
     
     return jsonify({"message": "onboarding completed", "onboarding_completed": True})
 
@@ -155,22 +175,20 @@ def complete_onboarding():
 def update_profile():
     """Update user profile information"""
     user_id = get_jwt_identity()
-    print(f"[DEBUG] Profile update - JWT identity: {user_id}")
     
     # Convert to int since JWT identity is stored as string
     try:
         user_id = int(user_id)
     except (ValueError, TypeError):
-        print(f"[ERROR] Invalid user_id type: {type(user_id)}, value: {user_id}")
+        logger.warning("profile update with invalid identity", extra={'identity': repr(user_id)})
         return jsonify({"message": "Invalid token"}), 401
     
     user = User.query.get(user_id)
     if user is None:
-        print(f"[ERROR] User not found with id: {user_id}")
+        logger.warning("profile update for unknown user", extra={'user_id': user_id})
         return jsonify({"message": "user not found"}), 404
     
     data = request.get_json(silent=True) or {}
-    print(f"[DEBUG] Profile update data: {data}")
     
     # Update allowed fields
     if 'full_name' in data:
@@ -193,28 +211,31 @@ def update_profile():
         user.expected_duration = data['expected_duration'].strip() if data['expected_duration'] else None
     
     db.session.commit()
-    print(f"[DEBUG] Profile updated successfully for user {user_id}")
+    invalidate_profile(user.id)
+    logger.debug("profile updated", extra={'user_id': user_id, 'fields': sorted(data)})
     
     return jsonify({
         "message": "profile updated successfully",
-        "user": {
-            "id": user.id,
-            "email": user.email,
-            "full_name": user.full_name,
-            "university": user.university,
-            "program": user.program,
-            "academic_year": user.academic_year,
-            "interests": user.interests,
-            "skills": user.skills,
-            "project_preference": user.project_preference,
-            "expected_duration": user.expected_duration,
-            "auth_provider": user.auth_provider,
-            "onboarding_completed": user.onboarding_completed,
-            "role": user.role
-        }
+        "user": user.to_dict()
     })
 
 
+def _get_cached_profile(user_id):
+    """Return (payload, etag) for a user's profile, loading it on a cache miss"""
+    cached = profile_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    user = User.query.get(user_id)
+    if user is None:
+        return None
+    
+    payload = user.to_dict()
+    etag = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    profile_cache.set(user_id, (payload, etag), current_app.config["PROFILE_CACHE_TTL"])
+    return payload, etag
+
+
 @auth_bp.get("/me")
 @jwt_required()
 def me():
@@ -225,24 +246,19 @@ def me():
     except (ValueError, TypeError):
         return jsonify({"message": "Invalid token"}), 401
     
-    user = User.query.get(user_id)
-    if user is None:
+    profile = _get_cached_profile(user_id)
+    if profile is None:
         return jsonify({"message": "user not found"}), 404
-    return jsonify({
-        "id": user.id,
-        "email": user.email,
-        "full_name": user.full_name,
-        "university": user.university,
-        "program": user.program,
-        "academic_year": user.academic_year,
-        "interests": user.interests,
-        "skills": user.skills,
-        "project_preference": user.project_preference,
-        "expected_duration": user.expected_duration,
-        "auth_provider": user.auth_provider,
-        "onboarding_completed": user.onboarding_completed,
-        "role": user.role
-    })
+    payload, etag = profile
+    
+    # Unchanged profile: answer from the cache without a body
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @auth_bp.post("/change-password")
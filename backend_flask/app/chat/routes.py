@@ -1,10 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from ..extensions import db, socketio
+import logging
+from ..extensions import db
 from ..models import WorkspaceMessage, Workspace, WorkspaceMember, User
+from .writer import InvalidMessage, message_writer
+from .search import search_messages
+from ..utils.archive import read_archived
 
 chat_bp = Blueprint("chat", __name__)
+logger = logging.getLogger(__name__)
 
 
 @chat_bp.get("/<int:workspace_id>/messages")
@@ -14,7 +19,7 @@ def get_messages(workspace_id):
     user_id = int(get_jwt_identity())
     
     # Check if user is a member of the workspace
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     member = WorkspaceMember.query.filter_by(
         workspace_id=workspace_id,
         user_id=user_id
@@ -26,23 +31,68 @@ def get_messages(workspace_id):
     # Get messages, ordered by creation time
     limit = request.args.get('limit', 50, type=int)
     before_id = request.args.get('before', type=int)
+    after_id = request.args.get('after', type=int)
     
     query = WorkspaceMessage.query.filter_by(workspace_id=workspace_id)
     
-    if before_id:
-        query = query.filter(WorkspaceMessage.id < before_id)
-    
-    messages = query.order_by(WorkspaceMessage.created_at.desc()).limit(limit).all()
-    
-    # Reverse to show oldest first
-    messages.reverse()
+    if after_id is not None:
+        # Page forwards from a cursor (e.g. a search hit); archived rows come first
+        messages = read_archived('workspace_message', workspace_id, limit, after_id=after_id)
+        if len(messages) < limit:
+            hot = query.filter(WorkspaceMessage.id > after_id).order_by(WorkspaceMessage.id).limit(limit - len(messages)).all()
+            messages += [msg.to_dict() for msg in hot]
+    else:
+        if before_id:
+            query = query.filter(WorkspaceMessage.id < before_id)
+        
+        hot = query.order_by(WorkspaceMessage.created_at.desc()).limit(limit).all()
+        messages = [msg.to_dict() for msg in hot]
+        
+        # Ran out of hot rows: continue into the cold archive
+        if len(messages) < limit:
+            messages += read_archived(
+                'workspace_message', workspace_id, limit - len(messages),
+                before_id=hot[-1].id if hot else before_id
+            )
+        
+        # Reverse to show oldest first
+        messages.reverse()
     
     return jsonify({
-        "messages": [msg.to_dict() for msg in messages],
+        "messages": messages,
         "has_more": len(messages) == limit
     })
 
 
+@chat_bp.get("/<int:workspace_id>/search")
+@jwt_required()
+def search_workspace_messages(workspace_id):
+    """Full-text search over a workspace's chat history"""
+    user_id = int(get_jwt_identity())
+    
+    # Check if user is a member of the workspace
+    workspace = Workspace.get_active_or_404(workspace_id)
+    member = WorkspaceMember.query.filter_by(
+        workspace_id=workspace_id,
+        user_id=user_id
+    ).first()
+    
+    if not member and workspace.owner_id != user_id:
+        return jsonify({"error": "Access denied"}), 403
+    
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"error": "Search query is required"}), 400
+    
+    return jsonify(search_messages(
+        workspace_id,
+        query,
+        limit=request.args.get('limit', 20, type=int),
+        offset=max(request.args.get('offset', 0, type=int), 0),
+        context=request.args.get('context', 2, type=int)
+    ))
+
+
 @chat_bp.post("/<int:workspace_id>/messages")
 @jwt_required()
 def send_message(workspace_id):
@@ -50,7 +100,7 @@ def send_message(workspace_id):
     user_id = int(get_jwt_identity())
     
     # Check if user is a member of the workspace
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     member = WorkspaceMember.query.filter_by(
         workspace_id=workspace_id,
         user_id=user_id
@@ -59,26 +109,31 @@ def send_message(workspace_id):
     if not member and workspace.owner_id != user_id:
         return jsonify({"error": "Access denied"}), 403
     
-    data = request.get_json()
-    message_text = data.get('message', '').strip()
+    data = request.get_json(silent=True) or {}
+    message_text = data.get('message', '')
+    message_text = message_text.strip() if isinstance(message_text, str) else ''
     
     if not message_text:
         return jsonify({"error": "Message cannot be empty"}), 400
     
-    # Create message
-    message = WorkspaceMessage(
-        workspace_id=workspace_id,
-        user_id=user_id,
-        message=message_text,
-        message_type=data.get('message_type', 'text')
-    )
-    
-    db.session.add(message)
-    db.session.commit()
-    
-    # Emit WebSocket event to all workspace members
-    message_dict = message.to_dict()
-    socketio.emit('new_message', message_dict, room=f'workspace_{workspace_id}')
+    # Queue for the next group commit; the writer broadcasts new_message to the room
+    user = User.query.get(user_id)
+    try:
+        future = message_writer.submit(
+            workspace_id,
+            user_id,
+            message_text,
+            message_type=data.get('message_type', 'text'),
+            user_name=user.full_name if user else None,
+            user_email=user.email if user else None
+        )
+    except InvalidMessage as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        message_dict = future.result(timeout=current_app.config['CHAT_ACK_TIMEOUT'])
+    except Exception:
+        logger.exception("send_message failed", extra={'workspace_id': workspace_id, 'user_id': user_id})
+        return jsonify({"error": "Message could not be saved, please retry"}), 503
     
     return jsonify(message_dict), 201
 
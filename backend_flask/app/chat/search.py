@@ -0,0 +1,207 @@
+import re
+
+from sqlalchemy import literal, select, text, union_all
+
+from ..extensions import db
+from ..models import ArchivedMessageSearch, User, WorkspaceMessage
+from ..utils.archive import archived_messages
+
+MAX_RESULTS = 50
+MAX_CONTEXT = 5
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_query(query):
+    """Turn free text into a safe FTS5 expression: every word required, last one as a prefix"""
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _message_columns():
+    return (
+        WorkspaceMessage.id,
+        WorkspaceMessage.workspace_id,
+        WorkspaceMessage.user_id,
+        User.full_name.label('user_name'),
+        User.email.label('user_email'),
+        WorkspaceMessage.message,
+        WorkspaceMessage.message_type,
+        WorkspaceMessage.created_at
+    )
+
+
+def _to_dict(row):
+    """Same shape as WorkspaceMessage.to_dict() without loading each user separately"""
+    return {
+        'id': row.id,
+        'workspace_id': row.workspace_id,
+        'user_id': row.user_id,
+        'user_name': row.user_name,
+        'user_email': row.user_email,
+        'message': row.message,
+        'message_type': row.message_type,
+        'created_at': row.created_at.isoformat()
+    }
+
+
+def _ranked_ids(workspace_id, query, limit, offset):
+    """Return [(message_id, snippet)] best match first, using the dialect's FTS index.
+
+    Live and archived messages are ranked together; archived ones are matched
+    through archived_message_search, which archiving fills as it moves rows out.
+    """
+    dialect = db.engine.dialect.name
+
+    if dialect == 'sqlite':
+        match = _fts5_query(query)
+        if match is None:
+            return []
+        return db.session.execute(text(
+            "SELECT id, snip FROM ("
+            "SELECT m.id AS id, snippet(workspace_message_fts, 0, '[', ']', '...', 12) AS snip, "
+            "bm25(workspace_message_fts) AS rank "
+            "FROM workspace_message_fts "
+            "JOIN workspace_message m ON m.id = workspace_message_fts.rowid "
+            "WHERE workspace_message_fts MATCH :match AND m.workspace_id = :workspace_id "
+            "UNION ALL "
+            "SELECT a.id, snippet(archived_message_fts, 0, '[', ']', '...', 12), bm25(archived_message_fts) "
+            "FROM archived_message_fts "
+            "JOIN archived_message_search a ON a.id = archived_message_fts.rowid "
+            "WHERE archived_message_fts MATCH :match AND a.workspace_id = :workspace_id"
+            ") ORDER BY rank, id DESC "
+            "LIMIT :limit OFFSET :offset"
+        ), {'match': match, 'workspace_id': workspace_id, 'limit': limit, 'offset': offset}).all()
+
+    if dialect == 'postgresql':
+        # Headlines are built in the outer query, for the returned page only
+        return db.session.execute(text(
+            "SELECT id, ts_headline('english', message, websearch_to_tsquery('english', :query), "
+            "'StartSel=[, StopSel=], MaxWords=24, MinWords=8') FROM ("
+            "SELECT id, message, ts_rank(search_vector, q) AS rank "
+            "FROM workspace_message, websearch_to_tsquery('english', :query) q "
+            "WHERE workspace_id = :workspace_id AND search_vector @@ q "
+            "UNION ALL "
+            "SELECT id, message, ts_rank(search_vector, q) "
+            "FROM archived_message_search, websearch_to_tsquery('english', :query) q "
+            "WHERE workspace_id = :workspace_id AND search_vector @@ q"
+            ") hits ORDER BY rank DESC, id DESC "
+            "LIMIT :limit OFFSET :offset"
+        ), {'query': query, 'workspace_id': workspace_id, 'limit': limit, 'offset': offset}).all()
+
+    # No FTS support: fall back to a substring scan, newest first. The query is
+    # matched literally, so % and _ are escaped rather than acting as wildcards
+    pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    hits = union_all(*(
+        select(model.id, model.message)
+        .where(model.workspace_id == workspace_id, model.message.ilike(pattern, escape='\\'))
+        for model in (WorkspaceMessage, ArchivedMessageSearch)
+    )).subquery()
+    return db.session.execute(
+        select(hits.c.id, hits.c.message).order_by(hits.c.id.desc()).limit(limit).offset(offset)
+    ).all()
+
+
+def _neighbour_ids(workspace_id, hit_ids, context):
+    """{hit id: (ids before, ids after)}, oldest first, for every hit in one statement.
+
+    A UNION ALL of two small index range scans per hit, instead of two queries per hit.
+    """
+    branches = []
+    for hit_id in hit_ids:
+        for side, condition, order in (
+            ('before', WorkspaceMessage.id < hit_id, WorkspaceMessage.id.desc()),
+            ('after', WorkspaceMessage.id > hit_id, WorkspaceMessage.id)
+        ):
+            # Wrapped as subqueries: SQLite rejects LIMIT inside a bare compound member
+            branch = (
+                select(WorkspaceMessage.id, literal(hit_id).label('hit'), literal(side).label('side'))
+                .where(WorkspaceMessage.workspace_id == workspace_id, condition)
+                .order_by(order).limit(context)
+                .subquery()
+            )
+            branches.append(select(branch.c.id, branch.c.hit, branch.c.side))
+
+    neighbours = {hit_id: ([], []) for hit_id in hit_ids}
+    for row in db.session.execute(union_all(*branches)):
+        neighbours[row.hit][0 if row.side == 'before' else 1].append(row.id)
+    for before, after in neighbours.values():
+        before.sort()
+        after.sort()
+    return neighbours
+
+
+def search_messages(workspace_id, query, limit=20, offset=0, context=2):
+    """Ranked chat search for one workspace.
+
+    Each hit carries the message, a highlighted snippet, `context` messages
+    either side, and cursors for jumping into history:
+    GET /messages?before=<cursor.before> or ?after=<cursor.after>.
+    Archived hits and context come from the archive segments and carry
+    `archived: true`, as in history reads.
+    """
+    limit = max(1, min(limit, MAX_RESULTS))
+    context = max(0, min(context, MAX_CONTEXT))
+
+    ranked = _ranked_ids(workspace_id, query, limit + 1, offset)
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+    if not ranked:
+        return {'results': [], 'has_more': False, 'next_offset': None}
+
+    ids = [message_id for message_id, _ in ranked]
+    neighbours = _neighbour_ids(workspace_id, ids, context) if context else {}
+    # Hits and their context are loaded together, with their authors, in one query
+    load_ids = set(ids)
+    for before, after in neighbours.values():
+        load_ids.update(before)
+        load_ids.update(after)
+    messages = {
+        row.id: _to_dict(row)
+        for row in db.session.execute(
+            select(*_message_columns())
+            .outerjoin(User, User.id == WorkspaceMessage.user_id)
+            .where(WorkspaceMessage.id.in_(load_ids))
+        )
+    }
+
+    # Archived hits, and live hits whose earlier context was archived, read the segments
+    from_archive = [
+        message_id for message_id in ids
+        if message_id not in messages or (context and len(neighbours[message_id][0]) < context)
+    ]
+    if from_archive:
+        archived, archived_neighbours = archived_messages(workspace_id, from_archive, context)
+        messages.update(archived)
+        # Keep the `context` closest of the live and archived neighbours on each side
+        for message_id, (archived_before, archived_after) in archived_neighbours.items():
+            live_before, live_after = neighbours[message_id]
+            neighbours[message_id] = (
+                sorted(set(live_before + archived_before))[-context:],
+                sorted(set(live_after + archived_after))[:context]
+            )
+
+    results = []
+    for message_id, snippet in ranked:
+        if message_id not in messages:
+            continue  # indexed, but its segment file is gone
+        hit = {
+            'message': messages[message_id],
+            'snippet': snippet,
+            'cursor': {'before': message_id + 1, 'after': message_id - 1}
+        }
+        if context:
+            before, after = neighbours[message_id]
+            hit['context_before'] = [messages[i] for i in before]
+            hit['context_after'] = [messages[i] for i in after]
+        results.append(hit)
+
+    return {
+        'results': results,
+        'has_more': has_more,
+        'next_offset': offset + limit if has_more else None
+    }
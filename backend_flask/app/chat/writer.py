@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+from ..extensions import db, socketio
+from ..models import WorkspaceMessage
+from ..utils.emitter import room_emitter
+from ..utils.unread import count_new_messages
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_TYPE_MAX_LENGTH = WorkspaceMessage.__table__.c.message_type.type.length
+
+
+class InvalidMessage(ValueError):
+    """Raised by MessageWriter.submit for a message that could never be stored"""
+
+
+class _PendingMessage:
+    __slots__ = ('row', 'user_name', 'user_email', 'skip_sid', 'future')
+
+    def __init__(self, row, user_name, user_email, skip_sid):
+        self.row = row
+        self.user_name = user_name
+        self.user_email = user_email
+        self.skip_sid = skip_sid
+        self.future = Future()
+
+
+class MessageWriter:
+    """Group-commit buffer for chat messages.
+
+    Senders append to an in-memory queue and wait on a future. A single
+    background task drains the queue every CHAT_FLUSH_INTERVAL_MS, writes the
+    whole batch as a multi-row INSERT ... RETURNING id and one commit, then resolves each future with the stored
+    message and broadcasts it to the workspace room. Input is validated before
+    queueing, and if a batch still fails its rows are retried one by one so a
+    single bad row only fails its own sender.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._cond = threading.Condition()
+        self._app = None
+
+    def _ensure_started(self):
+        if self._app is None:
+            with self._cond:
+                if self._app is None:
+                    self._app = current_app._get_current_object()
+                    socketio.start_background_task(self._run)
+
+    def submit(self, workspace_id, user_id, message, message_type='text',
+               user_name=None, user_email=None, skip_sid=None):
+        """Queue a message for the next group commit and return a Future of its dict"""
+        if not isinstance(message, str) or not message.strip():
+            raise InvalidMessage('Message cannot be empty')
+        if not isinstance(message_type, str) or not 0 < len(message_type) <= MESSAGE_TYPE_MAX_LENGTH:
+            raise InvalidMessage(f'message_type must be a string of at most {MESSAGE_TYPE_MAX_LENGTH} characters')
+        self._ensure_started()
+
+        pending = _PendingMessage(
+            {
+                'workspace_id': workspace_id,
+                'user_id': user_id,
+                'message': message,
+                'message_type': message_type,
+                'created_at': datetime.utcnow()
+            },
+            user_name, user_email, skip_sid
+        )
+        with self._cond:
+            self._pending.append(pending)
+            self._cond.notify()
+        return pending.future
+
+    def _run(self):
+        interval = self._app.config['CHAT_FLUSH_INTERVAL_MS'] / 1000.0
+        max_batch = self._app.config['CHAT_FLUSH_MAX_BATCH']
+
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+            # Let concurrent senders pile into the same batch
+            time.sleep(interval)
+
+            with self._cond:
+                batch = self._pending[:max_batch]
+                del self._pending[:max_batch]
+
+            try:
+                self._flush(batch)
+            except Exception:
+                # Never let one bad batch kill the writer task
+                logger.exception("chat writer flush failed", extra={'messages': len(batch)})
+
+    def _insert(self, rows):
+        """INSERT all rows in as few statements as possible and return their ids in row order"""
+        if db.engine.dialect.name == 'sqlite':
+            # SQLAlchemy falls back to one statement per row when asked to sort
+            # RETURNING on SQLite. A single INSERT assigns rowids in VALUES
+            # order under SQLite's one-writer lock, so sorting the ids is enough.
+            return sorted(db.session.execute(
+                insert(WorkspaceMessage).returning(WorkspaceMessage.id), rows
+            ).scalars().all())
+
+        return db.session.execute(
+            insert(WorkspaceMessage).returning(WorkspaceMessage.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+    def _commit(self, batch):
+        """Store `batch` in one transaction and return the new ids in order"""
+        try:
+            rows = [pending.row for pending in batch]
+            ids = self._insert(rows)
+            count_new_messages(rows)
+            db.session.commit()
+            return ids
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _flush(self, batch):
+        with self._app.app_context():
+            try:
+                stored = list(zip(batch, self._commit(batch)))
+            except Exception as e:
+                stored = []
+                if len(batch) == 1:
+                    batch[0].future.set_exception(e)
+                else:
+                    # Find the bad row(s): retry one by one so the others are still stored
+                    logger.warning("chat batch insert failed, retrying row by row", extra={'messages': len(batch)})
+                    for pending in batch:
+                        try:
+                            stored.extend(zip([pending], self._commit([pending])))
+                        except Exception as row_error:
+                            pending.future.set_exception(row_error)
+            finally:
+                db.session.remove()
+
+            # Answer every sender before broadcasting, so a failing emit cannot leave a future unresolved
+            payloads = []
+            for pending, message_id in stored:
+                row = pending.row
+                payload = {
+                    'id': message_id,
+                    'workspace_id': row['workspace_id'],
+                    'user_id': row['user_id'],
+                    'user_name': pending.user_name,
+                    'user_email': pending.user_email,
+                    'message': row['message'],
+                    'message_type': row['message_type'],
+                    'created_at': row['created_at'].isoformat()
+                }
+                pending.future.set_result(payload)
+                payloads.append((payload, pending.skip_sid))
+
+            for payload, skip_sid in payloads:
+                try:
+                    room_emitter.emit('new_message', payload, payload['workspace_id'], skip_sid=skip_sid)
+                except Exception:
+                    logger.exception("new_message broadcast failed", extra={'message_id': payload['id']})
+
+
+message_writer = MessageWriter()
@@ -7,3 +7,81 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Usage analytics
+    ANALYTICS_MAX_BATCH = int(os.getenv("ANALYTICS_MAX_BATCH", "500"))
+    ANALYTICS_RAW_RETENTION_DAYS = int(os.getenv("ANALYTICS_RAW_RETENTION_DAYS", "30"))
+    ANALYTICS_HOURLY_RETENTION_DAYS = int(os.getenv("ANALYTICS_HOURLY_RETENTION_DAYS", "90"))
+
+    # Password hashing (PASSWORD_HASH_WORKERS=0 hashes inline on the request thread).
+    # Changing BCRYPT_LOG_ROUNDS rehashes existing passwords on their next login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_QUEUE_FACTOR = int(os.getenv("PASSWORD_HASH_QUEUE_FACTOR", "4"))
+
+    # Admin bulk user import
+    USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", "5000"))
+
+    # Seconds a cached /api/auth/me payload may be served (per worker process, so other
+    # workers can show a stale role for this long; ETags keep revalidation cheap)
+    PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "10"))
+
+    # Seconds the first page of a user's cross-workspace feed may be served from cache
+    FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", "10"))
+
+    # Chat group commit: socket/REST messages are buffered and written together
+    CHAT_FLUSH_INTERVAL_MS = int(os.getenv("CHAT_FLUSH_INTERVAL_MS", "5"))
+    CHAT_FLUSH_MAX_BATCH = int(os.getenv("CHAT_FLUSH_MAX_BATCH", "500"))
+    CHAT_ACK_TIMEOUT = float(os.getenv("CHAT_ACK_TIMEOUT", "5"))
+
+    # Window for coalescing room events into one frame for batching clients
+    SOCKET_COALESCE_MS = int(os.getenv("SOCKET_COALESCE_MS", "25"))
+
+    # Presence: last_active is written behind in bulk every N seconds
+    PRESENCE_FLUSH_SECONDS = int(os.getenv("PRESENCE_FLUSH_SECONDS", "30"))
+    PRESENCE_TYPING_SECONDS = int(os.getenv("PRESENCE_TYPING_SECONDS", "5"))
+
+    # Cold archive: chat/activity rows older than ARCHIVE_AFTER_DAYS move to compressed
+    # per-workspace segment files and are still served by the history endpoints
+    ARCHIVE_FOLDER = os.getenv("ARCHIVE_FOLDER", os.path.join(os.path.dirname(os.path.dirname(__file__)), "archive"))
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+    # Deleted workspaces/users are tombstoned, then reaped in batches by a background task (0 = no reaper)
+    REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "500"))
+    REAPER_INTERVAL_SECONDS = int(os.getenv("REAPER_INTERVAL_SECONDS", "300"))
+
+    # Public workspace discovery: each member is worth this many hours of recency in the ranking
+    DISCOVERY_MEMBER_WEIGHT_HOURS = float(os.getenv("DISCOVERY_MEMBER_WEIGHT_HOURS", "24"))
+    DISCOVERY_CACHE_TTL = int(os.getenv("DISCOVERY_CACHE_TTL", "30"))
+
+    # Workspace invites: lifetime, and how often/in what batches overdue ones are expired (0 = no sweeper)
+    INVITE_EXPIRY_DAYS = int(os.getenv("INVITE_EXPIRY_DAYS", "7"))
+    INVITE_SWEEP_SECONDS = int(os.getenv("INVITE_SWEEP_SECONDS", "600"))
+    INVITE_SWEEP_BATCH_SIZE = int(os.getenv("INVITE_SWEEP_BATCH_SIZE", "500"))
+    INVITE_BULK_MAX = int(os.getenv("INVITE_BULK_MAX", "500"))
+
+    # Per-request SQL counting; a statement repeated this often in one request is logged as N+1
+    SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "true").lower() == "true"
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+    # Prometheus-style GET /metrics; scrapers send METRICS_TOKEN as a Bearer token.
+    # Without a token the endpoint is only served when METRICS_PUBLIC=true (local development)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() == "true"
+
+    # On-demand profiling: admins add `X-Profile: 1` or `?_profile=1` to a request; the newest
+    # PROFILE_KEEP profiles are kept in PROFILE_FOLDER
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+    PROFILE_FOLDER = os.getenv("PROFILE_FOLDER", os.path.join(os.path.dirname(os.path.dirname(__file__)), "profiles"))
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "2"))
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+
+    # Logging: records go through a bounded queue to one writer thread (full queue = dropped record).
+    # LOG_LEVELS / LOG_SAMPLE_RATES take "logger=value" pairs, e.g. "app.sockets=DEBUG" / "app.sockets=0.1";
+    # sampling only thins records below WARNING
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "app.sockets=0.1")
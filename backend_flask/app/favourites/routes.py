@@ -1,11 +1,13 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+import logging
 from ..extensions import db
 from ..models import User, SavedProject, ProjectTopic
 
 
 favourites_bp = Blueprint("favourites", __name__)
+logger = logging.getLogger(__name__)
 
 
 @favourites_bp.get("/")
@@ -50,17 +52,14 @@ def get_favourites():
 @jwt_required()
 def save_favourite():
     """Save a project topic as favourite"""
-    print("=== SAVE FAVOURITE ROUTE CALLED ===")
     user_id = get_jwt_identity()
-    print(f"User ID: {user_id}")
     data = request.get_json(silent=True) or {}
-    print(f"Request data: {data}")
     
     topic_data = data.get("topicData")
     notes = data.get("notes", "")
     
     if not topic_data:
-        print("ERROR: topicData is required")
+        logger.debug("save_favourite without topicData", extra={'user_id': user_id, 'fields': sorted(data)})
         return jsonify({"message": "topicData is required"}), 400
     
     # Create or get project topic
@@ -3,9 +3,11 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
-from ..extensions import db, socketio
+from ..extensions import db
 from ..models import WorkspaceFile, Workspace, WorkspaceMember, User
 from ..utils.activity import log_activity
+from ..utils.emitter import room_emitter
+from ..utils.metrics import upload_bytes
 
 files_bp = Blueprint("files", __name__)
 
@@ -60,7 +62,7 @@ def get_files(workspace_id):
     user_id = int(get_jwt_identity())
     
     # Check if user is a member of the workspace
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     member = WorkspaceMember.query.filter_by(
         workspace_id=workspace_id,
         user_id=user_id
@@ -86,7 +88,7 @@ def upload_file(workspace_id):
     user_id = int(get_jwt_identity())
     
     # Check if user is a member of the workspace
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     member = WorkspaceMember.query.filter_by(
         workspace_id=workspace_id,
         user_id=user_id
@@ -132,6 +134,7 @@ def upload_file(workspace_id):
     
     # Save file
     file.save(file_path)
+    upload_bytes.inc(file_size)
     
     # Get description from form data
     description = request.form.get('description', '')
@@ -167,7 +170,7 @@ def upload_file(workspace_id):
     
     # Emit WebSocket event
     file_dict = workspace_file.to_dict()
-    socketio.emit('new_file', file_dict, room=f'workspace_{workspace_id}')
+    room_emitter.emit('new_file', file_dict, workspace_id)
     
     return jsonify(file_dict), 201
 
@@ -179,7 +182,7 @@ def download_file(workspace_id, file_id):
     user_id = int(get_jwt_identity())
     
     # Check if user is a member of the workspace
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     member = WorkspaceMember.query.filter_by(
         workspace_id=workspace_id,
         user_id=user_id
@@ -211,7 +214,7 @@ def delete_file(workspace_id, file_id):
     user_id = int(get_jwt_identity())
     
     # Check if user is a member of the workspace
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     member = WorkspaceMember.query.filter_by(
         workspace_id=workspace_id,
         user_id=user_id
@@ -1,7 +1,8 @@
 from datetime import datetime
-from .extensions import db, bcrypt
+from .extensions import db
+from .utils import passwords
 from sqlalchemy.dialects.postgresql import JSON
-from sqlalchemy import Text
+from sqlalchemy import DDL, Text, event
 
 
 class User(db.Model):
@@ -20,6 +21,9 @@ class User(db.Model):
     # User role
     role = db.Column(db.String(20), default='student', nullable=False)  # 'student' or 'admin'
     
+    # Tombstone: set when the account is deleted; the row and its data are reaped in the background
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)
+    
     # Additional user profile fields
     full_name = db.Column(db.String(255), nullable=True)
     university = db.Column(db.String(255), nullable=True)
@@ -40,12 +44,33 @@ class User(db.Model):
     saved_projects = db.relationship('SavedProject', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password: str) -> None:
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password: str) -> bool:
         if not self.password_hash:
             return False
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return passwords.check_password(self.password_hash, password)
+    
+    def password_needs_rehash(self) -> bool:
+        return bool(self.password_hash) and passwords.needs_rehash(self.password_hash)
+    
+    def to_dict(self):
+        """Profile fields returned by /api/auth/me and profile updates"""
+        return {
+            'id': self.id,
+            'email': self.email,
+            'full_name': self.full_name,
+            'university': self.university,
+            'program': self.program,
+            'academic_year': self.academic_year,
+            'interests': self.interests,
+            'skills': self.skills,
+            'project_preference': self.project_preference,
+            'expected_duration': self.expected_duration,
+            'auth_provider': self.auth_provider,
+            'onboarding_completed': self.onboarding_completed,
+            'role': self.role
+        }
     
     def is_admin(self) -> bool:
         return self.role == 'admin'
@@ -258,6 +283,23 @@ class UserActivity(db.Model):
     )
 
 
+class ActivityRollup(db.Model):
+    """Pre-aggregated UserActivity counts per time bucket, activity type and program"""
+    __tablename__ = 'activity_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    activity_type = db.Column(db.String(50), nullable=False)
+    program = db.Column(db.String(100), nullable=False, default='')  # '' when the user has no program
+    count = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'activity_type', 'program', name='unique_activity_rollup_bucket'),
+        db.Index('ix_activity_rollup_granularity_type_bucket', 'granularity', 'activity_type', 'bucket_start'),
+    )
+
+
 class UserSkill(db.Model):
     """Track user's declared skills with proficiency levels"""
     id = db.Column(db.Integer, primary_key=True)
@@ -381,16 +423,32 @@ class Workspace(db.Model):
     is_public = db.Column(db.Boolean, default=False, nullable=False)  # Public workspaces are discoverable
     max_members = db.Column(db.Integer, default=10, nullable=False)
     
+    # Discovery (maintained incrementally, see utils/discovery.py)
+    program_area = db.Column(db.String(100), nullable=True, index=True)  # from the linked project topic
+    member_count = db.Column(db.Integer, default=0, nullable=False)
+    last_activity_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    discovery_score = db.Column(db.Float, default=0, nullable=False)  # recency in hours + weighted member count
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Tombstone: set when deleted; children are reaped in the background (see utils/reaper.py)
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)
+    
     # Relationships
     owner = db.relationship('User', foreign_keys=[owner_id], backref='owned_workspaces')
     saved_project = db.relationship('SavedProject', backref='workspaces')
     members = db.relationship('WorkspaceMember', back_populates='workspace', cascade='all, delete-orphan')
     invites = db.relationship('WorkspaceInvite', back_populates='workspace', cascade='all, delete-orphan')
     
+    __table_args__ = (db.Index('ix_workspace_discovery', 'is_public', 'discovery_score', 'id'),)
+    
+    @classmethod
+    def get_active_or_404(cls, workspace_id):
+        """Like query.get_or_404, but a tombstoned workspace counts as gone"""
+        return cls.query.filter_by(id=workspace_id, deleted_at=None).first_or_404()
+    
     def to_dict(self, include_members=True):
         data = {
             'id': self.id,
@@ -402,7 +460,8 @@ class Workspace(db.Model):
             'saved_project_id': self.saved_project_id,
             'is_public': self.is_public,
             'max_members': self.max_members,
-            'member_count': len(self.members),
+            'member_count': self.member_count,
+            'program_area': self.program_area,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -429,7 +488,8 @@ class Workspace(db.Model):
         
         if include_members:
             data['members'] = [member.to_dict() for member in self.members]
-            data['pending_invites'] = [invite.to_dict() for invite in self.invites if invite.status == 'pending']
+            pending = WorkspaceInvite.query.filter_by(workspace_id=self.id, status='pending')
+            data['pending_invites'] = [invite.to_dict() for invite in pending]
         
         return data
 
@@ -501,6 +561,12 @@ class WorkspaceInvite(db.Model):
     workspace = db.relationship('Workspace', back_populates='invites')
     invited_by = db.relationship('User', foreign_keys=[invited_by_id], backref='sent_invites')
     
+    __table_args__ = (
+        db.Index('ix_workspace_invite_workspace_status', 'workspace_id', 'status'),
+        db.Index('ix_workspace_invite_status_expires', 'status', 'expires_at'),
+        db.Index('ix_workspace_invite_email_status', 'email', 'status'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -535,6 +601,12 @@ class WorkspaceMessage(db.Model):
     workspace = db.relationship('Workspace', backref='messages')
     user = db.relationship('User', backref='workspace_messages')
     
+    # Unread recounts scan "messages after my cursor" per workspace; the timeline walks by time
+    __table_args__ = (
+        db.Index('ix_workspace_message_workspace_id_id', 'workspace_id', 'id'),
+        db.Index('ix_workspace_message_workspace_created', 'workspace_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -548,6 +620,33 @@ class WorkspaceMessage(db.Model):
         }
 
 
+
+# Full-text index over chat messages, kept in sync by the database itself
+# (see chat/search.py). SQLite gets an external-content FTS5 table maintained
+# by triggers; PostgreSQL a generated tsvector column with a GIN index.
+MESSAGE_SEARCH_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS workspace_message_fts USING fts5("
+        "message, content='workspace_message', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS workspace_message_fts_ai AFTER INSERT ON workspace_message BEGIN "
+        "INSERT INTO workspace_message_fts(rowid, message) VALUES (new.id, new.message); END",
+        "CREATE TRIGGER IF NOT EXISTS workspace_message_fts_ad AFTER DELETE ON workspace_message BEGIN "
+        "INSERT INTO workspace_message_fts(workspace_message_fts, rowid, message) VALUES ('delete', old.id, old.message); END",
+        "CREATE TRIGGER IF NOT EXISTS workspace_message_fts_au AFTER UPDATE OF message ON workspace_message BEGIN "
+        "INSERT INTO workspace_message_fts(workspace_message_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+        "INSERT INTO workspace_message_fts(rowid, message) VALUES (new.id, new.message); END",
+    ],
+    'postgresql': [
+        "ALTER TABLE workspace_message ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', message)) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_workspace_message_search_vector ON workspace_message USING gin (search_vector)",
+    ]
+}
+
+for _dialect, _statements in MESSAGE_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(WorkspaceMessage.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
 class WorkspaceFile(db.Model):
     """Files shared in workspace"""
     __tablename__ = 'workspace_file'
@@ -571,6 +670,8 @@ class WorkspaceFile(db.Model):
     workspace = db.relationship('Workspace', backref='files')
     uploader = db.relationship('User', backref='uploaded_files')
     
+    __table_args__ = (db.Index('ix_workspace_file_workspace_created', 'workspace_id', 'created_at'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -608,6 +709,11 @@ class WorkspaceActivity(db.Model):
     workspace = db.relationship('Workspace', backref='activities')
     user = db.relationship('User', backref='workspace_activities')
     
+    __table_args__ = (
+        db.Index('ix_workspace_activity_workspace_id_id', 'workspace_id', 'id'),
+        db.Index('ix_workspace_activity_workspace_created', 'workspace_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -620,3 +726,94 @@ class WorkspaceActivity(db.Model):
             'activity_data': self.activity_data,
             'created_at': self.created_at.isoformat()
         }
+
+
+class WorkspaceReadCursor(db.Model):
+    """How far a member has read in a workspace, with running unread counters"""
+    __tablename__ = 'workspace_read_cursor'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    workspace_id = db.Column(db.Integer, db.ForeignKey('workspace.id'), nullable=False)
+    
+    # Last message/activity the user has seen (0 = nothing yet)
+    last_read_message_id = db.Column(db.Integer, default=0, nullable=False)
+    last_read_activity_id = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Incremented on insert, recounted when the cursor moves
+    unread_messages = db.Column(db.Integer, default=0, nullable=False)
+    unread_activities = db.Column(db.Integer, default=0, nullable=False)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    workspace = db.relationship('Workspace', backref=db.backref('read_cursors', cascade='all, delete-orphan'))
+    
+    # user_id leads so "all my workspaces" is a single index range scan
+    __table_args__ = (db.UniqueConstraint('user_id', 'workspace_id', name='unique_workspace_read_cursor'),)
+    
+    def to_dict(self):
+        return {
+            'workspace_id': self.workspace_id,
+            'last_read_message_id': self.last_read_message_id,
+            'last_read_activity_id': self.last_read_activity_id,
+            'unread_messages': self.unread_messages,
+            'unread_activities': self.unread_activities
+        }
+
+
+class ArchiveSegment(db.Model):
+    """Index of compressed cold-storage segments holding archived workspace rows"""
+    __tablename__ = 'archive_segment'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)  # workspace_message, workspace_activity
+    workspace_id = db.Column(db.Integer, nullable=False)  # no FK; segments are dropped along with the workspace
+    
+    # Range of archived rows in this segment
+    first_id = db.Column(db.Integer, nullable=False)
+    last_id = db.Column(db.Integer, nullable=False)
+    first_created_at = db.Column(db.DateTime, nullable=False)
+    last_created_at = db.Column(db.DateTime, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    
+    # File location relative to ARCHIVE_FOLDER and its compression codec (zstd, zlib)
+    path = db.Column(db.String(500), nullable=False)
+    codec = db.Column(db.String(10), nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_archive_segment_table_workspace_last_id', 'table_name', 'workspace_id', 'last_id'),
+    )
+
+
+class ArchivedMessageSearch(db.Model):
+    """Search index rows for chat messages moved into archive segments (see chat/search.py)"""
+    __tablename__ = 'archived_message_search'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # the archived message's id
+    workspace_id = db.Column(db.Integer, nullable=False, index=True)  # no FK, like ArchiveSegment
+    message = db.Column(Text, nullable=False)
+
+
+# Same full-text setup as MESSAGE_SEARCH_DDL, over the archived messages' text
+ARCHIVED_MESSAGE_SEARCH_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS archived_message_fts USING fts5("
+        "message, content='archived_message_search', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS archived_message_fts_ai AFTER INSERT ON archived_message_search BEGIN "
+        "INSERT INTO archived_message_fts(rowid, message) VALUES (new.id, new.message); END",
+        "CREATE TRIGGER IF NOT EXISTS archived_message_fts_ad AFTER DELETE ON archived_message_search BEGIN "
+        "INSERT INTO archived_message_fts(archived_message_fts, rowid, message) VALUES ('delete', old.id, old.message); END",
+    ],
+    'postgresql': [
+        "ALTER TABLE archived_message_search ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', message)) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_archived_message_search_vector ON archived_message_search USING gin (search_vector)",
+    ]
+}
+
+for _dialect, _statements in ARCHIVED_MESSAGE_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(ArchivedMessageSearch.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
@@ -3,9 +3,13 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
 from ..models import GeneratedProject, ProjectTopic, User
 from datetime import datetime
+from ..utils.metrics import ai_latency
 
 projects_bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
+# Providers the frontend can call; anything else is reported as 'other' in metrics
+AI_PROVIDERS = ('gemini', 'openai', 'huggingface')
+
 
 @projects_bp.post("/track-generation")
 @jwt_required()
@@ -26,6 +30,11 @@ def track_generation():
     if not project_topics:
         return jsonify({"message": "No project topics provided"}), 400
     
+    # The browser calls the AI provider directly and reports how long it took
+    generation_ms = data.get('generation_ms')
+    if isinstance(generation_ms, (int, float)) and generation_ms >= 0:
+        ai_latency.observe(generation_ms / 1000, provider=ai_provider if ai_provider in AI_PROVIDERS else 'other')
+    
     tracked_count = 0
     
     for topic_data in project_topics:
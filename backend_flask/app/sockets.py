@@ -1,105 +1,367 @@
-from flask_socketio import emit, join_room, leave_room
+import logging
+import threading
+import time
+from flask import request, current_app
+from flask_socketio import emit as _emit, join_room, leave_room, disconnect
 from flask_jwt_extended import decode_token
-from .extensions import db
-from .models import WorkspaceMember, Workspace
+from .extensions import db, socketio
+from .models import WorkspaceMember, Workspace, User
+from .chat.writer import InvalidMessage, message_writer
+from .utils.emitter import room_emitter, workspace_room, delivery_room, negotiate_mode
+from .utils.presence import presence
+from .utils.log import REQUEST_ID_HEADER, new_request_id
+from .utils.accounts import is_active_account
+from .utils.metrics import instrument_socket_handler, socket_emits
+
+logger = logging.getLogger(__name__)
+
+
+class SocketSession:
+    """Authentication state for one Socket.IO connection, established at connect"""
+    __slots__ = ('user_id', 'expires_at', 'mode', 'rooms', 'workspace_ids', 'user_name', 'user_email', 'request_id')
+
+    def __init__(self, user_id, expires_at, mode=None, request_id=None):
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.mode = mode             # delivery mode negotiated at connect (see utils.emitter)
+        self.rooms = set()           # rooms this connection has joined
+        self.workspace_ids = set()   # workspaces whose membership was already verified
+        self.user_name = None        # loaded on first message send
+        self.user_email = None
+        self.request_id = request_id  # stamped on this connection's log records (see utils.log)
+
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+
+# Per-process registry of live connections keyed by Socket.IO sid
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _decode(token):
+    """Verify a JWT and return (user_id, expiry timestamp)"""
+    decoded = decode_token(token)
+    # decode_token skips the blocklist check that protects HTTP routes
+    if not is_active_account(decoded['sub']):
+        raise ValueError('Account has been deleted')
+    return int(decoded['sub']), decoded.get('exp')
+
+
+def emit(event, *args, **kwargs):
+    """flask_socketio.emit to the caller, counted in socket_emits_total"""
+    _emit(event, *args, **kwargs)
+    socket_emits.inc(event=event)
+
+
+def get_session(sid=None):
+    return _sessions.get(sid or request.sid)
+
+
+def _workspace_id(data):
+    """data['workspace_id'] as an int, or None if missing/not an integer.
+
+    Room names, presence keys and the cached membership set all use ints, so a
+    client sending "5" must not get a second, unrevocable entry.
+    """
+    value = data.get('workspace_id') if isinstance(data, dict) else None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    return value if isinstance(value, int) and value > 0 else None
+
+
+def _joined_workspace_ids(session):
+    return [int(room.split('_', 1)[1]) for room in session.rooms]
+
+
+def revoke_workspace_access(workspace_id, user_id):
+    """Drop cached membership and room subscriptions after a member is removed"""
+    room = workspace_room(workspace_id)
+    with _sessions_lock:
+        affected = [(sid, s) for sid, s in _sessions.items() if s.user_id == user_id]
+    for sid, session in affected:
+        session.workspace_ids.discard(workspace_id)
+        if room in session.rooms:
+            session.rooms.discard(room)
+            socketio.server.leave_room(sid, delivery_room(workspace_id, session.mode), namespace='/')
+            room_emitter.left(workspace_id, session.mode)
+            presence.leave(workspace_id, user_id, sid)
+
+
+def disconnect_user(user_id):
+    """Close every live connection of a deleted account"""
+    with _sessions_lock:
+        affected = [(sid, s) for sid, s in _sessions.items() if s.user_id == user_id]
+        for sid, _ in affected:
+            del _sessions[sid]
+    for sid, session in affected:
+        for workspace_id in _joined_workspace_ids(session):
+            room_emitter.left(workspace_id, session.mode)
+            presence.leave(workspace_id, user_id, sid)
+        socketio.server.disconnect(sid, namespace='/')
+
+
+def _authenticated_session(data=None):
+    """Return the caller's session, re-validating only once its token has expired.
+
+    A client whose token expired can pass a fresh one as `token` on any event
+    (or via `refresh_token`); otherwise it is told and disconnected.
+    """
+    session = get_session()
+    if session is None:
+        disconnect()
+        return None
+
+    if session.is_expired():
+        token = (data or {}).get('token') if isinstance(data, dict) else None
+        try:
+            user_id, expires_at = _decode(token)
+        except Exception:
+            emit('token_expired', {'message': 'Token expired, reconnect with a new token'})
+            disconnect()
+            return None
+        if user_id != session.user_id:
+            emit('error', {'message': 'Token belongs to a different user'})
+            disconnect()
+            return None
+        session.expires_at = expires_at
+
+    return session
+
+
+def _has_workspace_access(session, workspace_id):
+    """Check membership once per connection and workspace, then trust the cache"""
+    if workspace_id in session.workspace_ids:
+        return True
+
+    workspace = Workspace.query.get(workspace_id)
+    if not workspace or workspace.deleted_at is not None:
+        return False
+
+    if workspace.owner_id != session.user_id:
+        member = WorkspaceMember.query.filter_by(
+            workspace_id=workspace_id,
+            user_id=session.user_id
+        ).first()
+        if not member:
+            return False
+
+    session.workspace_ids.add(workspace_id)
+    return True
 
 
 def register_socket_events(socketio):
     """Register all Socket.IO event handlers"""
-    
-    @socketio.on('connect')
+
+    def on(event):
+        """socketio.on that also records the handler's latency and outcome for /metrics"""
+        return lambda handler: socketio.on(event)(instrument_socket_handler(event, handler))
+
+    @on('connect')
     def handle_connect(auth):
         """Handle client connection"""
         try:
             # Verify JWT token from auth
             if auth and 'token' in auth:
-                token = auth['token']
-                decoded = decode_token(token)
-                user_id = int(decoded['sub'])
-                print(f"User {user_id} connected via WebSocket")
+                user_id, expires_at = _decode(auth['token'])
+                mode = negotiate_mode(auth)
+                # Clients can pass the id they send as X-Request-ID so socket and HTTP logs correlate
+                request_id = new_request_id(auth.get('request_id') or request.headers.get(REQUEST_ID_HEADER))
+                with _sessions_lock:
+                    _sessions[request.sid] = SocketSession(user_id, expires_at, mode, request_id)
+                if auth.get('batch'):
+                    emit('capabilities', {'mode': mode})
+                logger.info("socket connected", extra={'user_id': user_id, 'mode': mode})
                 return True
             else:
-                print("Connection rejected: No token provided")
+                logger.info("socket connection rejected: no token provided")
                 return False
         except Exception as e:
-            print(f"Connection error: {e}")
+            logger.warning("socket connection rejected: %s", e)
             return False
-    
-    @socketio.on('disconnect')
+
+    @on('disconnect')
     def handle_disconnect():
         """Handle client disconnection"""
-        print("Client disconnected")
-    
-    @socketio.on('join_workspace')
-    def handle_join_workspace(data):
+        with _sessions_lock:
+            session = _sessions.pop(request.sid, None)
+        if session is not None:
+            for workspace_id in _joined_workspace_ids(session):
+                room_emitter.left(workspace_id, session.mode)
+                presence.leave(workspace_id, session.user_id, request.sid)
+            # The session is already gone, so pass its request id along explicitly
+            logger.info("socket disconnected", extra={'user_id': session.user_id, 'request_id': session.request_id})
+
+    @on('refresh_token')
+    def handle_refresh_token(data=None):
+        """Replace the connection's token before (or after) it expires"""
+        session = get_session()
+        if session is None:
+            disconnect()
+            return
+
+        try:
+            user_id, expires_at = _decode((data or {}).get('token'))
+        except Exception:
+            emit('error', {'message': 'Invalid token'})
+            return
+
+        if user_id != session.user_id:
+            emit('error', {'message': 'Token belongs to a different user'})
+            return
+
+        session.expires_at = expires_at
+        emit('token_refreshed', {'expires_at': expires_at})
+
+    @on('join_workspace')
+    def handle_join_workspace(data=None):
         """Join a workspace room for real-time updates"""
-        workspace_id = data.get('workspace_id')
-        token = data.get('token')
-        
+        session = _authenticated_session(data)
+        if session is None:
+            return
+
+        workspace_id = _workspace_id(data)
+        if workspace_id is None:
+            emit('error', {'message': 'workspace_id must be an integer'})
+            return
+
         try:
-            # Verify user has access to workspace
-            decoded = decode_token(token)
-            user_id = int(decoded['sub'])
-            
-            workspace = Workspace.query.get(workspace_id)
-            if not workspace:
-                emit('error', {'message': 'Workspace not found'})
-                return
-            
-            # Check membership
-            member = WorkspaceMember.query.filter_by(
-                workspace_id=workspace_id,
-                user_id=user_id
-            ).first()
-            
-            if not member and workspace.owner_id != user_id:
+            if not _has_workspace_access(session, workspace_id):
                 emit('error', {'message': 'Access denied'})
                 return
-            
+
             # Join the room
-            room = f'workspace_{workspace_id}'
-            join_room(room)
+            join_room(delivery_room(workspace_id, session.mode))
+            if workspace_room(workspace_id) not in session.rooms:
+                session.rooms.add(workspace_room(workspace_id))
+                room_emitter.joined(workspace_id, session.mode)
+            presence.join(workspace_id, session.user_id, request.sid)
             emit('joined_workspace', {'workspace_id': workspace_id})
-            print(f"User {user_id} joined workspace {workspace_id}")
-            
+            logger.info("joined workspace", extra={'user_id': session.user_id, 'workspace_id': workspace_id})
+
         except Exception as e:
-            print(f"Error joining workspace: {e}")
+            db.session.rollback()
+            logger.exception("join_workspace failed", extra={'workspace_id': workspace_id})
             emit('error', {'message': str(e)})
-    
-    @socketio.on('leave_workspace')
-    def handle_leave_workspace(data):
+
+    @on('leave_workspace')
+    def handle_leave_workspace(data=None):
         """Leave a workspace room"""
-        workspace_id = data.get('workspace_id')
-        room = f'workspace_{workspace_id}'
-        leave_room(room)
+        session = get_session()
+        workspace_id = _workspace_id(data)
+        if workspace_id is None:
+            emit('error', {'message': 'workspace_id must be an integer'})
+            return
+        leave_room(delivery_room(workspace_id, session.mode if session else None))
+        if session is not None and workspace_room(workspace_id) in session.rooms:
+            session.rooms.discard(workspace_room(workspace_id))
+            room_emitter.left(workspace_id, session.mode)
+            presence.leave(workspace_id, session.user_id, request.sid)
         emit('left_workspace', {'workspace_id': workspace_id})
-    
-    @socketio.on('send_message')
-    def handle_send_message(data):
-        """Handle real-time chat message"""
-        workspace_id = data.get('workspace_id')
-        message_data = data.get('message')
-        
-        # Broadcast to all users in the workspace room
-        room = f'workspace_{workspace_id}'
-        emit('new_message', message_data, room=room, include_self=False)
-    
-    @socketio.on('file_uploaded')
-    def handle_file_uploaded(data):
+
+    def _joined_workspace(data):
+        """Return data['workspace_id'] if this connection has joined that workspace"""
+        session = _authenticated_session(data)
+        if session is None:
+            return None
+        workspace_id = _workspace_id(data)
+        if workspace_id is None or workspace_room(workspace_id) not in session.rooms:
+            emit('error', {'message': 'Join the workspace before sending to it'})
+            return None
+        return workspace_id
+
+    @on('heartbeat')
+    def handle_heartbeat(data=None):
+        """Keep the caller marked active in every workspace it has joined"""
+        session = _authenticated_session(data)
+        if session is None:
+            return {'ok': False}
+
+        presence.heartbeat(_joined_workspace_ids(session), session.user_id)
+        return {'ok': True}
+
+    @on('typing')
+    def handle_typing(data=None):
+        """Relay a typing indicator to the rest of the room (never persisted)"""
+        workspace_id = _joined_workspace(data)
+        if workspace_id is None:
+            return
+
+        session = get_session()
+        typing = bool(data.get('typing', True))
+        presence.set_typing(workspace_id, session.user_id, typing)
+        room_emitter.emit('typing', {
+            'workspace_id': workspace_id,
+            'user_id': session.user_id,
+            'typing': typing
+        }, workspace_id, skip_sid=request.sid)
+
+    @on('send_message')
+    def handle_send_message(data=None):
+        """Persist a chat message and acknowledge the sender once it is stored.
+
+        Accepts {workspace_id, message, message_type?}. The stored message is
+        broadcast as new_message to everyone else in the room and returned to
+        the sender through the Socket.IO acknowledgement callback.
+        """
+        workspace_id = _joined_workspace(data)
+        if workspace_id is None:
+            return {'ok': False, 'error': 'Not joined to workspace'}
+
+        session = get_session()
+        message = data.get('message')
+        if isinstance(message, dict):
+            message = message.get('message')
+        message = (message or '').strip() if isinstance(message, str) else ''
+        if not message:
+            return {'ok': False, 'error': 'Message cannot be empty'}
+
+        if session.user_email is None:
+            user = User.query.get(session.user_id)
+            db.session.remove()
+            if user is None:
+                disconnect()
+                return {'ok': False, 'error': 'User not found'}
+            session.user_name, session.user_email = user.full_name, user.email
+
+        try:
+            future = message_writer.submit(
+                workspace_id,
+                session.user_id,
+                message,
+                message_type=data.get('message_type', 'text'),
+                user_name=session.user_name,
+                user_email=session.user_email,
+                skip_sid=request.sid
+            )
+        except InvalidMessage as e:
+            return {'ok': False, 'error': str(e)}
+        try:
+            stored = future.result(timeout=current_app.config['CHAT_ACK_TIMEOUT'])
+        except Exception:
+            logger.exception("send_message failed", extra={'user_id': session.user_id})
+            return {'ok': False, 'error': 'Message could not be saved'}
+
+        return {'ok': True, 'message': stored}
+
+    @on('file_uploaded')
+    def handle_file_uploaded(data=None):
         """Handle file upload notification"""
-        workspace_id = data.get('workspace_id')
-        file_data = data.get('file')
-        
+        workspace_id = _joined_workspace(data)
+        if workspace_id is None:
+            return
+
         # Broadcast to all users in the workspace room
-        room = f'workspace_{workspace_id}'
-        emit('new_file', file_data, room=room, include_self=False)
-    
-    @socketio.on('activity_logged')
-    def handle_activity_logged(data):
+        room_emitter.emit('new_file', data.get('file'), workspace_id, skip_sid=request.sid)
+
+    @on('activity_logged')
+    def handle_activity_logged(data=None):
         """Handle activity feed update"""
-        workspace_id = data.get('workspace_id')
-        activity_data = data.get('activity')
-        
+        workspace_id = _joined_workspace(data)
+        if workspace_id is None:
+            return
+
         # Broadcast to all users in the workspace room
-        room = f'workspace_{workspace_id}'
-        emit('new_activity', activity_data, room=room, include_self=False)
+        room_emitter.emit('new_activity', data.get('activity'), workspace_id, skip_sid=request.sid)
@@ -0,0 +1,16 @@
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import User
+
+
+def is_active_account(user_id):
+    """False once an account is deleted (tombstoned) or gone; never cached so every worker sees a deletion at once"""
+    try:
+        user_id = int(user_id)
+    except (ValueError, TypeError):
+        return False
+    deleted_at = db.session.execute(
+        select(User.deleted_at).where(User.id == user_id)
+    ).first()
+    return deleted_at is not None and deleted_at[0] is None
@@ -1,5 +1,8 @@
-from ..extensions import db, socketio
+from ..extensions import db
 from ..models import WorkspaceActivity
+from .emitter import room_emitter
+from .unread import count_new_activity
+from .discovery import record_workspace_activity
 
 
 def log_activity(workspace_id, user_id, activity_type, description, metadata=None):
@@ -12,10 +15,12 @@ def log_activity(workspace_id, user_id, activity_type, description, metadata=Non
         activity_data=metadata or {}
     )
     db.session.add(activity)
+    count_new_activity(workspace_id, user_id)
+    record_workspace_activity(workspace_id)
     db.session.commit()
     
     # Emit WebSocket event for real-time updates
     activity_dict = activity.to_dict()
-    socketio.emit('new_activity', activity_dict, room=f'workspace_{workspace_id}')
+    room_emitter.emit('new_activity', activity_dict, workspace_id)
     
     return activity
@@ -0,0 +1,211 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from ..extensions import db
+from ..models import ActivityRollup, User, UserActivity
+
+GRANULARITIES = ('hour', 'day')
+DELETE_BATCH_SIZE = 1000
+
+
+def bucket_start(timestamp, granularity):
+    """Truncate a timestamp to the start of its hour or day bucket"""
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _rollup_insert():
+    """Return a dialect-specific INSERT supporting ON CONFLICT, or None"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(ActivityRollup)
+
+
+def _upsert_rollups(counts):
+    """Add counts keyed by (granularity, bucket_start, activity_type, program) to the rollup table"""
+    if not counts:
+        return
+
+    rows = [
+        {
+            'granularity': granularity,
+            'bucket_start': bucket,
+            'activity_type': activity_type,
+            'program': program,
+            'count': count
+        }
+        for (granularity, bucket, activity_type, program), count in counts.items()
+    ]
+
+    stmt = _rollup_insert()
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['granularity', 'bucket_start', 'activity_type', 'program'],
+            set_={'count': ActivityRollup.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    # Generic fallback: one UPDATE per bucket, INSERT when nothing was updated
+    for row in rows:
+        result = db.session.execute(
+            ActivityRollup.__table__.update()
+            .where(
+                ActivityRollup.granularity == row['granularity'],
+                ActivityRollup.bucket_start == row['bucket_start'],
+                ActivityRollup.activity_type == row['activity_type'],
+                ActivityRollup.program == row['program']
+            )
+            .values(count=ActivityRollup.count + row['count'])
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(ActivityRollup), [row])
+
+
+def _count_buckets(events):
+    """Aggregate (created_at, activity_type, program) tuples into hourly and daily counts"""
+    counts = Counter()
+    for created_at, activity_type, program in events:
+        for granularity in GRANULARITIES:
+            counts[(granularity, bucket_start(created_at, granularity), activity_type, program or '')] += 1
+    return counts
+
+
+def record_events(user, events):
+    """Bulk insert raw UserActivity rows and fold them into the rollups in one transaction"""
+    if not events:
+        return 0
+
+    rows = [dict(event, user_id=user.id) for event in events]
+    db.session.execute(insert(UserActivity), rows)
+    _upsert_rollups(_count_buckets(
+        (row['created_at'], row['activity_type'], user.program) for row in rows
+    ))
+    db.session.commit()
+
+    return len(rows)
+
+
+def rebuildable_start(now=None):
+    """First day whose raw events are all still retained; rollups before it can no longer be rebuilt"""
+    now = now or datetime.utcnow()
+    raw_cutoff = now - timedelta(days=current_app.config['ANALYTICS_RAW_RETENTION_DAYS'])
+    first_day = bucket_start(raw_cutoff, 'day')
+    return first_day if first_day == raw_cutoff else first_day + timedelta(days=1)
+
+
+def rebuild_rollups(start, end):
+    """Recompute rollups for [start, end) from raw rows (backfill after imports or retention changes).
+
+    The range is clamped to rebuildable_start(): older raw events are purged, and
+    recounting them would wipe the daily rollups that are kept forever.
+    """
+    start = max(bucket_start(start, 'day'), rebuildable_start())
+    end = bucket_start(end, 'day')
+    if end <= start:
+        return 0
+
+    db.session.execute(
+        delete(ActivityRollup).where(
+            ActivityRollup.bucket_start >= start,
+            ActivityRollup.bucket_start < end
+        )
+    )
+
+    # Truncating timestamps in SQL is dialect specific, so stream the narrow
+    # projection and bucket in Python instead of loading ORM objects
+    stmt = (
+        select(UserActivity.created_at, UserActivity.activity_type, User.program)
+        .join(User, User.id == UserActivity.user_id)
+        .where(UserActivity.created_at >= start, UserActivity.created_at < end)
+        .execution_options(yield_per=DELETE_BATCH_SIZE)
+    )
+    counts = _count_buckets(db.session.execute(stmt))
+    _upsert_rollups(counts)
+    db.session.commit()
+
+    return sum(count for key, count in counts.items() if key[0] == 'day')
+
+
+def _delete_in_batches(model, *criteria):
+    """Delete matching rows in id-bounded chunks so no single statement holds long locks"""
+    deleted = 0
+    while True:
+        ids = db.session.execute(
+            select(model.id).where(*criteria).limit(DELETE_BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(model).where(model.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+    return deleted
+
+
+def apply_retention(now=None):
+    """Purge raw events past the raw window and hourly rollups past the hourly window.
+
+    Daily rollups are kept indefinitely, so older ranges remain queryable at
+    day resolution after the raw and hourly data is gone.
+    """
+    now = now or datetime.utcnow()
+    raw_cutoff = now - timedelta(days=current_app.config['ANALYTICS_RAW_RETENTION_DAYS'])
+    hourly_cutoff = now - timedelta(days=current_app.config['ANALYTICS_HOURLY_RETENTION_DAYS'])
+
+    return {
+        'raw_deleted': _delete_in_batches(UserActivity, UserActivity.created_at < raw_cutoff),
+        'hourly_deleted': _delete_in_batches(
+            ActivityRollup,
+            ActivityRollup.granularity == 'hour',
+            ActivityRollup.bucket_start < hourly_cutoff
+        )
+    }
+
+
+def get_timeseries(granularity, start, end, activity_types=None, program=None):
+    """Return zero-filled per-activity-type series for [start, end) read from the rollups only"""
+    start = bucket_start(start, granularity)
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+
+    query = db.session.query(
+        ActivityRollup.activity_type,
+        ActivityRollup.bucket_start,
+        func.sum(ActivityRollup.count).label('count')
+    ).filter(
+        ActivityRollup.granularity == granularity,
+        ActivityRollup.bucket_start >= start,
+        ActivityRollup.bucket_start < end
+    )
+    if activity_types:
+        query = query.filter(ActivityRollup.activity_type.in_(activity_types))
+    if program is not None:
+        query = query.filter(ActivityRollup.program == program)
+
+    rows = query.group_by(ActivityRollup.activity_type, ActivityRollup.bucket_start).all()
+
+    counts = {}
+    for row in rows:
+        counts.setdefault(row.activity_type, {})[row.bucket_start] = row.count
+
+    buckets = []
+    current = start
+    while current < end:
+        buckets.append(current)
+        current += step
+
+    return {
+        activity_type: [
+            {'bucket': bucket.isoformat(), 'count': per_bucket.get(bucket, 0)}
+            for bucket in buckets
+        ]
+        for activity_type, per_bucket in sorted(counts.items())
+    }
@@ -0,0 +1,283 @@
+import json
+import os
+import shutil
+import zlib
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from ..extensions import db
+from ..models import ArchiveSegment, ArchivedMessageSearch, User, WorkspaceActivity, WorkspaceMessage
+
+try:
+    import zstandard
+except ImportError:  # optional: segments are written with zlib instead
+    zstandard = None
+
+ARCHIVED_MODELS = {
+    'workspace_message': WorkspaceMessage,
+    'workspace_activity': WorkspaceActivity
+}
+
+CODEC_EXTENSIONS = {'zstd': 'zst', 'zlib': 'z'}
+
+
+def _compress(data):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(data)
+    return 'zlib', zlib.compress(data, 9)
+
+
+def _decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd archive segments")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _serialize(row):
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row._mapping.items()
+    }
+
+
+def _write_segment(table_name, workspace_id, rows):
+    """Write rows as one compressed JSONL file and return its ArchiveSegment (not yet added)"""
+    payload = '\n'.join(json.dumps(_serialize(row), separators=(',', ':')) for row in rows).encode('utf-8')
+    codec, data = _compress(payload)
+
+    relative = os.path.join(
+        table_name, f'workspace_{workspace_id}',
+        f'{rows[0].id:010d}-{rows[-1].id:010d}.jsonl.{CODEC_EXTENSIONS[codec]}'
+    )
+    path = os.path.join(current_app.config['ARCHIVE_FOLDER'], relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Rename into place so readers never see a partial segment
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+    return ArchiveSegment(
+        table_name=table_name,
+        workspace_id=workspace_id,
+        first_id=rows[0].id,
+        last_id=rows[-1].id,
+        first_created_at=rows[0].created_at,
+        last_created_at=rows[-1].created_at,
+        row_count=len(rows),
+        path=relative,
+        codec=codec
+    )
+
+
+def archive_table(table_name, cutoff, batch_size=None):
+    """Move rows older than `cutoff` into per-workspace segments, one batch per transaction"""
+    model = ARCHIVED_MODELS[table_name]
+    table = model.__table__
+    batch_size = batch_size or current_app.config['ARCHIVE_BATCH_SIZE']
+
+    workspace_ids = db.session.execute(
+        select(table.c.workspace_id).where(table.c.created_at < cutoff).distinct()
+    ).scalars().all()
+
+    archived = segments = 0
+    for workspace_id in workspace_ids:
+        while True:
+            rows = db.session.execute(
+                select(table)
+                .where(table.c.workspace_id == workspace_id, table.c.created_at < cutoff)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            # The file is written first; if the commit fails the rows stay hot and
+            # the next run rewrites the same segment
+            db.session.add(_write_segment(table_name, workspace_id, rows))
+            if table_name == 'workspace_message':
+                # Keep archived chat searchable; the live FTS entries go with the deleted rows
+                _index_messages([row._mapping for row in rows])
+            db.session.execute(delete(table).where(table.c.id.in_([row.id for row in rows])))
+            db.session.commit()
+
+            archived += len(rows)
+            segments += 1
+
+    return {'table': table_name, 'rows_archived': archived, 'segments_written': segments}
+
+
+def _index_messages(rows):
+    db.session.execute(insert(ArchivedMessageSearch), [
+        {'id': row['id'], 'workspace_id': row['workspace_id'], 'message': row['message']} for row in rows
+    ])
+
+
+def reindex_archived_messages():
+    """Rebuild the archived message search index from the segments; returns the rows indexed"""
+    db.session.execute(delete(ArchivedMessageSearch))
+    folder = current_app.config['ARCHIVE_FOLDER']
+    indexed = 0
+    for segment in ArchiveSegment.query.filter_by(table_name='workspace_message').order_by(ArchiveSegment.id):
+        rows = _load_segment(os.path.join(folder, segment.path), segment.codec)
+        if rows:
+            _index_messages(rows)
+            indexed += len(rows)
+    db.session.commit()
+    return indexed
+
+
+def run_archive(days=None):
+    """Archive every archived table using ARCHIVE_AFTER_DAYS (or `days`)"""
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return {
+        'cutoff': cutoff.isoformat(),
+        'tables': [archive_table(table_name, cutoff) for table_name in ARCHIVED_MODELS]
+    }
+
+
+@lru_cache(maxsize=32)
+def _load_segment(path, codec):
+    """Decompress a segment once; segments are immutable so caching by path is safe"""
+    with open(path, 'rb') as f:
+        data = _decompress(f.read(), codec)
+    return tuple(json.loads(line) for line in data.decode('utf-8').splitlines() if line)
+
+
+def _hydrate(rows):
+    """Add the user_name/user_email fields the live to_dict() payloads carry"""
+    user_ids = {row['user_id'] for row in rows if row.get('user_id') is not None}
+    users = {
+        user.id: user
+        for user in db.session.execute(
+            select(User.id, User.full_name, User.email).where(User.id.in_(user_ids))
+        )
+    } if user_ids else {}
+
+    hydrated = []
+    for row in rows:
+        user = users.get(row.get('user_id'))
+        hydrated.append(dict(
+            row,
+            user_name=user.full_name if user else None,
+            user_email=user.email if user else None,
+            archived=True
+        ))
+    return hydrated
+
+
+def read_archived(table_name, workspace_id, limit, before_id=None, after_id=None):
+    """Read archived rows for a workspace in id order.
+
+    With `after_id` rows come oldest first (id > after_id); otherwise newest
+    first (id < before_id, if given). Only segments overlapping the requested
+    range are opened.
+    """
+    query = ArchiveSegment.query.filter_by(table_name=table_name, workspace_id=workspace_id)
+    if after_id is not None:
+        query = query.filter(ArchiveSegment.last_id > after_id).order_by(ArchiveSegment.first_id)
+    else:
+        if before_id is not None:
+            query = query.filter(ArchiveSegment.first_id < before_id)
+        query = query.order_by(ArchiveSegment.last_id.desc())
+
+    folder = current_app.config['ARCHIVE_FOLDER']
+    rows = []
+    for segment in query:
+        segment_rows = _load_segment(os.path.join(folder, segment.path), segment.codec)
+        if after_id is not None:
+            rows.extend(row for row in segment_rows if row['id'] > after_id)
+        else:
+            rows.extend(row for row in reversed(segment_rows) if before_id is None or row['id'] < before_id)
+        if len(rows) >= limit:
+            break
+
+    return _hydrate(rows[:limit])
+
+
+def read_archived_by_time(table_name, workspace_id, limit, before=None):
+    """Archived rows newest first by (created_at, id), as [(created_at, row)].
+
+    `before(created_at, row_id)` keeps only rows strictly before a keyset
+    cursor. Segments are opened newest first, and only while they can still
+    hold rows newer than the `limit` already collected.
+    """
+    collected = []
+    for segment in ArchiveSegment.query.filter_by(
+        table_name=table_name, workspace_id=workspace_id
+    ).order_by(ArchiveSegment.last_created_at.desc()):
+        if len(collected) >= limit and segment.last_created_at < collected[limit - 1][0]:
+            break
+        path = os.path.join(current_app.config['ARCHIVE_FOLDER'], segment.path)
+        for row in _load_segment(path, segment.codec):
+            created_at = datetime.fromisoformat(row['created_at'])
+            if before is None or before(created_at, row['id']):
+                collected.append((created_at, row['id'], row))
+        collected.sort(key=lambda item: item[:2], reverse=True)
+
+    collected = collected[:limit]
+    return list(zip((created_at for created_at, _, _ in collected), _hydrate([row for _, _, row in collected])))
+
+
+def archived_messages(workspace_id, ids, context=0):
+    """Archived chat messages by id, and up to `context` archived neighbours either side of each id.
+
+    Returns ({id: message}, {id: (ids before, ids after)}). Ids that are not
+    archived (live messages) still get their archived neighbours. Only the
+    segments around the ids are opened.
+    """
+    segments = ArchiveSegment.query.filter_by(
+        table_name='workspace_message', workspace_id=workspace_id
+    ).order_by(ArchiveSegment.first_id).all()
+    last_ids = [segment.last_id for segment in segments]
+
+    wanted = set()
+    for message_id in ids:
+        index = bisect_left(last_ids, message_id)
+        if index < len(segments) and segments[index].first_id <= message_id:
+            wanted.add(index)
+        if context:
+            # Neighbours can spill into the segments either side
+            wanted.update(i for i in (index - 1, index, index + 1) if 0 <= i < len(segments))
+
+    folder = current_app.config['ARCHIVE_FOLDER']
+    rows = [
+        row
+        for index in sorted(wanted)
+        for row in _load_segment(os.path.join(folder, segments[index].path), segments[index].codec)
+    ]
+    row_ids = [row['id'] for row in rows]
+
+    keep = set()
+    neighbours = {}
+    for message_id in ids:
+        position = bisect_left(row_ids, message_id)
+        found = position < len(row_ids) and row_ids[position] == message_id
+        if found:
+            keep.add(message_id)
+        if context:
+            after = position + 1 if found else position
+            neighbours[message_id] = (row_ids[max(0, position - context):position], row_ids[after:after + context])
+            keep.update(*neighbours[message_id])
+    return {row['id']: row for row in _hydrate([row for row in rows if row['id'] in keep])}, neighbours
+
+
+def drop_workspace_archive(workspace_id):
+    """Delete a workspace's segment index rows (caller commits) and return the folders to remove"""
+    ArchiveSegment.query.filter_by(workspace_id=workspace_id).delete()
+    return [
+        os.path.join(current_app.config['ARCHIVE_FOLDER'], table_name, f'workspace_{workspace_id}')
+        for table_name in ARCHIVED_MODELS
+    ]
+
+
+def remove_archive_folders(folders):
+    for folder in folders:
+        shutil.rmtree(folder, ignore_errors=True)
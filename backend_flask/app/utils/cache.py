@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Every TTLCache in the process, for metrics
+CACHES = []
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry and LRU eviction.
+
+    Entries are local to one worker process, so anything cached here must
+    tolerate being stale for up to its TTL on other workers.
+    """
+
+    def __init__(self, name, max_entries=10000):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        CACHES.append(self)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Serialized /api/auth/me payloads keyed by user id
+profile_cache = TTLCache('profile')
+
+
+def invalidate_profile(*user_ids):
+    for user_id in user_ids:
+        profile_cache.delete(int(user_id))
+
+
+# First page of each user's cross-workspace feed, keyed by user id
+feed_cache = TTLCache('feed')
+
+
+def invalidate_feed(*user_ids):
+    for user_id in user_ids:
+        feed_cache.delete(int(user_id))
+
+# Ranked public workspace pages shared by every user, keyed by (filters, cursor, limit)
+discovery_cache = TTLCache('discovery', max_entries=1000)
@@ -0,0 +1,135 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+
+from ..extensions import db
+from ..models import User, Workspace, WorkspaceMember
+from .cache import discovery_cache
+
+MAX_DISCOVERY_LIMIT = 50
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class InvalidDiscoveryCursor(ValueError):
+    """Raised when a discovery cursor cannot be decoded"""
+
+
+def _hours(moment):
+    return (moment - _EPOCH).total_seconds() / 3600
+
+
+def record_member_change(workspace_id, delta):
+    """Adjust member_count and the ranking for a join (+1) or leave (-1); caller commits"""
+    weight = current_app.config['DISCOVERY_MEMBER_WEIGHT_HOURS']
+    db.session.execute(
+        update(Workspace).where(Workspace.id == workspace_id).values(
+            member_count=Workspace.member_count + delta,
+            discovery_score=Workspace.discovery_score + delta * weight
+        )
+    )
+
+
+def record_workspace_activity(workspace_id, now=None):
+    """Move a workspace's recency to now in one UPDATE; caller commits.
+
+    discovery_score = hours since epoch of the last activity + members * weight,
+    so ranking never needs a periodic recompute: newer activity simply scores higher.
+    """
+    now = now or datetime.utcnow()
+    weight = current_app.config['DISCOVERY_MEMBER_WEIGHT_HOURS']
+    db.session.execute(
+        update(Workspace).where(Workspace.id == workspace_id).values(
+            last_activity_at=now,
+            discovery_score=_hours(now) + Workspace.member_count * weight
+        )
+    )
+
+
+def _encode_cursor(score, workspace_id):
+    return base64.urlsafe_b64encode(json.dumps([score, workspace_id]).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    try:
+        score, workspace_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(score), int(workspace_id)
+    except Exception:
+        raise InvalidDiscoveryCursor("Invalid cursor")
+
+
+def _ranked_page(limit, cursor, program_area, open_seats):
+    """One page of public workspaces by (discovery_score, id) descending, shared by all users"""
+    query = (
+        select(
+            Workspace.id, Workspace.name, Workspace.description, Workspace.owner_id,
+            User.full_name.label('owner_name'), User.email.label('owner_email'),
+            Workspace.program_area, Workspace.member_count, Workspace.max_members,
+            Workspace.created_at, Workspace.last_activity_at, Workspace.discovery_score
+        )
+        .join(User, User.id == Workspace.owner_id)
+        .where(Workspace.is_public == True, Workspace.deleted_at.is_(None))
+    )
+    if program_area:
+        query = query.where(Workspace.program_area == program_area)
+    if open_seats:
+        query = query.where(Workspace.member_count < Workspace.max_members)
+    if cursor is not None:
+        score, workspace_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Workspace.discovery_score < score,
+            and_(Workspace.discovery_score == score, Workspace.id < workspace_id)
+        ))
+
+    rows = db.session.execute(
+        query.order_by(Workspace.discovery_score.desc(), Workspace.id.desc()).limit(limit + 1)
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'workspaces': [
+            {
+                'id': row.id,
+                'name': row.name,
+                'description': row.description,
+                'owner_id': row.owner_id,
+                'owner_name': row.owner_name,
+                'owner_email': row.owner_email,
+                'program_area': row.program_area,
+                'is_public': True,
+                'member_count': row.member_count,
+                'max_members': row.max_members,
+                'open_seats': max(row.max_members - row.member_count, 0),
+                'created_at': row.created_at.isoformat(),
+                'last_activity_at': row.last_activity_at.isoformat()
+            }
+            for row in rows
+        ],
+        'has_more': has_more,
+        'next_cursor': _encode_cursor(rows[-1].discovery_score, rows[-1].id) if has_more else None
+    }
+
+
+def discover_workspaces(user_id, limit=20, cursor=None, program_area=None, open_seats=False):
+    """Ranked public workspaces the user has not joined.
+
+    Ranked pages come from a short-TTL cache shared by every user; the user's
+    own workspaces are then dropped from the page, so a page can hold fewer
+    than `limit` entries while `next_cursor` still advances correctly.
+    """
+    limit = max(1, min(limit, MAX_DISCOVERY_LIMIT))
+    key = (program_area or None, bool(open_seats), cursor, limit)
+
+    page = discovery_cache.get(key)
+    if page is None:
+        page = _ranked_page(limit, cursor, program_area, open_seats)
+        discovery_cache.set(key, page, current_app.config['DISCOVERY_CACHE_TTL'])
+
+    joined = set(db.session.execute(
+        select(WorkspaceMember.workspace_id).where(WorkspaceMember.user_id == user_id)
+    ).scalars())
+    return dict(page, workspaces=[w for w in page['workspaces'] if w['id'] not in joined])
@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from flask import current_app
+
+from ..extensions import socketio
+from .metrics import socket_emits
+
+try:
+    import msgpack
+except ImportError:  # optional: clients asking for msgpack fall back to batched JSON
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Delivery modes a client can negotiate in its connect auth payload:
+#   None      - one JSON event per update (the original protocol)
+#   'batch'   - coalesced 'events' frames, JSON encoded
+#   'msgpack' - coalesced 'events' frames, MessagePack encoded bytes
+BATCH_MODES = ('batch', 'msgpack')
+
+# Denormalized user fields stripped from batched payloads, keyed by the id field they describe
+USER_REFERENCE_FIELDS = {
+    'user_id': ('user_name', 'user_email'),
+    'uploaded_by': ('uploader_name', 'uploader_email')
+}
+
+
+def workspace_room(workspace_id):
+    return f'workspace_{workspace_id}'
+
+
+def delivery_room(workspace_id, mode=None):
+    """Room a connection joins for a workspace, one per delivery mode"""
+    room = workspace_room(workspace_id)
+    return room if mode is None else f'{room}:{mode}'
+
+
+def negotiate_mode(auth):
+    """Pick the delivery mode from a client's connect auth payload"""
+    if not auth or not auth.get('batch'):
+        return None
+    if auth.get('encoding') == 'msgpack' and msgpack is not None:
+        return 'msgpack'
+    return 'batch'
+
+
+def _compact(payload, users):
+    """Replace denormalized user name/email fields with a reference into `users`"""
+    if not isinstance(payload, dict):
+        return payload
+
+    compact = dict(payload)
+    for id_field, (name_field, email_field) in USER_REFERENCE_FIELDS.items():
+        if name_field in compact or email_field in compact:
+            name = compact.pop(name_field, None)
+            email = compact.pop(email_field, None)
+            user_id = compact.get(id_field)
+            if user_id is not None:
+                users[str(user_id)] = {'name': name, 'email': email}
+    return compact
+
+
+class RoomEmitter:
+    """Fan-out layer for workspace events.
+
+    Legacy clients get each event immediately, exactly as before. Clients that
+    negotiated batching get one 'events' frame per room per
+    SOCKET_COALESCE_MS window: {'events': [{'event', 'data', 'sid'?}...], 'users': {id: {name, email}}},
+    encoded once per frame (JSON or MessagePack) regardless of room size.
+
+    Rooms with no batched members skip the queue and frame encoding entirely.
+    A frame is shared by the whole room, so the sender's own events are not
+    filtered out server side; they carry the sender's socket id as `sid` and
+    clients drop events whose `sid` is their own.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._app = None
+        # Connections per (workspace_id, mode) for the batched modes; sockets.py reports joins/leaves
+        self._members = Counter()
+
+    def joined(self, workspace_id, mode):
+        if mode in BATCH_MODES:
+            with self._cond:
+                self._members[(workspace_id, mode)] += 1
+
+    def left(self, workspace_id, mode):
+        if mode in BATCH_MODES:
+            with self._cond:
+                self._members[(workspace_id, mode)] -= 1
+                if self._members[(workspace_id, mode)] <= 0:
+                    del self._members[(workspace_id, mode)]
+
+    def _batched_modes(self, workspace_id):
+        return [mode for mode in BATCH_MODES if self._members.get((workspace_id, mode))]
+
+    def _ensure_started(self):
+        if self._app is None:
+            with self._cond:
+                if self._app is None:
+                    self._app = current_app._get_current_object()
+                    socketio.start_background_task(self._run)
+
+    def emit(self, event, payload, workspace_id, skip_sid=None):
+        """Send an event to everyone in a workspace room"""
+        socketio.emit(event, payload, room=delivery_room(workspace_id), skip_sid=skip_sid)
+        socket_emits.inc(event=event)
+
+        with self._cond:
+            if not self._batched_modes(workspace_id):
+                return  # nobody here to coalesce for
+            self._pending.setdefault(workspace_id, []).append((event, payload, skip_sid))
+            self._cond.notify()
+        self._ensure_started()
+
+    def _run(self):
+        window = self._app.config['SOCKET_COALESCE_MS'] / 1000.0
+
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+            time.sleep(window)
+
+            with self._cond:
+                pending, self._pending = self._pending, {}
+
+            for workspace_id, events in pending.items():
+                try:
+                    self._send_frame(workspace_id, events)
+                except Exception:
+                    logger.exception("socket frame emit failed", extra={'workspace_id': workspace_id})
+
+    def _send_frame(self, workspace_id, events):
+        with self._cond:
+            modes = self._batched_modes(workspace_id)
+        if not modes:
+            return  # everyone batched left during the window
+
+        users = {}
+        entries = []
+        for event, payload, sid in events:
+            entry = {'event': event, 'data': _compact(payload, users)}
+            if sid is not None:
+                entry['sid'] = sid
+            entries.append(entry)
+        frame = {'workspace_id': workspace_id, 'events': entries, 'users': users}
+
+        if 'batch' in modes:
+            socketio.emit('events', frame, room=delivery_room(workspace_id, 'batch'))
+            socket_emits.inc(event='events')
+        if 'msgpack' in modes and msgpack is not None:
+            socketio.emit('events', msgpack.packb(frame), room=delivery_room(workspace_id, 'msgpack'))
+            socket_emits.inc(event='events')
+
+
+room_emitter = RoomEmitter()
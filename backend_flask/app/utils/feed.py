@@ -0,0 +1,51 @@
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from ..extensions import db
+from ..models import Workspace, WorkspaceActivity, WorkspaceMember
+from .cache import feed_cache
+from .timeline import TIMELINE_SOURCES, MAX_TIMELINE_LIMIT, older_than, decode_cursor, encode_cursor
+
+ACTIVITY_RANK = TIMELINE_SOURCES['activity'][2]
+
+
+def get_feed(user_id, limit=30, cursor=None):
+    """Latest activity across every workspace the user belongs to, newest first.
+
+    One query: the membership set as a subquery, walked through the
+    (workspace_id, created_at) index with a keyset cursor. The first page is
+    cached per user for FEED_CACHE_TTL seconds.
+    """
+    limit = max(1, min(limit, MAX_TIMELINE_LIMIT))
+
+    if cursor is None:
+        cached = feed_cache.get(user_id)
+        if cached is not None and cached['limit'] == limit:
+            return cached['payload']
+
+    memberships = select(WorkspaceMember.workspace_id).where(WorkspaceMember.user_id == user_id)
+    query = (
+        select(WorkspaceActivity, Workspace.name)
+        .join(Workspace, Workspace.id == WorkspaceActivity.workspace_id)
+        .options(joinedload(WorkspaceActivity.user))
+        .where(WorkspaceActivity.workspace_id.in_(memberships), Workspace.deleted_at.is_(None))
+    )
+    if cursor is not None:
+        query = query.where(older_than(WorkspaceActivity, ACTIVITY_RANK, decode_cursor(cursor)))
+    rows = db.session.execute(
+        query.order_by(WorkspaceActivity.created_at.desc(), WorkspaceActivity.id.desc()).limit(limit + 1)
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1][0] if rows else None
+    payload = {
+        'activities': [dict(activity.to_dict(), workspace_name=name) for activity, name in rows],
+        'has_more': has_more,
+        'next_cursor': encode_cursor(last.created_at, ACTIVITY_RANK, last.id) if has_more else None
+    }
+
+    if cursor is None:
+        feed_cache.set(user_id, {'limit': limit, 'payload': payload}, current_app.config['FEED_CACHE_TTL'])
+    return payload
@@ -0,0 +1,162 @@
+import logging
+import re
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.orm import joinedload
+
+from ..extensions import db, socketio
+from ..models import User, WorkspaceInvite, WorkspaceMember
+
+logger = logging.getLogger(__name__)
+
+INVITE_ROLES = ('admin', 'member', 'viewer')
+
+_EMAIL_SPLIT = re.compile(r'[\s,;]+')
+
+
+def parse_email_list(value):
+    """Accept a list of emails or a pasted class list (comma/semicolon/newline separated)"""
+    if isinstance(value, str):
+        value = _EMAIL_SPLIT.split(value)
+    return [email.strip().lower() for email in value or [] if isinstance(email, str) and email.strip()]
+
+
+def create_invites(workspace, invited_by_id, emails, role='member', expires_in_days=None):
+    """Invite many emails to a workspace with one multi-row INSERT.
+
+    Invalid addresses, duplicates, existing members and emails with a pending
+    invite are reported under `skipped` rather than failing the request.
+    """
+    expires_in_days = expires_in_days or current_app.config['INVITE_EXPIRY_DAYS']
+    report = {'created': [], 'skipped': []}
+
+    member_emails = set(db.session.execute(
+        select(User.email)
+        .join(WorkspaceMember, WorkspaceMember.user_id == User.id)
+        .where(WorkspaceMember.workspace_id == workspace.id)
+    ).scalars())
+    pending_emails = set(db.session.execute(
+        select(WorkspaceInvite.email).where(
+            WorkspaceInvite.workspace_id == workspace.id,
+            WorkspaceInvite.status == 'pending'
+        )
+    ).scalars())
+
+    now = datetime.utcnow()
+    rows, seen = [], set()
+    for email in emails:
+        if '@' not in email:
+            reason = 'invalid email'
+        elif email in seen:
+            reason = 'duplicate email'
+        elif email in member_emails:
+            reason = 'already a member'
+        elif email in pending_emails:
+            reason = 'invitation already sent'
+        else:
+            reason = None
+        seen.add(email)
+
+        if reason:
+            report['skipped'].append({'email': email, 'reason': reason})
+            continue
+        rows.append({
+            'workspace_id': workspace.id,
+            'email': email,
+            'invited_by_id': invited_by_id,
+            'invite_token': secrets.token_urlsafe(32),
+            'role': role,
+            'status': 'pending',
+            'created_at': now,
+            'expires_at': now + timedelta(days=expires_in_days)
+        })
+
+    if rows:
+        db.session.execute(insert(WorkspaceInvite), rows)
+        db.session.commit()
+    report['created'] = [
+        {
+            'email': row['email'],
+            'role': row['role'],
+            'invite_token': row['invite_token'],
+            'expires_at': row['expires_at'].isoformat()
+        }
+        for row in rows
+    ]
+    return report
+
+
+def pending_invites_for(email):
+    """Pending, unexpired invites for an email (served by the (email, status) index)"""
+    now = datetime.utcnow()
+    invites = (
+        WorkspaceInvite.query
+        .options(joinedload(WorkspaceInvite.workspace), joinedload(WorkspaceInvite.invited_by))
+        .filter(
+            WorkspaceInvite.email == email,
+            WorkspaceInvite.status == 'pending',
+            or_(WorkspaceInvite.expires_at.is_(None), WorkspaceInvite.expires_at > now)
+        )
+        .order_by(WorkspaceInvite.created_at.desc())
+        .all()
+    )
+    return [invite.to_dict() for invite in invites if invite.workspace.deleted_at is None]
+
+
+def expire_invites(batch_size=None):
+    """Mark overdue pending invites as expired, one UPDATE ... WHERE id IN per batch"""
+    batch_size = batch_size or current_app.config['INVITE_SWEEP_BATCH_SIZE']
+    now = datetime.utcnow()
+    expired = 0
+    while True:
+        ids = db.session.execute(
+            select(WorkspaceInvite.id)
+            .where(WorkspaceInvite.status == 'pending', WorkspaceInvite.expires_at < now)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return expired
+        db.session.execute(
+            update(WorkspaceInvite).where(WorkspaceInvite.id.in_(ids)).values(status='expired', responded_at=now),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        expired += len(ids)
+
+
+class InviteSweeper:
+    """Background task expiring invites every INVITE_SWEEP_SECONDS"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._app = None
+
+    def start(self, app):
+        """Run the sweep loop for `app`; started with the server so sweeps resume after a restart"""
+        if app.config['INVITE_SWEEP_SECONDS'] <= 0:
+            return
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = app
+                    socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            try:
+                with self._app.app_context():
+                    try:
+                        expire_invites()
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logger.exception("invite sweep failed")
+            time.sleep(self._app.config['INVITE_SWEEP_SECONDS'])
+
+
+invite_sweeper = InviteSweeper()
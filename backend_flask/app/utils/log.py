@@ -0,0 +1,185 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+_REQUEST_ID = re.compile(r'^[\w.:-]{1,64}$')
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'sid', 'sample_rate', 'taskName'
+}
+
+_listener = None
+_handler = None
+
+
+def new_request_id(supplied=None):
+    """Keep a well-formed id sent by the client so its HTTP and socket traffic correlate, else mint one"""
+    if isinstance(supplied, str) and _REQUEST_ID.match(supplied):
+        return supplied
+    return uuid.uuid4().hex
+
+
+def parse_pairs(spec):
+    """'app.sockets=WARNING,werkzeug=error' -> {'app.sockets': 'WARNING', 'werkzeug': 'ERROR'}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, value = item.partition('=')
+        if name.strip() and value.strip():
+            levels[name.strip()] = value.strip().upper()
+    return levels
+
+
+class _RequestContextFilter(logging.Filter):
+    """Stamp records with the HTTP request id, or the socket connection's id and sid"""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        sid = getattr(request, 'sid', None)
+        if sid is not None:
+            from ..sockets import get_session
+            record.sid = sid
+            session = get_session(sid)
+            request_id = session.request_id if session is not None else None
+        else:
+            request_id = g.get('request_id')
+        if request_id is not None:
+            record.request_id = request_id
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    """Keep a fraction of sub-WARNING records per logger prefix; warnings and errors always pass"""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix first so 'app.sockets' wins over 'app'
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                if rate >= 1:
+                    return True
+                if random.random() >= rate:
+                    return False
+                record.sample_rate = rate
+                return True
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread; drops them rather than block when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback on the caller's thread, keep `extra=` fields intact
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line (LOG_FORMAT=json), or a readable line with key=value fields (text)"""
+
+    def __init__(self, style='json'):
+        super().__init__()
+        self.json = style == 'json'
+
+    def format(self, record):
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+        for key in ('request_id', 'sid', 'sample_rate'):
+            if hasattr(record, key):
+                fields[key] = getattr(record, key)
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')
+
+        if self.json:
+            entry = {'ts': timestamp, 'level': record.levelname, 'logger': record.name, 'message': record.getMessage()}
+            entry.update(fields)
+            if record.exc_text:
+                entry['exc'] = record.exc_text
+            return json.dumps(entry, default=str)
+
+        line = f"{timestamp} {record.levelname} {record.name}: {record.getMessage()}"
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+
+def _assign_request_id():
+    g.request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+
+
+def _echo_request_id(response):
+    if 'request_id' in g:
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+    return response
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_logging(app):
+    """Route all logging through a queue drained by one writer thread, and tag records with request ids"""
+    global _listener, _handler
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    _stop_listener()
+
+    log_queue = queue.Queue(app.config['LOG_QUEUE_SIZE'])
+    _handler = _NonBlockingQueueHandler(log_queue)
+    # Sample first so dropped records cost as little as possible
+    _handler.addFilter(_SamplingFilter({
+        name: float(rate) for name, rate in parse_pairs(app.config['LOG_SAMPLE_RATES']).items()
+    }))
+    _handler.addFilter(_RequestContextFilter())
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(StructuredFormatter(app.config['LOG_FORMAT']))
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+    root.addHandler(_handler)
+    # `app` is also Flask's app.logger; with a handler on the root it adds no default handler of its own
+    logging.getLogger('app').setLevel(app.config['LOG_LEVEL'].upper())
+    for name, level in parse_pairs(app.config['LOG_LEVELS']).items():
+        logging.getLogger(name).setLevel(level)
+
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
+
+
+# Flush whatever is still queued when the process exits
+atexit.register(_stop_listener)
@@ -0,0 +1,259 @@
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from flask import Response, current_app, g, request
+
+from ..extensions import db, socketio
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+AI_LATENCY_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [f'{self.name}{_labels(self.labelnames, key)} {_number(v)}' for key, v in values]
+
+
+class Gauge(_Metric):
+    """A value set by the app, or read from `callback` (returning {label tuple: value}) at scrape time.
+
+    Pass kind='counter' for callbacks reading counters kept elsewhere (e.g. cache hits).
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None, kind='gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        if self.callback is not None:
+            try:
+                values = list(self.callback().items())
+            except Exception:
+                return []
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self.header() + [f'{self.name}{_labels(self.labelnames, key)} {_number(v)}' for key, v in values]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self):
+        with self._lock:
+            values = [(key, list(state[0]), state[1]) for key, state in self._values.items()]
+        lines = self.header()
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    'http_requests_total', 'HTTP requests by blueprint, method and status', ('blueprint', 'method', 'status')))
+http_latency = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by blueprint', ('blueprint',)))
+http_in_flight = registry.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being served'))
+socket_emits = registry.register(Counter(
+    'socket_emits_total', 'Socket.IO emits by event (batched frames count once per frame)', ('event',)))
+socket_events = registry.register(Counter(
+    'socket_events_total', 'Socket.IO events handled, by event and outcome', ('event', 'outcome')))
+socket_latency = registry.register(Histogram(
+    'socket_event_duration_seconds', 'Socket.IO handler latency by event', ('event',)))
+upload_bytes = registry.register(Counter(
+    'upload_bytes_total', 'Bytes of workspace files accepted for upload'))
+ai_latency = registry.register(Histogram(
+    'ai_generation_duration_seconds', 'AI provider latency for project generation, as reported by the client',
+    ('provider',), buckets=AI_LATENCY_BUCKETS))
+
+
+def _pool_usage():
+    pool = db.engine.pool
+    usage = {}
+    for state in ('size', 'checkedout', 'overflow', 'checkedin'):
+        reader = getattr(pool, state, None)
+        if callable(reader):
+            usage[(state,)] = reader()
+    return usage
+
+
+def _socket_connections():
+    from ..sockets import _sessions
+    return {(): len(_sessions)}
+
+
+def _socket_rooms():
+    rooms = socketio.server.manager.rooms.get('/', {})
+    # Every sid also has a private room; count workspaces, whatever delivery modes their rooms use
+    return {(): len({room.split(':')[0] for room in rooms if room is not None and room.startswith('workspace_')})}
+
+
+def _cache_counts(read):
+    def collect():
+        from .cache import CACHES
+        return {(cache.name,): read(cache) for cache in CACHES}
+    return collect
+
+
+registry.register(Gauge('db_pool_connections', 'SQLAlchemy connection pool usage', ('state',), callback=_pool_usage))
+registry.register(Gauge('socket_connections', 'Open Socket.IO connections in this process', callback=_socket_connections))
+registry.register(Gauge('socket_rooms', 'Workspace rooms with at least one connection', callback=_socket_rooms))
+registry.register(Gauge('cache_hits_total', 'In-process cache hits', ('cache',),
+                        callback=_cache_counts(lambda cache: cache.hits), kind='counter'))
+registry.register(Gauge('cache_misses_total', 'In-process cache misses', ('cache',),
+                        callback=_cache_counts(lambda cache: cache.misses), kind='counter'))
+registry.register(Gauge('cache_entries', 'Entries held by in-process caches', ('cache',), callback=_cache_counts(len)))
+
+
+def instrument_socket_handler(event, handler):
+    """Wrap a Socket.IO handler so its calls and latency are recorded under `event`"""
+    @wraps(handler)
+    def wrapper(*args):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = handler(*args)
+            outcome = 'ok'
+            return result
+        finally:
+            socket_latency.observe(time.perf_counter() - started, event=event)
+            socket_events.inc(event=event, outcome=outcome)
+    return wrapper
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    http_in_flight.inc()
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    http_in_flight.dec()
+    blueprint = request.blueprint or 'app'
+    http_latency.observe(time.perf_counter() - started, blueprint=blueprint)
+    http_requests.inc(blueprint=blueprint, method=request.method, status=g.pop('metrics_status', 500))
+
+
+def metrics_endpoint():
+    """Prometheus scrape target; requires `Authorization: Bearer <METRICS_TOKEN>` when that is set"""
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    """Time every request and serve GET /metrics (METRICS_ENABLED; needs METRICS_TOKEN or METRICS_PUBLIC)"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    if not app.config['METRICS_TOKEN'] and not app.config['METRICS_PUBLIC']:
+        logger.warning("/metrics disabled: set METRICS_TOKEN (or METRICS_PUBLIC=true) to expose it")
+        return
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint, methods=['GET'])
@@ -0,0 +1,117 @@
+import hmac
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt as _bcrypt
+from flask import current_app
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = None
+
+# Passwords per pool job in hash_passwords; each job holds one _pending slot
+BULK_CHUNK_SIZE = 8
+
+# Forking a threaded server can copy locks held by other threads into the
+# workers and deadlock them; start workers from a clean process instead
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _hash_password(args):
+    """Hash one password (runs in a worker process, so no app context here)"""
+    password, rounds = args
+    return _bcrypt.hashpw(password.encode('utf-8'), _bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _hash_chunk(jobs):
+    return [_hash_password(job) for job in jobs]
+
+
+def _check_password(args):
+    """Compare a candidate password against a stored hash in constant time"""
+    password_hash, password = args
+    password_hash = password_hash.encode('utf-8')
+    return hmac.compare_digest(_bcrypt.hashpw(password.encode('utf-8'), password_hash), password_hash)
+
+
+def _get_pool():
+    """Lazily create the shared hashing pool, bounded by PASSWORD_HASH_WORKERS.
+
+    Returns None when PASSWORD_HASH_WORKERS is 0, in which case hashing runs
+    inline on the calling thread.
+    """
+    global _pool, _pending
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if workers <= 0:
+        return None
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pending = threading.BoundedSemaphore(workers * current_app.config['PASSWORD_HASH_QUEUE_FACTOR'])
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context(_START_METHOD)
+                )
+    return _pool
+
+
+def _run(fn, args):
+    """Run one hashing job on the pool, blocking callers once the queue is full"""
+    pool = _get_pool()
+    if pool is None:
+        return fn(args)
+
+    with _pending:
+        return pool.submit(fn, args).result()
+
+
+def hash_password(password):
+    return _run(_hash_password, (password, current_app.config['BCRYPT_LOG_ROUNDS']))
+
+
+def check_password(password_hash, password):
+    try:
+        return _run(_check_password, (password_hash, password))
+    except ValueError:
+        # Malformed hash or a password bcrypt refuses to handle
+        return False
+
+
+def hash_cost(password_hash):
+    """Return the bcrypt cost factor encoded in a hash like $2b$12$..."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    return hash_cost(password_hash) != current_app.config['BCRYPT_LOG_ROUNDS']
+
+
+def hash_passwords(passwords):
+    """Hash many passwords in parallel across worker processes, preserving order.
+
+    Chunks are submitted through the same bounded queue as single hashes, so a
+    bulk import waits its turn instead of starving interactive logins.
+    """
+    if not passwords:
+        return []
+
+    jobs = [(password, current_app.config['BCRYPT_LOG_ROUNDS']) for password in passwords]
+    pool = _get_pool()
+    if pool is None:
+        return [_hash_password(job) for job in jobs]
+
+    futures = []
+    for start in range(0, len(jobs), BULK_CHUNK_SIZE):
+        _pending.acquire()
+        try:
+            future = pool.submit(_hash_chunk, jobs[start:start + BULK_CHUNK_SIZE])
+        except Exception:
+            _pending.release()
+            raise
+        future.add_done_callback(lambda _: _pending.release())
+        futures.append(future)
+    return [password_hash for future in futures for password_hash in future.result()]
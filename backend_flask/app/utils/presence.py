@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, update
+
+from ..extensions import db, socketio
+from ..models import WorkspaceMember
+from .emitter import room_emitter
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceRegistry:
+    """In-memory record of who is connected to which workspace.
+
+    Fed by the socket handlers (join/leave/disconnect/heartbeat). Nothing here
+    touches the database on the hot path: last_active timestamps are collected
+    in a dirty map and written behind in one executemany UPDATE every
+    PRESENCE_FLUSH_SECONDS. State is per worker process.
+    """
+
+    def __init__(self):
+        self._workspaces = {}   # workspace_id -> {user_id: {'sids': set(), 'last_seen': datetime}}
+        self._typing = {}       # workspace_id -> {user_id: expires (monotonic)}
+        self._dirty = {}        # (workspace_id, user_id) -> datetime
+        self._lock = threading.Lock()
+        self._app = None
+
+    def _ensure_started(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = current_app._get_current_object()
+                    socketio.start_background_task(self._run)
+
+    def _touch(self, workspace_id, user_id, now):
+        self._workspaces[workspace_id][user_id]['last_seen'] = now
+        self._dirty[(workspace_id, user_id)] = now
+
+    def join(self, workspace_id, user_id, sid):
+        self._ensure_started()
+        now = datetime.utcnow()
+        with self._lock:
+            users = self._workspaces.setdefault(workspace_id, {})
+            came_online = user_id not in users
+            users.setdefault(user_id, {'sids': set(), 'last_seen': now})['sids'].add(sid)
+            self._touch(workspace_id, user_id, now)
+
+        if came_online:
+            self._announce(workspace_id, user_id, 'online', now)
+
+    def leave(self, workspace_id, user_id, sid):
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._workspaces.get(workspace_id, {}).get(user_id)
+            if entry is None:
+                return
+            entry['sids'].discard(sid)
+            went_offline = not entry['sids']
+            self._dirty[(workspace_id, user_id)] = now
+            if went_offline:
+                del self._workspaces[workspace_id][user_id]
+                if not self._workspaces[workspace_id]:
+                    del self._workspaces[workspace_id]
+                self._typing.get(workspace_id, {}).pop(user_id, None)
+
+        if went_offline:
+            self._announce(workspace_id, user_id, 'offline', now)
+
+    def heartbeat(self, workspace_ids, user_id):
+        now = datetime.utcnow()
+        with self._lock:
+            for workspace_id in workspace_ids:
+                if user_id in self._workspaces.get(workspace_id, {}):
+                    self._touch(workspace_id, user_id, now)
+
+    def set_typing(self, workspace_id, user_id, typing):
+        """Record a typing indicator, which expires after PRESENCE_TYPING_SECONDS"""
+        with self._lock:
+            if typing:
+                expires = time.monotonic() + current_app.config['PRESENCE_TYPING_SECONDS']
+                self._typing.setdefault(workspace_id, {})[user_id] = expires
+            else:
+                self._typing.get(workspace_id, {}).pop(user_id, None)
+
+    def snapshot(self, workspace_id):
+        """Return the online users and who is typing in a workspace"""
+        now = time.monotonic()
+        with self._lock:
+            users = self._workspaces.get(workspace_id, {})
+            online = [
+                {'user_id': user_id, 'connections': len(entry['sids']), 'last_seen': entry['last_seen'].isoformat()}
+                for user_id, entry in users.items()
+            ]
+            typing = [
+                user_id for user_id, expires in self._typing.get(workspace_id, {}).items()
+                if expires > now
+            ]
+        return {'workspace_id': workspace_id, 'online': online, 'typing': typing}
+
+    def _announce(self, workspace_id, user_id, status, now):
+        room_emitter.emit('presence', {
+            'workspace_id': workspace_id,
+            'user_id': user_id,
+            'status': status,
+            'last_seen': now.isoformat()
+        }, workspace_id)
+
+    def _run(self):
+        while True:
+            time.sleep(self._app.config['PRESENCE_FLUSH_SECONDS'])
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("presence flush failed")
+
+    def flush(self):
+        """Write all pending last_active timestamps with a single executemany UPDATE"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+
+        table = WorkspaceMember.__table__
+        stmt = update(table).where(and_(
+            table.c.workspace_id == bindparam('w_id'),
+            table.c.user_id == bindparam('u_id')
+        )).values(last_active=bindparam('ts'))
+
+        with (self._app or current_app._get_current_object()).app_context():
+            try:
+                db.session.execute(stmt, [
+                    {'w_id': workspace_id, 'u_id': user_id, 'ts': ts}
+                    for (workspace_id, user_id), ts in dirty.items()
+                ])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # Put the timestamps back unless newer ones arrived meanwhile
+                with self._lock:
+                    for key, ts in dirty.items():
+                        self._dirty.setdefault(key, ts)
+                raise
+            finally:
+                db.session.remove()
+
+        return len(dirty)
+
+
+presence = PresenceRegistry()
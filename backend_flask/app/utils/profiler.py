@@ -0,0 +1,261 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..extensions import db
+from ..models import User
+from .query_stats import _APP_ROOT, _call_site, fingerprint
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = '_profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+_PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+_SITE_PACKAGES = f'{os.sep}site-packages{os.sep}'
+_MAX_STACK_DEPTH = 200
+_MAX_STATEMENT_CHARS = 1000
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = os.path.relpath(filename, os.path.dirname(_APP_ROOT))
+    elif _SITE_PACKAGES in filename:
+        filename = filename.split(_SITE_PACKAGES, 1)[1]
+    # ';' separates frames in the collapsed stack format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+def _stack(frame):
+    labels = []
+    while frame is not None and len(labels) < _MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's Python stack every `interval` seconds until stopped"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_stack(frame)] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def call_tree(stacks):
+    """Fold collapsed stacks into a nested {name, samples, children} tree, heaviest children first"""
+    root = {'name': 'all', 'samples': 0, 'children': {}}
+    for stack, samples in stacks.items():
+        root['samples'] += samples
+        node = root
+        for label in stack.split(';'):
+            node = node['children'].setdefault(label, {'name': label, 'samples': 0, 'children': {}})
+            node['samples'] += samples
+
+    def finish(node):
+        children = sorted(node['children'].values(), key=lambda child: -child['samples'])
+        node['children'] = [finish(child) for child in children]
+        return node
+    return finish(root)
+
+
+def collapsed(profile):
+    """Profile samples as 'frame;frame;frame count' lines (flamegraph.pl, speedscope, inferno)"""
+    return ''.join(f"{stack} {samples}\n" for stack, samples in profile['stacks'].items())
+
+
+def _profile_path(profile_id):
+    return os.path.join(current_app.config['PROFILE_FOLDER'], f"{profile_id}.json")
+
+
+def _stored_paths():
+    folder = current_app.config['PROFILE_FOLDER']
+    if not os.path.isdir(folder):
+        return []
+    stamped = []
+    for name in os.listdir(folder):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            stamped.append((os.path.getmtime(path), path))
+        except OSError:
+            continue  # removed by a concurrent prune or DELETE /profiles
+    return [path for _, path in sorted(stamped, reverse=True)]
+
+
+def _save(profile):
+    os.makedirs(current_app.config['PROFILE_FOLDER'], exist_ok=True)
+    with open(_profile_path(profile['id']), 'w') as f:
+        json.dump(profile, f)
+    for path in _stored_paths()[current_app.config['PROFILE_KEEP']:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_profile(profile_id):
+    if not _PROFILE_ID.match(profile_id or ''):
+        return None
+    try:
+        with open(_profile_path(profile_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_profiles():
+    """Summaries of the stored profiles, newest first"""
+    summaries = []
+    for path in _stored_paths():
+        try:
+            with open(path) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summaries.append({key: profile[key] for key in (
+            'id', 'created_at', 'method', 'path', 'endpoint', 'status', 'user_id', 'duration_ms', 'samples'
+        )} | {'sql_count': profile['sql']['count'], 'sql_time_ms': profile['sql']['time_ms']})
+    return summaries
+
+
+def clear_profiles():
+    removed = 0
+    for path in _stored_paths():
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile' in g:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'profile' in g):
+        return
+    starts = conn.info.get('profile_query_start')
+    if not starts:
+        return
+    started = starts.pop()
+    g.profile['statements'].append({
+        'offset_ms': round((started - g.profile['started']) * 1000, 3),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        'statement': statement[:_MAX_STATEMENT_CHARS],
+        'call_site': _call_site()
+    })
+
+
+def _requested():
+    return request.headers.get(PROFILE_HEADER, '').lower() in ('1', 'true') or \
+        request.args.get(PROFILE_PARAM, '').lower() in ('1', 'true')
+
+
+def _requested_by_admin():
+    """Same check as admin_required, but a missing/invalid token just means no profile"""
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = int(get_jwt_identity())
+    except Exception:
+        return None
+    user = db.session.get(User, user_id)
+    return user_id if user and user.deleted_at is None and user.is_admin() else None
+
+
+def _start_request():
+    if not _requested():
+        return
+    user_id = _requested_by_admin()
+    if user_id is None:
+        return
+    sampler = _Sampler(threading.get_ident(), current_app.config['PROFILE_SAMPLE_INTERVAL_MS'] / 1000)
+    g.profile = {'user_id': user_id, 'sampler': sampler, 'statements': [], 'started': time.perf_counter()}
+    sampler.start()
+
+
+def _finish_request(response):
+    state = g.pop('profile', None)
+    if state is None:
+        return response
+    duration = time.perf_counter() - state['started']
+    state['sampler'].stop()
+
+    by_fingerprint = {}
+    for query in state['statements']:
+        entry = by_fingerprint.setdefault(fingerprint(query['statement']), {'count': 0, 'time_ms': 0.0})
+        entry['count'] += 1
+        entry['time_ms'] += query['duration_ms']
+    profile = {
+        'id': uuid.uuid4().hex,
+        'created_at': datetime.utcnow().isoformat(),
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.url_rule.rule if request.url_rule else None,
+        'status': response.status_code,
+        'user_id': state['user_id'],
+        'duration_ms': round(duration * 1000, 3),
+        'sample_interval_ms': current_app.config['PROFILE_SAMPLE_INTERVAL_MS'],
+        'samples': sum(state['sampler'].stacks.values()),
+        'stacks': dict(state['sampler'].stacks.most_common()),
+        'sql': {
+            'count': len(state['statements']),
+            'time_ms': round(sum(query['duration_ms'] for query in state['statements']), 3),
+            'by_fingerprint': sorted(
+                ({'fingerprint': statement, 'count': entry['count'], 'time_ms': round(entry['time_ms'], 3)}
+                 for statement, entry in by_fingerprint.items()),
+                key=lambda entry: -entry['time_ms']
+            ),
+            'statements': state['statements']
+        }
+    }
+    _save(profile)
+    response.headers[PROFILE_ID_HEADER] = profile['id']
+    return response
+
+
+def _abandon_request(exc):
+    # after_request is skipped when the response could not be built; never leave a sampler running
+    state = g.pop('profile', None)
+    if state is not None:
+        state['sampler'].stop()
+
+
+def init_profiler(app):
+    """Let admins profile any request with `X-Profile: 1` or `?_profile=1` (PROFILING_ENABLED)"""
+    if not app.config['PROFILING_ENABLED']:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_abandon_request)
@@ -0,0 +1,158 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))*\s*\)')
+
+
+def fingerprint(statement):
+    """Normalise a SQL statement so the same query with different values/IN lists matches"""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    return _PLACEHOLDER_LIST.sub('(?)', statement)
+
+
+def _call_site():
+    """Innermost frame in application code that is not this module, as 'path:line in func'"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_APP_ROOT) and filename != _THIS_FILE:
+            return f"{os.path.relpath(filename, os.path.dirname(_APP_ROOT))}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryStats:
+    """Per-endpoint SQL counters, aggregated in-process from request-scoped samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, count, db_time, repeats):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_time_ms': 0.0,
+                'n_plus_one': {}
+            })
+            stats['requests'] += 1
+            stats['queries'] += count
+            stats['max_queries'] = max(stats['max_queries'], count)
+            stats['db_time_ms'] += db_time * 1000
+            for statement, (times, site) in repeats.items():
+                pattern = stats['n_plus_one'].setdefault(statement, {
+                    'requests': 0,
+                    'max_repeats': 0,
+                    'call_site': site
+                })
+                pattern['requests'] += 1
+                pattern['max_repeats'] = max(pattern['max_repeats'], times)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = [
+                {
+                    'endpoint': endpoint,
+                    'requests': stats['requests'],
+                    'queries': stats['queries'],
+                    'avg_queries': round(stats['queries'] / stats['requests'], 2),
+                    'max_queries': stats['max_queries'],
+                    'db_time_ms': round(stats['db_time_ms'], 2),
+                    'avg_db_time_ms': round(stats['db_time_ms'] / stats['requests'], 2),
+                    'n_plus_one': [
+                        dict(pattern, fingerprint=statement)
+                        for statement, pattern in sorted(
+                            stats['n_plus_one'].items(), key=lambda item: -item[1]['max_repeats']
+                        )
+                    ]
+                }
+                for endpoint, stats in self._endpoints.items()
+            ]
+        return sorted(endpoints, key=lambda e: -e['queries'])
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+query_stats = QueryStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_fingerprints' in g:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'sql_fingerprints' in g):
+        return
+    starts = conn.info.get('query_start')
+    if starts:
+        g.sql_time += time.perf_counter() - starts.pop()
+    g.sql_count += 1
+
+    key = fingerprint(statement)
+    g.sql_fingerprints[key] += 1
+    # Remember where the repeated statement comes from the moment it becomes a pattern
+    if g.sql_fingerprints[key] == current_app.config['SQL_N_PLUS_ONE_THRESHOLD']:
+        g.sql_call_sites[key] = _call_site()
+
+
+def _start_request():
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.sql_fingerprints = Counter()
+    g.sql_call_sites = {}
+
+
+def _finish_request(response):
+    if 'sql_fingerprints' not in g:
+        return response
+
+    endpoint = f"{request.method} {request.url_rule.rule}" if request.url_rule else request.endpoint or request.path
+    threshold = current_app.config['SQL_N_PLUS_ONE_THRESHOLD']
+    repeats = {
+        statement: (times, g.sql_call_sites.get(statement))
+        for statement, times in g.sql_fingerprints.items()
+        if times >= threshold
+    }
+    for statement, (times, site) in repeats.items():
+        logger.warning("N+1 query on %s", endpoint, extra={
+            'repeats': times, 'call_site': site, 'statement': statement[:200]
+        })
+
+    query_stats.record(endpoint, g.sql_count, g.sql_time, repeats)
+    g.pop('sql_fingerprints')
+    return response
+
+
+def init_query_stats(app):
+    """Hook SQL counting into the engine and the request lifecycle (SQL_STATS_ENABLED)"""
+    if not app.config['SQL_STATS_ENABLED']:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,215 @@
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from ..extensions import db, socketio
+from ..models import (
+    User, StudentProfile, GeneratedProject, SavedProject, UserActivity, UserSkill,
+    ProjectPhase, PhaseTask, Workspace, WorkspaceMember, WorkspaceInvite, WorkspaceMessage,
+    WorkspaceFile, WorkspaceActivity, WorkspaceReadCursor, ArchivedMessageSearch
+)
+from ..files.routes import UPLOAD_FOLDER
+from .archive import drop_workspace_archive, remove_archive_folders
+from .cache import invalidate_profile
+from .discovery import record_member_change
+
+logger = logging.getLogger(__name__)
+
+
+def _remove_blobs(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _delete_in_batches(model, condition, batch_size):
+    """DELETE ... WHERE id IN (next batch) until nothing matches, committing per batch"""
+    deleted = 0
+    while True:
+        ids = db.session.execute(select(model.id).where(condition).limit(batch_size)).scalars().all()
+        if not ids:
+            return deleted
+        db.session.execute(delete(model).where(model.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+
+
+def _delete_files_in_batches(condition, batch_size):
+    """Like _delete_in_batches for workspace_file, removing each batch's blobs after it commits"""
+    deleted = 0
+    while True:
+        rows = db.session.execute(
+            select(WorkspaceFile.id, WorkspaceFile.file_path).where(condition).limit(batch_size)
+        ).all()
+        if not rows:
+            return deleted
+        db.session.execute(delete(WorkspaceFile).where(WorkspaceFile.id.in_([row.id for row in rows])))
+        db.session.commit()
+        _remove_blobs(row.file_path for row in rows)
+        deleted += len(rows)
+
+
+def tombstone_workspace(workspace):
+    """Hide a workspace immediately and cut off access; the reaper removes the rest.
+
+    Members, invites and read cursors are bounded by max_members and go now so
+    that every membership check fails from this commit on. Caller commits.
+    """
+    workspace.deleted_at = datetime.utcnow()
+    for model in (WorkspaceMember, WorkspaceInvite, WorkspaceReadCursor):
+        db.session.execute(delete(model).where(model.workspace_id == workspace.id))
+
+
+def tombstone_user(user):
+    """Disable an account immediately and tombstone the workspaces it owns (caller commits).
+
+    The email is released right away so the address can register again.
+    """
+    now = datetime.utcnow()
+    user.deleted_at = now
+    user.email = f'deleted-{user.id}@deleted.invalid'
+    user.password_hash = None
+    user.google_id = None
+    for workspace in Workspace.query.filter_by(owner_id=user.id, deleted_at=None):
+        tombstone_workspace(workspace)
+
+
+def reap_workspace(workspace_id, batch_size):
+    """Delete a tombstoned workspace's children in batches, then its blobs and the row itself"""
+    for model in (
+        WorkspaceMessage, WorkspaceActivity, WorkspaceReadCursor, WorkspaceMember, WorkspaceInvite,
+        ArchivedMessageSearch
+    ):
+        _delete_in_batches(model, model.workspace_id == workspace_id, batch_size)
+    _delete_files_in_batches(WorkspaceFile.workspace_id == workspace_id, batch_size)
+
+    archive_folders = drop_workspace_archive(workspace_id)
+    db.session.execute(delete(Workspace).where(Workspace.id == workspace_id))
+    db.session.commit()
+
+    shutil.rmtree(os.path.join(UPLOAD_FOLDER, f'workspace_{workspace_id}'), ignore_errors=True)
+    remove_archive_folders(archive_folders)
+
+
+def reap_user(user_id, batch_size):
+    """Delete a tombstoned user's rows everywhere, in batches, then the user"""
+    saved_ids = select(SavedProject.id).where(SavedProject.user_id == user_id)
+    phase_ids = select(ProjectPhase.id).where(ProjectPhase.saved_project_id.in_(saved_ids))
+
+    # Unlink (never delete) other people's workspaces pointing at this user's projects
+    db.session.execute(
+        update(Workspace).where(Workspace.saved_project_id.in_(saved_ids)).values(saved_project_id=None),
+        execution_options={'synchronize_session': False}
+    )
+    # Keep shared activity history, attributed to nobody
+    db.session.execute(
+        update(WorkspaceActivity).where(WorkspaceActivity.user_id == user_id).values(user_id=None),
+        execution_options={'synchronize_session': False}
+    )
+    # Leave the user's workspaces and fix their member counts in the same transaction,
+    # so a failed pass that is retried never decrements twice
+    for workspace_id in db.session.execute(
+        select(WorkspaceMember.workspace_id).where(WorkspaceMember.user_id == user_id)
+    ).scalars().all():
+        record_member_change(workspace_id, -1)
+    db.session.execute(delete(WorkspaceMember).where(WorkspaceMember.user_id == user_id))
+    db.session.commit()
+
+    # Workspaces the account still owns (e.g. created just before the tombstone) would block the delete
+    for workspace_id in db.session.execute(
+        select(Workspace.id).where(Workspace.owner_id == user_id)
+    ).scalars().all():
+        reap_workspace(workspace_id, batch_size)
+
+    _delete_in_batches(PhaseTask, PhaseTask.phase_id.in_(phase_ids), batch_size)
+    _delete_in_batches(ProjectPhase, ProjectPhase.saved_project_id.in_(saved_ids), batch_size)
+    for model, column in (
+        (SavedProject, SavedProject.user_id),
+        (GeneratedProject, GeneratedProject.user_id),
+        (StudentProfile, StudentProfile.user_id),
+        (UserSkill, UserSkill.user_id),
+        (UserActivity, UserActivity.user_id),
+        (WorkspaceReadCursor, WorkspaceReadCursor.user_id),
+        (WorkspaceInvite, WorkspaceInvite.invited_by_id),
+        (WorkspaceMessage, WorkspaceMessage.user_id),
+    ):
+        _delete_in_batches(model, column == user_id, batch_size)
+    _delete_files_in_batches(WorkspaceFile.uploaded_by == user_id, batch_size)
+
+    db.session.execute(delete(User).where(User.id == user_id))
+    db.session.commit()
+    invalidate_profile(user_id)
+
+
+class Reaper:
+    """Background task that finishes tombstoned deletions.
+
+    Woken right after a tombstone is committed, and also sweeps every
+    REAPER_INTERVAL_SECONDS so work left behind by a restart is picked up.
+    """
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._app = None
+
+    def start(self, app):
+        """Run the reaper loop for `app`; started with the server so leftovers are reaped after a restart"""
+        if app.config['REAPER_INTERVAL_SECONDS'] <= 0:
+            return
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = app
+                    socketio.start_background_task(self._run)
+
+    def _ensure_started(self):
+        self.start(current_app._get_current_object())
+
+    def wake(self):
+        self._ensure_started()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._app.config['REAPER_INTERVAL_SECONDS'])
+            self._wake.clear()
+            try:
+                with self._app.app_context():
+                    self.reap_all()
+            except Exception:
+                logger.exception("reaper pass failed")
+
+    def reap_all(self):
+        """Reap every tombstoned workspace, then every tombstoned user"""
+        batch_size = (self._app or current_app).config['REAPER_BATCH_SIZE']
+        reaped = {'workspaces': 0, 'users': 0}
+        try:
+            # Workspaces first: a deleted user's owned workspaces are tombstoned too
+            for workspace_id in db.session.execute(
+                select(Workspace.id).where(Workspace.deleted_at.isnot(None))
+            ).scalars().all():
+                reap_workspace(workspace_id, batch_size)
+                reaped['workspaces'] += 1
+
+            for user_id in db.session.execute(
+                select(User.id).where(User.deleted_at.isnot(None))
+            ).scalars().all():
+                reap_user(user_id, batch_size)
+                reaped['users'] += 1
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+        return reaped
+
+
+reaper = Reaper()
@@ -0,0 +1,370 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, insert, select, text
+
+from ..extensions import db, bcrypt
+from ..models import (
+    User, ProjectTopic, GeneratedProject, SavedProject, ProjectPhase, PhaseTask, UserActivity,
+    Workspace, WorkspaceMember, WorkspaceMessage, WorkspaceFile, WorkspaceActivity, WorkspaceReadCursor
+)
+from ..files.routes import UPLOAD_FOLDER
+
+# Row counts for one seeding run; per-parent counts are averages (actual counts vary +/-50%)
+SEED_DEFAULTS = {
+    'users': 1000,
+    'topics': 500,
+    'generated_per_user': 3,
+    'saved_per_user': 2,
+    'phases_per_project': 4,
+    'tasks_per_phase': 5,
+    'user_activities_per_user': 20,
+    'workspaces': 200,
+    'members_per_workspace': 5,
+    'messages_per_workspace': 300,
+    'files_per_workspace': 10,
+    'activities_per_workspace': 50,
+}
+
+SEED_PASSWORD = 'password123'
+
+PROGRAMS = ['computer-science', 'information-technology', 'software-engineering', 'data-science', 'business', 'engineering']
+DIFFICULTIES = ['Beginner', 'Intermediate', 'Advanced']
+DURATIONS = ['3-4 months', '4-6 months', '6-8 months']
+PHASES = ['Research', 'Planning', 'Design', 'Implementation', 'Testing', 'Documentation']
+WORDS = (
+    'data model system analysis design user interface network security machine learning '
+    'prototype evaluation survey literature review dataset api database mobile web cloud '
+    'performance testing deployment requirements architecture algorithm results report'
+).split()
+FILE_TYPES = [('pdf', 'application/pdf'), ('docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+              ('png', 'image/png'), ('zip', 'application/zip'), ('py', 'text/x-python')]
+USER_ACTIVITY_TYPES = ['form_submit', 'project_view', 'project_save', 'project_generate']
+
+
+class _Seeder:
+    """Builds rows with explicit primary keys so children can reference parents without read-backs"""
+
+    def __init__(self, counts, seed, days, batch_size, blobs):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.now = datetime.utcnow()
+        self.days = days
+        self.batch_size = batch_size
+        self.blobs = blobs
+        self.inserted = {}
+
+    def around(self, average):
+        """A count near `average` (+/-50%), so datasets are not perfectly uniform"""
+        if average <= 0:
+            return 0
+        return self.rng.randint(max(average // 2, 1), average + average // 2)
+
+    def moment(self, after=None):
+        start = after or self.now - timedelta(days=self.days)
+        return start + (self.now - start) * self.rng.random()
+
+    def sentence(self, words=8):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(self.around(words))).capitalize()
+
+    def next_id(self, model):
+        return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def bulk_insert(self, model, rows):
+        """executemany INSERT in batch_size chunks, one commit per chunk; accepts any iterable"""
+        batch, total = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                db.session.execute(insert(model), batch)
+                db.session.commit()
+                total += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(model), batch)
+            db.session.commit()
+            total += len(batch)
+        self.inserted[model.__tablename__] = self.inserted.get(model.__tablename__, 0) + total
+        return total
+
+    def flush(self, buffers):
+        """Insert buffered rows parents-first and empty the buffers (a list of (model, rows))"""
+        for model, rows in buffers:
+            if rows:
+                self.bulk_insert(model, rows)
+                rows.clear()
+
+    def users(self):
+        # One bcrypt hash shared by every seeded account: hashing per row would dominate the run
+        password_hash = bcrypt.generate_password_hash(SEED_PASSWORD).decode('utf-8')
+        first_id = self.next_id(User)
+        tag = self.rng.getrandbits(32)
+        self.user_rows = []
+        for i in range(self.counts['users']):
+            uid = first_id + i
+            self.user_rows.append({
+                'id': uid,
+                'email': f'seed{tag:08x}.{uid}@example.edu',
+                'password_hash': password_hash,
+                'auth_provider': 'email',
+                'onboarding_completed': True,
+                'role': 'student',
+                'full_name': f'Seed User {uid}',
+                'university': 'Seed University',
+                'program': self.rng.choice(PROGRAMS),
+                'academic_year': str(self.rng.randint(1, 4)),
+                'created_at': self.moment(),
+            })
+        self.bulk_insert(User, self.user_rows)
+        self.user_ids = [row['id'] for row in self.user_rows]
+
+    def topics(self):
+        first_id = self.next_id(ProjectTopic)
+        rows = []
+        for i in range(self.counts['topics']):
+            created = self.moment()
+            rows.append({
+                'id': first_id + i,
+                'title': self.sentence(6),
+                'description': self.sentence(40),
+                'difficulty': self.rng.choice(DIFFICULTIES),
+                'duration': self.rng.choice(DURATIONS),
+                'program_area': self.rng.choice(PROGRAMS),
+                'tags': self.rng.sample(WORDS, 3),
+                'source_type': 'generated',
+                'ai_provider': 'gemini',
+                'created_at': created,
+                'updated_at': created,
+            })
+        self.bulk_insert(ProjectTopic, rows)
+        self.topic_ids = [row['id'] for row in rows]
+
+    def projects(self):
+        rng = self.rng
+        self.bulk_insert(GeneratedProject, (
+            {
+                'user_id': uid,
+                'project_topic_id': rng.choice(self.topic_ids),
+                'ai_provider': 'gemini',
+                'created_at': self.moment(),
+            }
+            for uid in self.user_ids
+            for _ in range(self.around(self.counts['generated_per_user']))
+        ))
+
+        saved_rows, phase_rows, task_rows = [], [], []
+        buffers = [(SavedProject, saved_rows), (ProjectPhase, phase_rows), (PhaseTask, task_rows)]
+        saved_id, phase_id = self.next_id(SavedProject), self.next_id(ProjectPhase)
+        for uid in self.user_ids:
+            # Bound memory on large runs: write whole users' trees once a batch has built up
+            if len(task_rows) >= self.batch_size:
+                self.flush(buffers)
+            # A user saves a topic at most once (unique_user_project)
+            topics = rng.sample(self.topic_ids, min(self.around(self.counts['saved_per_user']), len(self.topic_ids)))
+            for topic_id in topics:
+                saved_at = self.moment()
+                saved_rows.append({
+                    'id': saved_id,
+                    'user_id': uid,
+                    'project_topic_id': topic_id,
+                    'saved_at': saved_at,
+                    'is_favorite': rng.random() < 0.3,
+                    'status': 'in_progress',
+                    'progress_tracking_enabled': True,
+                    'start_date': saved_at,
+                })
+                for phase_order in range(1, self.counts['phases_per_project'] + 1):
+                    phase_rows.append({
+                        'id': phase_id,
+                        'saved_project_id': saved_id,
+                        'phase_name': PHASES[(phase_order - 1) % len(PHASES)],
+                        'phase_order': phase_order,
+                        'description': self.sentence(12),
+                        'estimated_duration_weeks': rng.randint(1, 6),
+                        'created_at': saved_at,
+                        'updated_at': saved_at,
+                    })
+                    for task_order in range(self.around(self.counts['tasks_per_phase'])):
+                        done = rng.random() < 0.4
+                        task_rows.append({
+                            'phase_id': phase_id,
+                            'task_name': self.sentence(5),
+                            'task_order': task_order,
+                            'is_completed': done,
+                            'completed_at': self.moment(saved_at) if done else None,
+                            'created_at': saved_at,
+                            'updated_at': saved_at,
+                        })
+                    phase_id += 1
+                saved_id += 1
+        self.flush(buffers)
+
+        self.bulk_insert(UserActivity, (
+            {
+                'user_id': uid,
+                'activity_type': rng.choice(USER_ACTIVITY_TYPES),
+                'project_topic_id': rng.choice(self.topic_ids),
+                'created_at': self.moment(),
+            }
+            for uid in self.user_ids
+            for _ in range(self.around(self.counts['user_activities_per_user']))
+        ))
+
+    def workspaces(self):
+        rng = self.rng
+        weight = current_app.config['DISCOVERY_MEMBER_WEIGHT_HOURS']
+        epoch = datetime(1970, 1, 1)
+        names = {row['id']: row['full_name'] for row in self.user_rows}
+
+        workspace_rows, member_rows, cursor_rows = [], [], []
+        message_rows, file_rows, activity_rows = [], [], []
+        buffers = [
+            (Workspace, workspace_rows), (WorkspaceMember, member_rows), (WorkspaceReadCursor, cursor_rows),
+            (WorkspaceMessage, message_rows), (WorkspaceFile, file_rows), (WorkspaceActivity, activity_rows)
+        ]
+        workspace_id = self.next_id(Workspace)
+        message_id = self.next_id(WorkspaceMessage)
+        self.activity_id = self.next_id(WorkspaceActivity)
+        for _ in range(self.counts['workspaces']):
+            if len(message_rows) + len(activity_rows) >= self.batch_size:
+                self.flush_workspaces(buffers)
+            created = self.moment()
+            size = min(max(self.around(self.counts['members_per_workspace']), 1), len(self.user_ids))
+            members = rng.sample(self.user_ids, size)
+            owner = members[0]
+
+            for uid in members:
+                member_rows.append({
+                    'workspace_id': workspace_id,
+                    'user_id': uid,
+                    'role': 'owner' if uid == owner else 'member',
+                    'can_edit': True,
+                    'can_invite': uid == owner,
+                    'joined_at': created,
+                    'last_active': self.moment(created),
+                })
+
+            messages = sorted(self.moment(created) for _ in range(self.around(self.counts['messages_per_workspace'])))
+            for sent_at in messages:
+                message_rows.append({
+                    'id': message_id,
+                    'workspace_id': workspace_id,
+                    'user_id': rng.choice(members),
+                    'message': self.sentence(12),
+                    'message_type': 'text',
+                    'created_at': sent_at,
+                })
+                message_id += 1
+
+            for _ in range(self.around(self.counts['files_per_workspace'])):
+                extension, mime = rng.choice(FILE_TYPES)
+                name = f'{rng.choice(WORDS)}_{rng.getrandbits(24):06x}.{extension}'
+                stored = f'{workspace_id}_{name}'
+                uploaded = self.moment(created)
+                file_rows.append({
+                    'workspace_id': workspace_id,
+                    'uploaded_by': rng.choice(members),
+                    'filename': stored,
+                    'original_filename': name,
+                    'file_size': rng.randint(10 * 1024, 5 * 1024 * 1024),
+                    'file_type': mime,
+                    'file_path': os.path.join(UPLOAD_FOLDER, f'workspace_{workspace_id}', stored),
+                    'created_at': uploaded,
+                    'updated_at': uploaded,
+                })
+
+            activity_rows.append({
+                'workspace_id': workspace_id,
+                'user_id': owner,
+                'activity_type': 'workspace_created',
+                'description': f'{names[owner]} created the workspace',
+                'created_at': created,
+            })
+            for _ in range(self.around(self.counts['activities_per_workspace'])):
+                uid = rng.choice(members)
+                activity_rows.append({
+                    'workspace_id': workspace_id,
+                    'user_id': uid,
+                    'activity_type': rng.choice(['member_joined', 'file_uploaded', 'file_deleted']),
+                    'description': f'{names[uid]} {self.sentence(4).lower()}',
+                    'created_at': self.moment(created),
+                })
+
+            # Everyone starts fully read, so unread counters only reflect traffic after seeding
+            for uid in members:
+                cursor_rows.append({
+                    'user_id': uid,
+                    'workspace_id': workspace_id,
+                    'last_read_message_id': message_id - 1 if messages else 0,
+                    'last_read_activity_id': 0,
+                    'updated_at': self.now,
+                })
+
+            last_activity = max(messages[-1] if messages else created, created)
+            workspace_rows.append({
+                'id': workspace_id,
+                'name': f'{self.sentence(3)} group',
+                'description': self.sentence(15),
+                'owner_id': owner,
+                'is_public': rng.random() < 0.5,
+                'max_members': max(10, size),
+                'program_area': rng.choice(PROGRAMS),
+                'member_count': size,
+                'last_activity_at': last_activity,
+                'discovery_score': (last_activity - epoch).total_seconds() / 3600 + size * weight,
+                'created_at': created,
+                'updated_at': last_activity,
+            })
+            workspace_id += 1
+        self.flush_workspaces(buffers)
+
+    def flush_workspaces(self, buffers):
+        cursor_rows, file_rows, activity_rows = buffers[2][1], buffers[4][1], buffers[5][1]
+        # Number activities in time order like real traffic, then mark them read in the cursors
+        activity_rows.sort(key=lambda row: row['created_at'])
+        last_activity_ids = {}
+        for row in activity_rows:
+            row['id'] = last_activity_ids[row['workspace_id']] = self.activity_id
+            self.activity_id += 1
+        for row in cursor_rows:
+            row['last_read_activity_id'] = last_activity_ids[row['workspace_id']]
+        if self.blobs:
+            for row in file_rows:
+                os.makedirs(os.path.dirname(row['file_path']), exist_ok=True)
+                # Sparse: the reported size without the disk usage
+                with open(row['file_path'], 'wb') as f:
+                    f.truncate(row['file_size'])
+        self.flush(buffers)
+
+    def sync_sequences(self):
+        """Explicit ids bypass Postgres sequences; move them past the seeded rows"""
+        if db.engine.dialect.name != 'postgresql':
+            return
+        for model in (User, ProjectTopic, SavedProject, ProjectPhase, Workspace, WorkspaceMessage, WorkspaceActivity):
+            table = model.__tablename__
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM \"{table}\"))"
+            ))
+        db.session.commit()
+
+
+def seed_database(seed=None, days=180, batch_size=5000, blobs=True, **counts):
+    """Generate a synthetic dataset with bulk inserts; returns rows inserted per table.
+
+    Counts default to SEED_DEFAULTS. Seeded accounts use SEED_PASSWORD.
+    """
+    unknown = set(counts) - set(SEED_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown counts: {', '.join(sorted(unknown))}")
+
+    seeder = _Seeder(dict(SEED_DEFAULTS, **counts), seed, days, batch_size, blobs)
+    seeder.users()
+    seeder.topics()
+    if seeder.user_ids and seeder.topic_ids:
+        seeder.projects()
+    if seeder.user_ids:
+        seeder.workspaces()
+    seeder.sync_sequences()
+    return seeder.inserted
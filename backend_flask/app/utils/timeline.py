@@ -0,0 +1,119 @@
+import base64
+import heapq
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+
+from ..models import WorkspaceMessage, WorkspaceFile, WorkspaceActivity
+from .archive import read_archived_by_time
+
+# Source name -> (model, relationship to eager load, tie-break rank for equal timestamps)
+TIMELINE_SOURCES = {
+    'message': (WorkspaceMessage, WorkspaceMessage.user, 0),
+    'file': (WorkspaceFile, WorkspaceFile.uploader, 1),
+    'activity': (WorkspaceActivity, WorkspaceActivity.user, 2)
+}
+
+# Sources whose old rows are moved into the cold archive (see utils.archive)
+ARCHIVED_TABLES = {
+    'message': 'workspace_message',
+    'activity': 'workspace_activity'
+}
+
+MAX_TIMELINE_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a timeline cursor cannot be decoded"""
+
+
+def encode_cursor(created_at, rank, item_id):
+    raw = json.dumps([created_at.isoformat(), rank, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, rank, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(rank), int(item_id)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def older_than(model, rank, cursor):
+    """Keyset condition: (created_at, rank, id) strictly before the cursor, in descending order"""
+    created_at, cursor_rank, cursor_id = cursor
+    if rank < cursor_rank:
+        return model.created_at <= created_at
+    if rank > cursor_rank:
+        return model.created_at < created_at
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < cursor_id)
+    )
+
+
+def _source_rows(name, workspace_id, limit, cursor):
+    """Newest-first rows of one source; a range scan on its (workspace_id, created_at) index"""
+    model, relationship, rank = TIMELINE_SOURCES[name]
+    query = model.query.options(joinedload(relationship)).filter(model.workspace_id == workspace_id)
+    if cursor is not None:
+        query = query.filter(older_than(model, rank, cursor))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit).all()
+    return [((row.created_at, rank, row.id), name, row.to_dict()) for row in rows]
+
+
+def _archived_rows(name, workspace_id, limit, cursor):
+    """Newest-first archived rows of one source, strictly before `cursor`"""
+    rank = TIMELINE_SOURCES[name][2]
+    before = None
+    if cursor is not None:
+        # Same ordering as older_than(), on (created_at, rank, id) tuples
+        before = lambda created_at, row_id: (created_at, rank, row_id) < cursor
+    return [
+        ((created_at, rank, row['id']), name, row)
+        for created_at, row in read_archived_by_time(ARCHIVED_TABLES[name], workspace_id, limit, before)
+    ]
+
+
+def _source_stream(name, workspace_id, limit, cursor):
+    """Hot rows, continued into the archive when they run out.
+
+    Archiving moves every row older than a cutoff, so archived rows are all
+    older than the hot ones and the stream stays in order.
+    """
+    rows = _source_rows(name, workspace_id, limit, cursor)
+    if len(rows) < limit and name in ARCHIVED_TABLES:
+        rows += _archived_rows(name, workspace_id, limit - len(rows), rows[-1][0] if rows else cursor)
+    return rows
+
+
+def get_timeline(workspace_id, limit=50, cursor=None, sources=None):
+    """Merge messages, files and activities into one newest-first page.
+
+    Each source contributes at most `limit` rows from its own index (messages
+    and activities continue into the archive); a k-way merge picks the page
+    and the last item becomes the next cursor. Archived items carry
+    `archived: true` in their data.
+    """
+    limit = max(1, min(limit, MAX_TIMELINE_LIMIT))
+    position = decode_cursor(cursor) if cursor else None
+
+    streams = [
+        _source_stream(name, workspace_id, limit + 1, position)
+        for name in (sources or TIMELINE_SOURCES)
+    ]
+    merged = list(heapq.merge(*streams, key=lambda item: item[0], reverse=True))
+
+    page = merged[:limit]
+    has_more = len(merged) > limit
+    return {
+        'items': [
+            {'type': name, 'created_at': key[0].isoformat(), 'data': data}
+            for key, name, data in page
+        ],
+        'has_more': has_more,
+        'next_cursor': encode_cursor(*page[-1][0]) if has_more else None
+    }
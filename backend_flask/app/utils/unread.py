@@ -0,0 +1,112 @@
+from collections import Counter
+
+from sqlalchemy import and_, bindparam, func, or_, select, update
+
+from ..extensions import db
+from ..models import WorkspaceActivity, WorkspaceMessage, WorkspaceReadCursor
+
+
+def _latest_id(model, workspace_id):
+    return db.session.execute(
+        select(func.coalesce(func.max(model.id), 0)).where(model.workspace_id == workspace_id)
+    ).scalar()
+
+
+def open_read_cursor(workspace_id, user_id):
+    """Start a new member's cursor at the current end of the workspace (caller commits)"""
+    cursor = WorkspaceReadCursor(
+        workspace_id=workspace_id,
+        user_id=user_id,
+        last_read_message_id=_latest_id(WorkspaceMessage, workspace_id),
+        last_read_activity_id=_latest_id(WorkspaceActivity, workspace_id)
+    )
+    db.session.add(cursor)
+    return cursor
+
+
+def close_read_cursor(workspace_id, user_id):
+    """Drop a former member's cursor (caller commits)"""
+    WorkspaceReadCursor.query.filter_by(workspace_id=workspace_id, user_id=user_id).delete()
+
+
+def count_new_messages(rows):
+    """Bump unread_messages for everyone but the sender, one executemany UPDATE per batch.
+
+    Runs inside the inserting transaction so counters and messages commit together.
+    """
+    per_sender = Counter((row['workspace_id'], row['user_id']) for row in rows)
+    if not per_sender:
+        return
+
+    table = WorkspaceReadCursor.__table__
+    db.session.execute(
+        update(table).where(and_(
+            table.c.workspace_id == bindparam('w_id'),
+            table.c.user_id != bindparam('u_id')
+        )).values(unread_messages=table.c.unread_messages + bindparam('n')),
+        [{'w_id': w_id, 'u_id': u_id, 'n': n} for (w_id, u_id), n in per_sender.items()]
+    )
+
+
+def count_new_activity(workspace_id, user_id):
+    """Bump unread_activities for everyone except the actor (system events count for all)"""
+    condition = WorkspaceReadCursor.workspace_id == workspace_id
+    if user_id is not None:
+        condition = and_(condition, WorkspaceReadCursor.user_id != user_id)
+
+    db.session.execute(
+        update(WorkspaceReadCursor).where(condition).values(
+            unread_activities=WorkspaceReadCursor.unread_activities + 1
+        ),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def unread_counts(user_id):
+    """Unread counters for all of a user's workspaces in one indexed query"""
+    cursors = WorkspaceReadCursor.query.filter_by(user_id=user_id).all()
+    return [cursor.to_dict() for cursor in cursors]
+
+
+def _read_up_to(model, workspace_id, requested):
+    """The requested id, never past the workspace's newest row (so future items stay unread)"""
+    latest = _latest_id(model, workspace_id)
+    return latest if requested is None else min(requested, latest)
+
+
+def mark_read(workspace_id, user_id, message_id=None, activity_id=None):
+    """Move the user's cursor forward (to the latest items by default) and recount what is left.
+
+    Ids must be non-negative ints (None for latest); callers validate client input.
+    """
+    cursor = WorkspaceReadCursor.query.filter_by(workspace_id=workspace_id, user_id=user_id).first()
+    if cursor is None:
+        cursor = open_read_cursor(workspace_id, user_id)
+
+    cursor.last_read_message_id = max(
+        cursor.last_read_message_id or 0,
+        _read_up_to(WorkspaceMessage, workspace_id, message_id)
+    )
+    cursor.last_read_activity_id = max(
+        cursor.last_read_activity_id or 0,
+        _read_up_to(WorkspaceActivity, workspace_id, activity_id)
+    )
+
+    # Recount rather than zero so reading up to an older id stays accurate
+    cursor.unread_messages = db.session.execute(
+        select(func.count()).select_from(WorkspaceMessage).where(
+            WorkspaceMessage.workspace_id == workspace_id,
+            WorkspaceMessage.id > cursor.last_read_message_id,
+            WorkspaceMessage.user_id != user_id
+        )
+    ).scalar()
+    cursor.unread_activities = db.session.execute(
+        select(func.count()).select_from(WorkspaceActivity).where(
+            WorkspaceActivity.workspace_id == workspace_id,
+            WorkspaceActivity.id > cursor.last_read_activity_id,
+            or_(WorkspaceActivity.user_id != user_id, WorkspaceActivity.user_id.is_(None))
+        )
+    ).scalar()
+
+    db.session.commit()
+    return cursor.to_dict()
@@ -0,0 +1,154 @@
+import csv
+import io
+
+from flask import current_app
+from sqlalchemy import insert, update, select
+
+from ..extensions import db
+from ..models import User
+from .cache import invalidate_profile
+from .passwords import hash_passwords
+
+VALID_ROLES = ('student', 'admin')
+PROFILE_FIELDS = ('full_name', 'university', 'program', 'academic_year')
+MIN_PASSWORD_LENGTH = 6
+
+
+class UserImportError(Exception):
+    """Raised when an import file cannot be read at all"""
+
+
+def parse_user_csv(stream):
+    """Read a CSV of users (header row required, `email` column mandatory) into dicts"""
+    if isinstance(stream, bytes):
+        stream = stream.decode('utf-8-sig')
+    if isinstance(stream, str):
+        stream = io.StringIO(stream)
+
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or 'email' not in [name.strip().lower() for name in reader.fieldnames]:
+        raise UserImportError("CSV must have a header row with an 'email' column")
+
+    rows = []
+    for row in reader:
+        rows.append({
+            (key or '').strip().lower(): (value or '').strip()
+            for key, value in row.items()
+        })
+        if len(rows) > current_app.config['USER_IMPORT_MAX_ROWS']:
+            raise UserImportError(f"At most {current_app.config['USER_IMPORT_MAX_ROWS']} rows per import")
+    return rows
+
+
+def import_users(rows, default_role='student', update_existing=False, dry_run=False, acting_user_id=None):
+    """Validate and import user rows in a single transaction.
+
+    New users are inserted with one multi-row INSERT, existing users (when
+    `update_existing` is set) with one executemany UPDATE, and passwords are
+    hashed in the shared process pool. `default_role` applies to new users
+    only; existing users change role only when their row names one, and never
+    `acting_user_id` (the importing admin). Nothing is written if any row fails
+    validation or `dry_run` is set; the returned report is the same either way.
+    """
+    report = {'created': [], 'updated': [], 'skipped': [], 'errors': [], 'dry_run': dry_run}
+
+    emails = [(row.get('email') or '').lower() for row in rows]
+    existing = {
+        user.email: user
+        for user in db.session.execute(
+            select(User.id, User.email, User.role).where(User.email.in_(set(emails)))
+        )
+    } if emails else {}
+
+    new_rows, update_rows, seen = [], [], set()
+    for line, (row, email) in enumerate(zip(rows, emails), 2):  # line 1 is the header
+        explicit_role = row.get('role')
+        role = explicit_role or default_role
+        password = row.get('password') or ''
+
+        if not email or '@' not in email:
+            report['errors'].append({'line': line, 'email': email, 'message': 'invalid email'})
+            continue
+        if email in seen:
+            report['errors'].append({'line': line, 'email': email, 'message': 'duplicate email in file'})
+            continue
+        seen.add(email)
+        if role not in VALID_ROLES:
+            report['errors'].append({'line': line, 'email': email, 'message': f"invalid role '{role}'"})
+            continue
+        if password and len(password) < MIN_PASSWORD_LENGTH:
+            report['errors'].append({'line': line, 'email': email, 'message': 'password must be at least 6 characters'})
+            continue
+
+        profile = {field: row[field] for field in PROFILE_FIELDS if row.get(field)}
+
+        if email in existing:
+            user = existing[email]
+            if not update_existing:
+                report['skipped'].append(email)
+                continue
+            if explicit_role and user.id == acting_user_id and explicit_role != user.role:
+                report['errors'].append({'line': line, 'email': email, 'message': 'cannot change your own role'})
+                continue
+            changes = dict(profile, role=explicit_role) if explicit_role else profile
+            if changes:
+                update_rows.append(dict(changes, id=user.id))
+            report['updated'].append(email)
+        else:
+            new_rows.append(dict(profile, email=email, role=role, auth_provider='email', password=password))
+            report['created'].append(email)
+
+    if dry_run or report['errors']:
+        return report
+
+    to_hash = [row for row in new_rows if row['password']]
+    for row, password_hash in zip(to_hash, hash_passwords([row['password'] for row in to_hash])):
+        row['password_hash'] = password_hash
+    for row in new_rows:
+        del row['password']
+
+    try:
+        if new_rows:
+            db.session.execute(insert(User), new_rows)
+        if update_rows:
+            db.session.execute(update(User), update_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate_profile(*(row['id'] for row in update_rows))
+
+    return report
+
+
+def set_roles(role, user_ids=(), emails=(), exclude_user_id=None, dry_run=False):
+    """Assign one role to many users with a single UPDATE ... WHERE id IN (...); deleted accounts count as not found"""
+    matched = db.session.execute(
+        select(User.id, User.email, User.role).where(
+            User.id.in_(list(user_ids)) | User.email.in_([email.lower() for email in emails]),
+            User.deleted_at.is_(None)
+        )
+    ).all()
+
+    found_ids = {row.id for row in matched}
+    found_emails = {row.email for row in matched}
+    report = {
+        'role': role,
+        'updated': [row.id for row in matched if row.role != role and row.id != exclude_user_id],
+        'unchanged': [row.id for row in matched if row.role == role],
+        'skipped_self': [row.id for row in matched if row.id == exclude_user_id and row.role != role],
+        'not_found': [user_id for user_id in user_ids if user_id not in found_ids]
+                     + [email for email in emails if email.lower() not in found_emails],
+        'dry_run': dry_run
+    }
+
+    if report['updated'] and not dry_run:
+        db.session.execute(
+            update(User).where(User.id.in_(report['updated'])).values(role=role),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        invalidate_profile(*report['updated'])
+
+    return report
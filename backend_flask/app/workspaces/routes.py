@@ -1,11 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from sqlalchemy import or_
 import secrets
 from ..extensions import db
-from ..models import User, Workspace, WorkspaceMember, WorkspaceInvite, SavedProject
+from ..models import User, Workspace, WorkspaceMember, WorkspaceInvite, SavedProject, ProjectTopic
 from ..utils.activity import log_activity
+from ..sockets import revoke_workspace_access
+from ..utils.presence import presence
+from ..utils.reaper import tombstone_workspace, reaper
+from ..utils.cache import invalidate_feed
+from ..utils.feed import get_feed
+from ..utils.discovery import InvalidDiscoveryCursor, discover_workspaces as discover_public_workspaces, record_member_change
+from ..utils.timeline import TIMELINE_SOURCES, InvalidCursor, get_timeline
+from ..utils.invites import INVITE_ROLES, parse_email_list, create_invites, pending_invites_for
+from ..utils.unread import open_read_cursor, close_read_cursor, unread_counts, mark_read
 
 workspaces_bp = Blueprint("workspaces", __name__)
 
@@ -17,12 +26,15 @@ def get_workspaces():
     user_id = int(get_jwt_identity())
     
     # Get workspaces where user is owner
-    owned_workspaces = Workspace.query.filter_by(owner_id=user_id).all()
+    owned_workspaces = Workspace.query.filter_by(owner_id=user_id, deleted_at=None).all()
     
     # Get workspaces where user is a member
     memberships = WorkspaceMember.query.filter_by(user_id=user_id).all()
     member_workspace_ids = [m.workspace_id for m in memberships]
-    member_workspaces = Workspace.query.filter(Workspace.id.in_(member_workspace_ids)).all() if member_workspace_ids else []
+    member_workspaces = Workspace.query.filter(
+        Workspace.id.in_(member_workspace_ids),
+        Workspace.deleted_at.is_(None)
+    ).all() if member_workspace_ids else []
     
     # Combine and deduplicate
     all_workspaces = {w.id: w for w in owned_workspaces + member_workspaces}.values()
@@ -57,6 +69,8 @@ def create_workspace():
     if not name:
         return jsonify({"error": "Workspace name is required"}), 400
     
+    program_area = data.get("program_area")
+    
     # Validate saved_project if provided
     if saved_project_id:
         project = SavedProject.query.get(saved_project_id)
@@ -64,6 +78,11 @@ def create_workspace():
             return jsonify({"error": "Project not found"}), 404
         if project.user_id != user_id:
             return jsonify({"error": "You don't have access to this project"}), 403
+        
+        # Discovery filters on the linked topic's program area by default
+        if not program_area:
+            topic = ProjectTopic.query.get(project.project_topic_id)
+            program_area = topic.program_area if topic else None
     
     # Create workspace
     workspace = Workspace(
@@ -72,7 +91,8 @@ def create_workspace():
         owner_id=user_id,
         saved_project_id=saved_project_id,
         is_public=is_public,
-        max_members=max_members
+        max_members=max_members,
+        program_area=program_area
     )
     
     db.session.add(workspace)
@@ -88,6 +108,8 @@ def create_workspace():
     )
     
     db.session.add(owner_member)
+    open_read_cursor(workspace.id, user_id)
+    record_member_change(workspace.id, 1)
     db.session.commit()
     
     # Log activity
@@ -109,7 +131,7 @@ def get_workspace(workspace_id):
     """Get a specific workspace"""
     user_id = int(get_jwt_identity())
     
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     
     # Check if user has access
     is_member = WorkspaceMember.query.filter_by(
@@ -126,13 +148,125 @@ def get_workspace(workspace_id):
     return jsonify(data)
 
 
+@workspaces_bp.get("/unread")
+@jwt_required()
+def get_unread_counts():
+    """Get unread message/activity counts for all of the user's workspaces"""
+    user_id = int(get_jwt_identity())
+    
+    return jsonify({"unread": unread_counts(user_id)})
+
+
+@workspaces_bp.get("/feed")
+@jwt_required()
+def get_my_feed():
+    """Get the latest activity across all of the user's workspaces"""
+    user_id = int(get_jwt_identity())
+    
+    try:
+        feed = get_feed(
+            user_id,
+            limit=request.args.get('limit', 30, type=int),
+            cursor=request.args.get('cursor')
+        )
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(feed)
+
+
+@workspaces_bp.post("/<int:workspace_id>/read")
+@jwt_required()
+def mark_workspace_read(workspace_id):
+    """Advance the user's read cursor (to the latest message/activity unless ids are given)"""
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    
+    workspace = Workspace.get_active_or_404(workspace_id)
+    
+    is_member = WorkspaceMember.query.filter_by(
+        workspace_id=workspace_id,
+        user_id=user_id
+    ).first()
+    
+    if not is_member and workspace.owner_id != user_id:
+        return jsonify({"error": "Access denied"}), 403
+    
+    for key in ('message_id', 'activity_id'):
+        value = data.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 0):
+            return jsonify({"error": f"{key} must be a non-negative integer"}), 400
+    
+    return jsonify(mark_read(
+        workspace_id,
+        user_id,
+        message_id=data.get('message_id'),
+        activity_id=data.get('activity_id')
+    ))
+
+
+@workspaces_bp.get("/<int:workspace_id>/timeline")
+@jwt_required()
+def get_workspace_timeline(workspace_id):
+    """Get messages, files and activities as one newest-first, cursor-paginated stream"""
+    user_id = int(get_jwt_identity())
+    
+    workspace = Workspace.get_active_or_404(workspace_id)
+    
+    is_member = WorkspaceMember.query.filter_by(
+        workspace_id=workspace_id,
+        user_id=user_id
+    ).first()
+    
+    if not is_member and workspace.owner_id != user_id:
+        return jsonify({"error": "Access denied"}), 403
+    
+    sources = None
+    if request.args.get('types'):
+        sources = [name.strip() for name in request.args['types'].split(',') if name.strip()]
+        unknown = [name for name in sources if name not in TIMELINE_SOURCES]
+        if unknown or not sources:
+            return jsonify({"error": f"types must be a comma-separated subset of: {', '.join(TIMELINE_SOURCES)}"}), 400
+    
+    try:
+        timeline = get_timeline(
+            workspace_id,
+            limit=request.args.get('limit', 50, type=int),
+            cursor=request.args.get('cursor'),
+            sources=sources
+        )
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(timeline)
+
+
+@workspaces_bp.get("/<int:workspace_id>/presence")
+@jwt_required()
+def get_presence(workspace_id):
+    """Get who is currently online (and typing) in a workspace"""
+    user_id = int(get_jwt_identity())
+    
+    workspace = Workspace.get_active_or_404(workspace_id)
+    
+    is_member = WorkspaceMember.query.filter_by(
+        workspace_id=workspace_id,
+        user_id=user_id
+    ).first()
+    
+    if not is_member and workspace.owner_id != user_id:
+        return jsonify({"error": "Access denied"}), 403
+    
+    return jsonify(presence.snapshot(workspace_id))
+
+
 @workspaces_bp.patch("/<int:workspace_id>")
 @jwt_required()
 def update_workspace(workspace_id):
     """Update workspace details"""
     user_id = int(get_jwt_identity())
     
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     
     # Only owner or admins can update
     member = WorkspaceMember.query.filter_by(
@@ -153,6 +287,8 @@ def update_workspace(workspace_id):
         workspace.is_public = data["is_public"]
     if "max_members" in data:
         workspace.max_members = data["max_members"]
+    if "program_area" in data:
+        workspace.program_area = data["program_area"] or None
     
     workspace.updated_at = datetime.utcnow()
     db.session.commit()
@@ -166,13 +302,20 @@ def delete_workspace(workspace_id):
     """Delete a workspace (owner only)"""
     user_id = int(get_jwt_identity())
     
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     
     if workspace.owner_id != user_id:
         return jsonify({"error": "Only the owner can delete this workspace"}), 403
     
-    db.session.delete(workspace)
+    # Tombstone now; messages, files and activity are reaped in the background
+    member_ids = [member.user_id for member in workspace.members]
+    tombstone_workspace(workspace)
     db.session.commit()
+    reaper.wake()
+    invalidate_feed(*member_ids)
+    
+    for member_id in member_ids:
+        revoke_workspace_access(workspace_id, member_id)
     
     return jsonify({"message": "Workspace deleted successfully"})
 
@@ -183,7 +326,7 @@ def invite_to_workspace(workspace_id):
     """Invite someone to join the workspace"""
     user_id = int(get_jwt_identity())
     
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     
     # Check if user can invite
     member = WorkspaceMember.query.filter_by(
@@ -195,7 +338,7 @@ def invite_to_workspace(workspace_id):
         return jsonify({"error": "You don't have permission to invite members"}), 403
     
     data = request.get_json()
-    email = data.get("email")
+    email = (data.get("email") or "").strip().lower()
     role = data.get("role", "member")
     
     if not email:
@@ -223,7 +366,7 @@ def invite_to_workspace(workspace_id):
     
     # Create invite
     invite_token = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(days=7)
+    expires_at = datetime.utcnow() + timedelta(days=current_app.config['INVITE_EXPIRY_DAYS'])
     
     invite = WorkspaceInvite(
         workspace_id=workspace_id,
@@ -242,6 +385,52 @@ def invite_to_workspace(workspace_id):
     return jsonify(invite.to_dict()), 201
 
 
+@workspaces_bp.post("/<int:workspace_id>/invites/bulk")
+@jwt_required()
+def bulk_invite_to_workspace(workspace_id):
+    """Invite a whole list of emails (e.g. a class list) in one request"""
+    user_id = int(get_jwt_identity())
+    
+    workspace = Workspace.get_active_or_404(workspace_id)
+    
+    # Check if user can invite
+    member = WorkspaceMember.query.filter_by(
+        workspace_id=workspace_id,
+        user_id=user_id
+    ).first()
+    
+    if not member or not member.can_invite:
+        return jsonify({"error": "You don't have permission to invite members"}), 403
+    
+    data = request.get_json(silent=True) or {}
+    emails = parse_email_list(data.get("emails"))
+    role = data.get("role", "member")
+    expires_in_days = data.get("expires_in_days")
+    
+    if not emails:
+        return jsonify({"error": "emails is required (a list or a comma/newline separated string)"}), 400
+    if len(emails) > current_app.config['INVITE_BULK_MAX']:
+        return jsonify({"error": f"At most {current_app.config['INVITE_BULK_MAX']} invites per request"}), 400
+    if role not in INVITE_ROLES:
+        return jsonify({"error": f"role must be one of: {', '.join(INVITE_ROLES)}"}), 400
+    if expires_in_days is not None and (not isinstance(expires_in_days, int) or expires_in_days < 1):
+        return jsonify({"error": "expires_in_days must be a positive integer"}), 400
+    
+    report = create_invites(workspace, user_id, emails, role=role, expires_in_days=expires_in_days)
+    
+    return jsonify(report), 201 if report['created'] else 200
+
+
+@workspaces_bp.get("/invites/pending")
+@jwt_required()
+def get_pending_invites():
+    """Get the current user's pending workspace invitations"""
+    user_id = int(get_jwt_identity())
+    user = User.query.get_or_404(user_id)
+    
+    return jsonify({"invites": pending_invites_for(user.email)})
+
+
 @workspaces_bp.post("/invites/<string:invite_token>/accept")
 @jwt_required()
 def accept_invite(invite_token):
@@ -265,7 +454,7 @@ def accept_invite(invite_token):
     
     # Check workspace capacity
     workspace = invite.workspace
-    if len(workspace.members) >= workspace.max_members:
+    if workspace.member_count >= workspace.max_members:
         return jsonify({"error": "Workspace is at full capacity"}), 400
     
     # Add as member
@@ -278,12 +467,15 @@ def accept_invite(invite_token):
     )
     
     db.session.add(member)
+    open_read_cursor(invite.workspace_id, user_id)
+    record_member_change(invite.workspace_id, 1)
     
     # Update invite status
     invite.status = 'accepted'
     invite.responded_at = datetime.utcnow()
     
     db.session.commit()
+    invalidate_feed(user_id)
     
     # Log activity
     log_activity(
@@ -303,8 +495,9 @@ def remove_member(workspace_id, member_id):
     """Remove a member from workspace"""
     user_id = int(get_jwt_identity())
     
-    workspace = Workspace.query.get_or_404(workspace_id)
-    member_to_remove = WorkspaceMember.query.get_or_404(member_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
+    # The member must belong to this workspace; the counters and access below are keyed by it
+    member_to_remove = WorkspaceMember.query.filter_by(id=member_id, workspace_id=workspace_id).first_or_404()
     
     # Check permissions
     if workspace.owner_id != user_id and member_to_remove.user_id != user_id:
@@ -319,7 +512,11 @@ def remove_member(workspace_id, member_id):
     current_user = User.query.get(user_id)
     
     db.session.delete(member_to_remove)
+    close_read_cursor(workspace_id, member_to_remove.user_id)
+    record_member_change(workspace_id, -1)
     db.session.commit()
+    invalidate_feed(member_to_remove.user_id)
+    revoke_workspace_access(workspace_id, member_to_remove.user_id)
     
     # Log activity
     if member_to_remove.user_id == user_id:
@@ -343,18 +540,21 @@ def remove_member(workspace_id, member_id):
 @workspaces_bp.get("/discover")
 @jwt_required()
 def discover_workspaces():
-    """Discover public workspaces"""
+    """Discover public workspaces, ranked by recent activity and size"""
     user_id = int(get_jwt_identity())
     
-    # Get public workspaces that user is not already a member of
-    user_workspace_ids = [m.workspace_id for m in WorkspaceMember.query.filter_by(user_id=user_id).all()]
-    
-    public_workspaces = Workspace.query.filter(
-        Workspace.is_public == True,
-        ~Workspace.id.in_(user_workspace_ids) if user_workspace_ids else True
-    ).all()
-    
-    return jsonify({"workspaces": [w.to_dict(include_members=False) for w in public_workspaces]})
+    try:
+        page = discover_public_workspaces(
+            user_id,
+            limit=request.args.get('limit', 20, type=int),
+            cursor=request.args.get('cursor'),
+            program_area=request.args.get('program_area'),
+            open_seats=request.args.get('open_seats', '').lower() in ('1', 'true', 'yes')
+        )
+    except InvalidDiscoveryCursor as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(page)
 
 
 @workspaces_bp.post("/<int:workspace_id>/join")
@@ -363,7 +563,7 @@ def join_workspace(workspace_id):
     """Join a public workspace"""
     user_id = int(get_jwt_identity())
     
-    workspace = Workspace.query.get_or_404(workspace_id)
+    workspace = Workspace.get_active_or_404(workspace_id)
     
     # Check if workspace is public
     if not workspace.is_public:
@@ -379,7 +579,7 @@ def join_workspace(workspace_id):
         return jsonify({"error": "You are already a member of this workspace"}), 400
     
     # Check workspace capacity
-    if len(workspace.members) >= workspace.max_members:
+    if workspace.member_count >= workspace.max_members:
         return jsonify({"error": "Workspace is at full capacity"}), 400
     
     # Add as member
@@ -392,7 +592,10 @@ def join_workspace(workspace_id):
     )
     
     db.session.add(member)
+    open_read_cursor(workspace_id, user_id)
+    record_member_change(workspace_id, 1)
     db.session.commit()
+    invalidate_feed(user_id)
     
     # Log activity
     user = User.query.get(user_id)
@@ -0,0 +1,36 @@
+"""
+Script to move old workspace chat and activity rows into the cold archive
+(run from cron, e.g. nightly)
+Usage: python archive_history.py [--days N]
+       python archive_history.py --reindex   (rebuild archived chat search from the segments)
+"""
+
+import sys
+from app import create_app
+from app.utils.archive import reindex_archived_messages, run_archive
+
+def archive(days=None):
+    app = create_app()
+    with app.app_context():
+        result = run_archive(days)
+        print(f"Archiving rows created before {result['cutoff']}")
+        for table in result['tables']:
+            print(f"[✓] {table['table']}: {table['rows_archived']} rows in {table['segments_written']} segments")
+
+def reindex():
+    app = create_app()
+    with app.app_context():
+        print(f"[✓] Indexed {reindex_archived_messages()} archived messages for search")
+
+if __name__ == '__main__':
+    days = None
+    if sys.argv[1:] == ['--reindex']:
+        reindex()
+        sys.exit(0)
+    if len(sys.argv) == 3 and sys.argv[1] == '--days':
+        days = int(sys.argv[2])
+    elif len(sys.argv) != 1:
+        print("Usage: python archive_history.py [--days N] | --reindex")
+        sys.exit(1)
+    
+    archive(days)
@@ -0,0 +1,343 @@
+"""
+Replay scenario mixes against the app with concurrent virtual users
+Usage: python benchmarks/http_scenarios.py [--profile student] [--users 20] [--seconds 30]
+                                           [--database URL] [--output results.json] [--compare old.json]
+
+Boots the app from create_app(). Without --database, it seeds a fresh temporary
+SQLite file (see app/utils/seed.py). Pass a database already filled by seed_data.py
+to benchmark at volume. Each virtual user logs in, then loops over scenarios picked
+by the profile's weights. The report gives p50/p95/p99 latency and throughput per
+endpoint. --output saves it as JSON, and --compare prints the change against an
+earlier run.
+
+AI generation happens in the browser, so the backend never calls a provider. The
+"generate" scenario posts canned topics to /api/projects/track-generation, and
+provider keys are blanked so no request can leave the machine.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Scenario weights per profile
+PROFILES = {
+    'student': {'dashboard': 40, 'task_toggle': 25, 'chat_polling': 25, 'files': 5, 'generate': 5},
+    'login_burst': {'login': 100},
+    'chat': {'chat_polling': 90, 'dashboard': 10},
+    'admin': {'admin_stats': 70, 'dashboard': 30},
+    'mixed': {'login': 5, 'dashboard': 30, 'task_toggle': 20, 'chat_polling': 25, 'files': 10,
+              'admin_stats': 5, 'generate': 5},
+}
+
+ADMIN_EMAIL = 'bench-admin@example.com'
+SMALL_DATASET = {'users': 200, 'topics': 100, 'workspaces': 40, 'messages_per_workspace': 200}
+CANNED_TOPICS = [
+    {'title': f'Benchmark topic {i}', 'description': 'Stubbed AI provider output', 'difficulty': 'Intermediate',
+     'duration': '6-8 months', 'objectives': ['Measure', 'Compare'], 'tags': ['benchmark']}
+    for i in range(3)
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Latency samples per endpoint label, shared by every virtual user"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, label, seconds, ok):
+        with self._lock:
+            self.samples.setdefault(label, []).append(seconds * 1000)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for label, values in sorted(self.samples.items()):
+            values = sorted(values)
+            endpoints[label] = {
+                'requests': len(values),
+                'errors': self.errors.get(label, 0),
+                'rps': round(len(values) / elapsed, 2),
+                'mean_ms': round(sum(values) / len(values), 2),
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'max_ms': round(values[-1], 2),
+            }
+        total = sum(e['requests'] for e in endpoints.values())
+        everything = sorted(v for values in self.samples.values() for v in values)
+        return {
+            'requests': total,
+            'errors': sum(self.errors.values()),
+            'rps': round(total / elapsed, 2),
+            'p50_ms': round(percentile(everything, 50), 2),
+            'p95_ms': round(percentile(everything, 95), 2),
+            'p99_ms': round(percentile(everything, 99), 2),
+        }, endpoints
+
+
+class VirtualUser:
+    """One simulated student (or the admin) with its own test client and token"""
+
+    def __init__(self, app, recorder, account, rng):
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.account = account
+        self.rng = rng
+        self.headers = {}
+        self.last_message_id = {}
+
+    def call(self, method, label, url, **kwargs):
+        started = time.perf_counter()
+        response = self.client.open(url, method=method, headers=self.headers, **kwargs)
+        self.recorder.add(f'{method} {label}', time.perf_counter() - started, response.status_code < 400)
+        return response
+
+    def login(self):
+        response = self.call('POST', '/api/auth/login', '/api/auth/login',
+                             json={'email': self.account['email'], 'password': self.account['password']})
+        if response.status_code == 200:
+            self.headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        return response.status_code == 200
+
+    def dashboard(self):
+        self.call('GET', '/api/auth/me', '/api/auth/me')
+        self.call('GET', '/api/workspaces/', '/api/workspaces/')
+        self.call('GET', '/api/favourites/', '/api/favourites/')
+        self.call('GET', '/api/workspaces/unread', '/api/workspaces/unread')
+        self.call('GET', '/api/workspaces/feed', '/api/workspaces/feed')
+
+    def task_toggle(self):
+        if not self.account['tasks']:
+            return self.dashboard()
+        saved_project_id, task_id = self.rng.choice(self.account['tasks'])
+        self.call('GET', '/api/progress/<id>', f'/api/progress/{saved_project_id}')
+        self.call('PUT', '/api/progress/task/<id>/toggle', f'/api/progress/task/{task_id}/toggle')
+
+    def chat_polling(self):
+        if not self.account['workspaces']:
+            return self.dashboard()
+        workspace_id = self.rng.choice(self.account['workspaces'])
+        after = self.last_message_id.get(workspace_id)
+        url = f'/api/chat/{workspace_id}/messages' + (f'?after={after}' if after else '')
+        response = self.call('GET', '/api/chat/<id>/messages', url)
+        messages = (response.get_json() or {}).get('messages') or []
+        if messages:
+            self.last_message_id[workspace_id] = max(m['id'] for m in messages)
+        if self.rng.random() < 0.2:
+            self.call('POST', '/api/chat/<id>/messages', f'/api/chat/{workspace_id}/messages',
+                      json={'message': f'benchmark message {self.rng.getrandbits(32):08x}'})
+
+    def files(self):
+        if not self.account['workspaces']:
+            return self.dashboard()
+        workspace_id = self.rng.choice(self.account['workspaces'])
+        self.call('GET', '/api/files/<id>/files', f'/api/files/{workspace_id}/files')
+        payload = os.urandom(self.rng.randint(4 * 1024, 256 * 1024))
+        response = self.call('POST', '/api/files/<id>/files', f'/api/files/{workspace_id}/files',
+                             data={'file': (io.BytesIO(payload), 'benchmark.txt'), 'description': 'benchmark'},
+                             content_type='multipart/form-data')
+        if response.status_code == 201:
+            file_id = response.get_json()['id']
+            self.call('GET', '/api/files/<id>/files/<id>/download',
+                      f'/api/files/{workspace_id}/files/{file_id}/download')
+            # Remove it again so repeated runs do not grow the upload folder
+            self.call('DELETE', '/api/files/<id>/files/<id>', f'/api/files/{workspace_id}/files/{file_id}')
+
+    def admin_stats(self):
+        if not self.account.get('is_admin'):
+            return self.dashboard()
+        self.call('GET', '/api/admin/stats/overview', '/api/admin/stats/overview')
+        self.call('GET', '/api/admin/stats/usage', '/api/admin/stats/usage')
+
+    def generate(self):
+        self.call('POST', '/api/projects/track-generation', '/api/projects/track-generation', json={
+            'project_topics': CANNED_TOPICS,
+            'form_data': {'program': 'computer-science'},
+            'ai_provider': 'stub',
+            'session_id': f'bench-{self.rng.getrandbits(32):08x}'
+        })
+
+    def run(self, weights, deadline, think_ms):
+        scenarios, cumulative = list(weights), list(weights.values())
+        if not self.login():
+            return
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(scenarios, weights=cumulative)[0]
+            if scenario == 'login':
+                self.login()
+            else:
+                getattr(self, scenario)()
+            if think_ms:
+                time.sleep(self.rng.uniform(0, think_ms) / 1000)
+
+
+def prepare_database(app, seeded):
+    """Seed when requested and return benchmark accounts (students plus one admin)"""
+    from sqlalchemy import select
+    from app.extensions import db
+    from app.models import User, SavedProject, ProjectPhase, PhaseTask, WorkspaceMember
+    from app.utils.seed import SEED_PASSWORD, seed_database
+
+    with app.app_context():
+        if seeded:
+            db.create_all()
+            seed_database(seed=1, blobs=False, **SMALL_DATASET)
+
+        admin = User.query.filter_by(email=ADMIN_EMAIL).first()
+        if not admin:
+            admin = User(email=ADMIN_EMAIL, full_name='Benchmark Admin', role='admin', auth_provider='email')
+            admin.set_password(SEED_PASSWORD)
+            db.session.add(admin)
+            db.session.commit()
+
+        # Seeded students that are in at least one workspace
+        student_ids = db.session.execute(
+            select(WorkspaceMember.user_id).join(User, User.id == WorkspaceMember.user_id)
+            .where(User.email.like('seed%'), User.deleted_at.is_(None))
+            .group_by(WorkspaceMember.user_id).order_by(WorkspaceMember.user_id).limit(500)
+        ).scalars().all()
+        if not student_ids:
+            raise SystemExit("[X] No seeded students found; run seed_data.py against this database first")
+
+        accounts = []
+        for user_id in student_ids:
+            tasks = db.session.execute(
+                select(SavedProject.id, PhaseTask.id)
+                .join(ProjectPhase, ProjectPhase.saved_project_id == SavedProject.id)
+                .join(PhaseTask, PhaseTask.phase_id == ProjectPhase.id)
+                .where(SavedProject.user_id == user_id).limit(50)
+            ).all()
+            accounts.append({
+                'email': db.session.get(User, user_id).email,
+                'password': SEED_PASSWORD,
+                'tasks': [tuple(row) for row in tasks],
+                'workspaces': db.session.execute(
+                    select(WorkspaceMember.workspace_id).where(WorkspaceMember.user_id == user_id)
+                ).scalars().all(),
+            })
+        admin_account = {'email': ADMIN_EMAIL, 'password': SEED_PASSWORD, 'tasks': [], 'workspaces': [], 'is_admin': True}
+        db.session.remove()
+        return accounts, admin_account
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result, previous=None):
+    before = (previous or {}).get('endpoints', {})
+    print(f"\n{'endpoint':<46} {'reqs':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+          + (f" {'p95 vs prev':>12}" if previous else ''))
+    for label, stats in result['endpoints'].items():
+        line = (f"{label:<46} {stats['requests']:>6} {stats['errors']:>4} {stats['rps']:>8.1f} "
+                f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+        if label in before and before[label]['p95_ms']:
+            line += f" {(stats['p95_ms'] / before[label]['p95_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+    totals = result['totals']
+    print(f"\n[✓] {totals['requests']} requests ({totals['errors']} errors), {totals['rps']:.1f} req/s, "
+          f"p50 {totals['p50_ms']:.1f}ms p95 {totals['p95_ms']:.1f}ms p99 {totals['p99_ms']:.1f}ms")
+    if previous:
+        old = previous['totals']
+        print(f"    previous ({previous['meta'].get('commit')}): {old['rps']:.1f} req/s, p95 {old['p95_ms']:.1f}ms")
+
+
+def run_benchmark(args):
+    seeded = args.database is None
+    database = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')}"
+    os.environ['DATABASE_URL'] = database
+    os.environ['SQL_STATS_ENABLED'] = 'true' if args.sql_stats else 'false'
+    for key in ('GEMINI_API_KEY', 'OPENAI_API_KEY', 'HUGGINGFACE_API_KEY'):
+        os.environ[key] = ''
+    # Requests are served in-process; no background maintenance alongside the measurements
+    os.environ['REAPER_INTERVAL_SECONDS'] = os.environ['INVITE_SWEEP_SECONDS'] = '0'
+
+    from app import create_app
+    app = create_app()
+    accounts, admin_account = prepare_database(app, seeded)
+
+    weights = PROFILES[args.profile]
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    users = [
+        VirtualUser(app, recorder, admin_account if i == 0 and 'admin_stats' in weights else accounts[i % len(accounts)],
+                    random.Random(rng.random()))
+        for i in range(args.users)
+    ]
+
+    print(f"profile={args.profile} users={args.users} seconds={args.seconds} database={database}")
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    threads = [threading.Thread(target=user.run, args=(weights, deadline, args.think_ms)) for user in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    totals, endpoints = recorder.summary(elapsed)
+    result = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'profile': args.profile,
+            'weights': weights,
+            'users': args.users,
+            'seconds': round(elapsed, 2),
+            'think_ms': args.think_ms,
+            'database': 'temporary seeded sqlite' if seeded else database.split('@')[-1],
+        },
+        'totals': totals,
+        'endpoints': endpoints,
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print_report(result, previous)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"[✓] Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='student')
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--think-ms', type=float, default=0, help='random pause of up to N ms between scenarios')
+    parser.add_argument('--database', help='database URL of a seeded database (default: fresh temporary SQLite)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--sql-stats', action='store_true', help='keep per-request SQL instrumentation on')
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,78 @@
+"""
+Benchmark login throughput against an in-memory database
+Usage: python benchmarks/login_throughput.py [--users 50] [--threads 16] [--seconds 10] [--workers N] [--rounds 12]
+
+Prints logins/second overall and per core. Run with --workers 0 to measure
+hashing inline on the request threads for comparison.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+from app.utils.passwords import hash_passwords
+
+PASSWORD = 'benchmark-password'
+
+def run_benchmark(users, threads, seconds, workers, rounds):
+    app = create_app()
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    app.config['BCRYPT_LOG_ROUNDS'] = rounds
+    
+    with app.app_context():
+        db.create_all()
+        emails = [f'bench{i}@example.com' for i in range(users)]
+        for email, password_hash in zip(emails, hash_passwords([PASSWORD] * users)):
+            db.session.add(User(email=email, password_hash=password_hash, auth_provider='email'))
+        db.session.commit()
+    
+    counts = [0] * threads
+    failures = [0] * threads
+    deadline = time.perf_counter() + seconds
+    
+    def worker(index):
+        client = app.test_client()
+        i = index
+        while time.perf_counter() < deadline:
+            response = client.post('/api/auth/login', json={'email': emails[i % users], 'password': PASSWORD})
+            if response.status_code == 200:
+                counts[index] += 1
+            else:
+                failures[index] += 1
+            i += threads
+    
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    
+    total = sum(counts)
+    cores = min(workers or 1, os.cpu_count() or 1)
+    print(f"workers={workers} rounds={rounds} threads={threads} users={users}")
+    print(f"logins:            {total} ({sum(failures)} failed) in {elapsed:.1f}s")
+    print(f"logins/second:     {total / elapsed:.1f}")
+    print(f"logins/second/core {total / elapsed / cores:.1f} (over {cores} core(s))")
+    print(f"request-process CPU: {time.process_time() - cpu_start:.1f}s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--rounds', type=int, default=12)
+    args = parser.parse_args()
+    
+    run_benchmark(args.users, args.threads, args.seconds, args.workers, args.rounds)
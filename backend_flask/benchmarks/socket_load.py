@@ -0,0 +1,414 @@
+"""
+Load-test the Socket.IO side: many clients authenticate, join workspaces and chat
+Usage: python benchmarks/socket_load.py [--clients 1000] [--workers 1] [--seconds 30] [--rate 1]
+                                        [--senders 50] [--mode legacy|batch|msgpack] [--output results.json]
+       python benchmarks/socket_load.py --url http://host:5000 [--url ...] --database URL --server-pid PID ...
+
+Without --url, it seeds a temporary SQLite database and starts --workers server
+processes on consecutive ports from --port. Clients are spread round-robin over the
+servers (or the given --url list). Each client logs in over HTTP once per user,
+connects with its token and joins one of its workspaces. --senders of them then post
+--rate messages/second each.
+
+Reported per run:
+  - connect time and failures
+  - send -> acknowledgement (stored) latency
+  - send -> broadcast delivery latency and the delivered/expected ratio
+  - server CPU time per message and resident memory per connection (read from /proc)
+
+With more than one worker, a delivery ratio below 100% means broadcasts do not
+cross processes: the app configures no Socket.IO message queue, so a room only
+reaches the clients on the same worker. Latency assumes clients and servers share
+a clock, so run it on one machine or NTP-synced hosts.
+
+Clients use the threaded python-socketio client. Install websocket-client to
+test the WebSocket transport; otherwise the clients fall back to long-polling.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SOCKET_DATASET = {'users': 300, 'topics': 20, 'workspaces': 30, 'members_per_workspace': 10,
+                  'messages_per_workspace': 20, 'files_per_workspace': 0, 'activities_per_workspace': 5}
+MARKER = 'socket-load'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def distribution(values):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50), 2),
+        'p95_ms': round(percentile(values, 95), 2),
+        'p99_ms': round(percentile(values, 99), 2),
+        'max_ms': round(values[-1], 2) if values else 0.0,
+    }
+
+
+def process_usage(pid):
+    """(cpu seconds, resident bytes) of a local process from /proc, or None elsewhere"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    return (int(fields[11]) + int(fields[12])) / ticks, pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def total_usage(pids):
+    samples = [process_usage(pid) for pid in pids]
+    if not pids or None in samples:
+        return None
+    return sum(s[0] for s in samples), sum(s[1] for s in samples)
+
+
+class Stats:
+    """Samples shared by every client thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connect_ms, self.ack_ms, self.broadcast_ms = [], [], []
+        self.connect_failures = self.send_failures = 0
+        self.sent = self.expected = 0
+
+    def add(self, name, value):
+        with self.lock:
+            getattr(self, name).append(value)
+
+    def count(self, name, n=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + n)
+
+
+class LoadClient:
+    """One Socket.IO connection joined to one workspace room"""
+
+    def __init__(self, index, url, token, workspace_id, mode, stats):
+        self.index = index
+        self.url = url
+        self.token = token
+        self.workspace_id = workspace_id
+        self.mode = mode
+        self.stats = stats
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('new_message', self._on_message)
+        self.sio.on('events', self._on_events)
+
+    def _record(self, message):
+        text = message.get('message') if isinstance(message, dict) else None
+        if not text or not text.startswith(MARKER):
+            return
+        sent_at = float(text.split()[2])
+        self.stats.add('broadcast_ms', (time.time() - sent_at) * 1000)
+
+    def _on_message(self, data):
+        self._record(data)
+
+    def _on_events(self, frame):
+        if isinstance(frame, (bytes, bytearray)) and msgpack is not None:
+            frame = msgpack.unpackb(frame, raw=False)
+        for event in (frame or {}).get('events', []):
+            # Frames are shared by the room; the sender's own events carry its sid
+            if event.get('event') == 'new_message' and event.get('sid') != self.sio.sid:
+                self._record(event.get('data'))
+
+    def connect(self):
+        auth = {'token': self.token}
+        if self.mode != 'legacy':
+            auth.update({'batch': True, 'encoding': self.mode if self.mode == 'msgpack' else 'json'})
+        started = time.perf_counter()
+        try:
+            self.sio.connect(self.url, auth=auth, wait_timeout=30)
+            self.sio.call('join_workspace', {'workspace_id': self.workspace_id}, timeout=30)
+        except Exception:
+            self.stats.count('connect_failures')
+            return False
+        self.stats.add('connect_ms', (time.perf_counter() - started) * 1000)
+        return True
+
+    def send(self, seq):
+        text = f'{MARKER} {self.index}:{seq} {time.time():.6f}'
+        started = time.perf_counter()
+        try:
+            ack = self.sio.call('send_message', {'workspace_id': self.workspace_id, 'message': text}, timeout=30)
+        except Exception:
+            ack = None
+        if ack and ack.get('ok'):
+            self.stats.add('ack_ms', (time.perf_counter() - started) * 1000)
+        else:
+            self.stats.count('send_failures')
+
+    def close(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+def serve(port):
+    """Run one server process (used by the spawned workers)"""
+    import logging
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    from app import create_app
+    from app.extensions import socketio as server
+    app = create_app()
+    server.run(app, host='127.0.0.1', port=port, allow_unsafe_werkzeug=True, log_output=False)
+
+
+def load_accounts(database, seeded, limit):
+    """Seed when requested; return [(email, [workspace ids])] for members of live workspaces"""
+    os.environ['DATABASE_URL'] = database
+    from sqlalchemy import select
+    from app import create_app
+    from app.extensions import db
+    from app.models import User, Workspace, WorkspaceMember
+    from app.utils.seed import SEED_PASSWORD, seed_database
+
+    app = create_app()
+    with app.app_context():
+        if seeded:
+            db.create_all()
+            seed_database(seed=1, blobs=False, **SOCKET_DATASET)
+        rows = db.session.execute(
+            select(User.email, WorkspaceMember.workspace_id)
+            .join(WorkspaceMember, WorkspaceMember.user_id == User.id)
+            .join(Workspace, Workspace.id == WorkspaceMember.workspace_id)
+            .where(User.email.like('seed%'), User.deleted_at.is_(None), Workspace.deleted_at.is_(None))
+            .order_by(User.id)
+        ).all()
+        db.session.remove()
+
+    accounts = {}
+    for email, workspace_id in rows:
+        if email in accounts or len(accounts) < limit:
+            accounts.setdefault(email, []).append(workspace_id)
+    return list(accounts.items()), SEED_PASSWORD
+
+
+def start_workers(count, port, database):
+    env = dict(os.environ, DATABASE_URL=database, SQL_STATS_ENABLED='false')
+    processes, urls = [], []
+    for i in range(count):
+        processes.append(subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port + i)],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, start_new_session=True
+        ))
+        urls.append(f'http://127.0.0.1:{port + i}')
+    for process, url in zip(processes, urls):
+        deadline = time.time() + 60
+        while True:
+            # A worker that exits (e.g. port taken) must not be mistaken for whatever answers there
+            if process.poll() is not None or time.time() > deadline:
+                stop_workers(processes)
+                raise SystemExit(f"[X] Server at {url} did not start")
+            try:
+                requests.get(f'{url}/api/auth/me', timeout=2)
+                break
+            except requests.RequestException:
+                time.sleep(0.5)
+    return processes, urls
+
+
+def stop_workers(processes):
+    """Stop workers with their children (e.g. the password hashing pool)"""
+    for process in processes:
+        if process.poll() is None:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def login_all(url, accounts, password):
+    def login(email):
+        response = requests.post(f'{url}/api/auth/login', json={'email': email, 'password': password}, timeout=60)
+        return email, response.json().get('access_token') if response.ok else None
+
+    with ThreadPoolExecutor(16) as pool:
+        tokens = dict(pool.map(login, [email for email, _ in accounts]))
+    return {email: token for email, token in tokens.items() if token}
+
+
+def run_load(args):
+    seeded = args.database is None
+    database = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='socket-load-'), 'load.db')}"
+    accounts, password = load_accounts(database, seeded, args.accounts)
+    if not accounts:
+        raise SystemExit("[X] No seeded workspace members found; run seed_data.py against this database first")
+
+    processes, urls, pids = [], args.url, args.server_pid
+    if not urls:
+        processes, urls = start_workers(args.workers, args.port, database)
+        pids = [p.pid for p in processes]
+
+    stats = Stats()
+    rng = random.Random(args.seed)
+    try:
+        tokens = login_all(urls[0], accounts, password)
+        accounts = [(email, workspaces) for email, workspaces in accounts if email in tokens]
+        print(f"[✓] {len(tokens)} users logged in; servers: {', '.join(urls)}")
+
+        baseline = total_usage(pids)
+        clients = []
+        for i in range(args.clients):
+            email, workspaces = accounts[i % len(accounts)]
+            clients.append(LoadClient(i, urls[i % len(urls)], tokens[email], rng.choice(workspaces), args.mode, stats))
+
+        # Connect in waves of --connect-rate per second so the server sees a ramp, not a spike
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.connect_concurrency) as pool:
+            futures = []
+            for i, client in enumerate(clients):
+                delay = started + i / args.connect_rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(client.connect))
+            connected = [client for client, future in zip(clients, futures) if future.result()]
+        print(f"[✓] {len(connected)}/{len(clients)} clients connected in {time.perf_counter() - started:.1f}s")
+        time.sleep(1)
+        after_connect = total_usage(pids)
+
+        # Who receives a broadcast: every other connection in the room on any worker
+        room_sizes = {}
+        for client in connected:
+            room_sizes[client.workspace_id] = room_sizes.get(client.workspace_id, 0) + 1
+        senders = connected[:args.senders]
+
+        def send_loop(client):
+            seq = 0
+            deadline = time.perf_counter() + args.seconds
+            next_send = time.perf_counter() + rng.random() / args.rate
+            while next_send < deadline:
+                time.sleep(max(0, next_send - time.perf_counter()))
+                client.send(seq)
+                stats.count('sent')
+                stats.count('expected', room_sizes[client.workspace_id] - 1)
+                seq += 1
+                next_send += 1 / args.rate
+
+        threads = [threading.Thread(target=send_loop, args=(client,)) for client in senders]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        time.sleep(args.drain)
+        after_send = total_usage(pids)
+
+        for client in connected:
+            client.close()
+    finally:
+        stop_workers(processes)
+
+    delivered = len(stats.broadcast_ms)
+    result = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'clients': args.clients,
+            'workers': len(urls),
+            'mode': args.mode,
+            'senders': len(senders),
+            'rate_per_sender': args.rate,
+            'seconds': args.seconds,
+        },
+        'connect': dict(distribution(stats.connect_ms), failures=stats.connect_failures),
+        'ack': dict(distribution(stats.ack_ms), failures=stats.send_failures),
+        'broadcast': dict(
+            distribution(stats.broadcast_ms),
+            sent=stats.sent,
+            expected=stats.expected,
+            delivered=delivered,
+            delivery_ratio=round(delivered / stats.expected, 4) if stats.expected else None,
+            deliveries_per_second=round(delivered / args.seconds, 1),
+        ),
+        'server': None,
+    }
+    if baseline and after_connect and after_send:
+        result['server'] = {
+            'rss_mb': round(after_send[1] / 2 ** 20, 1),
+            'rss_kb_per_connection': round((after_connect[1] - baseline[1]) / 1024 / max(len(connected), 1), 1),
+            'cpu_seconds_connect': round(after_connect[0] - baseline[0], 2),
+            'cpu_ms_per_message': round((after_send[0] - after_connect[0]) * 1000 / max(stats.sent, 1), 2),
+        }
+
+    for name in ('connect', 'ack', 'broadcast'):
+        section = result[name]
+        print(f"{name:<10} n={section['count']:<7} p50 {section['p50_ms']:>8.1f}ms  p95 {section['p95_ms']:>8.1f}ms  "
+              f"p99 {section['p99_ms']:>8.1f}ms  max {section['max_ms']:>8.1f}ms")
+    broadcast = result['broadcast']
+    print(f"[✓] {broadcast['sent']} messages sent, {broadcast['delivered']}/{broadcast['expected']} deliveries "
+          f"({(broadcast['delivery_ratio'] or 0) * 100:.1f}%), {stats.connect_failures} connect failures, "
+          f"{stats.send_failures} send failures")
+    if result['server']:
+        server = result['server']
+        print(f"[✓] server: {server['rss_mb']} MB resident, {server['rss_kb_per_connection']} KB/connection, "
+              f"{server['cpu_ms_per_message']} ms CPU/message")
+    else:
+        print("[X] server CPU/memory not measured (pass --server-pid for servers you started yourself)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"[✓] Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--accounts', type=int, default=200, help='distinct users; clients beyond this share logins')
+    parser.add_argument('--workers', type=int, default=1, help='server processes to start when no --url is given')
+    parser.add_argument('--port', type=int, default=5100, help='first port for started workers')
+    parser.add_argument('--url', action='append', help='existing server (repeat for multiple workers)')
+    parser.add_argument('--server-pid', type=int, action='append', default=[], help='pid of a --url server, for CPU/memory')
+    parser.add_argument('--database', help='database URL of the servers (default: fresh temporary SQLite)')
+    parser.add_argument('--mode', choices=['legacy', 'batch', 'msgpack'], default='legacy')
+    parser.add_argument('--senders', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=1, help='messages per second per sender')
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--drain', type=float, default=3, help='seconds to wait for late deliveries')
+    parser.add_argument('--connect-rate', type=float, default=200, help='new connections per second')
+    parser.add_argument('--connect-concurrency', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+    elif args.url and not args.database:
+        parser.error('--url needs --database so test accounts can be looked up')
+    else:
+        run_load(args)
@@ -0,0 +1,49 @@
+"""
+Script to bulk import users from a CSV file
+Columns: email (required), password, full_name, university, program, academic_year, role
+Usage: python import_users.py <file.csv> [--dry-run] [--update-existing] [--role student|admin]
+"""
+
+import sys
+from app import create_app
+from app.utils.user_management import VALID_ROLES, UserImportError, parse_user_csv, import_users
+
+def run_import(path, default_role='student', update_existing=False, dry_run=False):
+    app = create_app()
+    with app.app_context():
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                rows = parse_user_csv(f)
+        except (OSError, UserImportError) as e:
+            print(f"[X] {e}")
+            return False
+        
+        report = import_users(rows, default_role=default_role, update_existing=update_existing, dry_run=dry_run)
+        
+        for error in report['errors']:
+            print(f"[X] line {error['line']}: {error['email'] or '(blank)'} - {error['message']}")
+        
+        prefix = "Would import" if dry_run or report['errors'] else "Imported"
+        print(f"[✓] {prefix}: {len(report['created'])} created, {len(report['updated'])} updated, "
+              f"{len(report['skipped'])} skipped (already exist)")
+        
+        if report['errors']:
+            print(f"[X] {len(report['errors'])} invalid rows, nothing was written")
+            return False
+        return True
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print("Usage: python import_users.py <file.csv> [--dry-run] [--update-existing] [--role student|admin]")
+        sys.exit(1)
+    
+    role = 'student'
+    if '--role' in args:
+        role = args[args.index('--role') + 1] if args.index('--role') + 1 < len(args) else ''
+        if role not in VALID_ROLES:
+            print("[X] --role must be 'student' or 'admin'")
+            sys.exit(1)
+    
+    ok = run_import(args[0], default_role=role, update_existing='--update-existing' in args, dry_run='--dry-run' in args)
+    sys.exit(0 if ok else 1)
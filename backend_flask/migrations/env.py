@@ -51,6 +51,23 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate away from the chat search objects created by raw DDL.
+
+    SQLite: the FTS5 tables (workspace_message_fts, archived_message_fts) and
+    their shadow tables (*_fts_data, *_fts_idx, ...). PostgreSQL: the generated
+    search_vector columns and their GIN indexes. None are in the metadata.
+    """
+    if reflected and compare_to is None:
+        if type_ == 'table' and (name.endswith('_fts') or '_fts_' in name):
+            return False
+        if type_ == 'column' and name == 'search_vector':
+            return False
+        if type_ == 'index' and name.endswith('_search_vector'):
+            return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +82,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +111,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
@@ -0,0 +1,62 @@
+"""add workspace message search index
+
+Revision ID: c8f4a2e9d713
+Revises: b51e08d2c6a4
+Create Date: 2026-10-19 13:41:05.227614
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f4a2e9d713'
+down_revision = 'b51e08d2c6a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE workspace_message_fts USING fts5("
+            "message, content='workspace_message', content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER workspace_message_fts_ai AFTER INSERT ON workspace_message BEGIN "
+            "INSERT INTO workspace_message_fts(rowid, message) VALUES (new.id, new.message); END"
+        )
+        op.execute(
+            "CREATE TRIGGER workspace_message_fts_ad AFTER DELETE ON workspace_message BEGIN "
+            "INSERT INTO workspace_message_fts(workspace_message_fts, rowid, message) VALUES ('delete', old.id, old.message); END"
+        )
+        op.execute(
+            "CREATE TRIGGER workspace_message_fts_au AFTER UPDATE OF message ON workspace_message BEGIN "
+            "INSERT INTO workspace_message_fts(workspace_message_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+            "INSERT INTO workspace_message_fts(rowid, message) VALUES (new.id, new.message); END"
+        )
+        # Index the messages that already exist
+        op.execute("INSERT INTO workspace_message_fts(workspace_message_fts) VALUES ('rebuild')")
+
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE workspace_message ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('english', message)) STORED"
+        )
+        op.execute("CREATE INDEX ix_workspace_message_search_vector ON workspace_message USING gin (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS workspace_message_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS workspace_message_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS workspace_message_fts_ai")
+        op.execute("DROP TABLE IF EXISTS workspace_message_fts")
+
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_workspace_message_search_vector")
+        op.execute("ALTER TABLE workspace_message DROP COLUMN IF EXISTS search_vector")
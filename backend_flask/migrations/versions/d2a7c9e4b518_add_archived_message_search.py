@@ -0,0 +1,66 @@
+"""add archived message search index
+
+Revision ID: d2a7c9e4b518
+Revises: 1b8e3d6f0c27
+Create Date: 2026-10-19 18:12:37.904216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7c9e4b518'
+down_revision = '1b8e3d6f0c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_message_search',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('workspace_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_message_search', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_message_search_workspace_id'), ['workspace_id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE archived_message_fts USING fts5("
+            "message, content='archived_message_search', content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER archived_message_fts_ai AFTER INSERT ON archived_message_search BEGIN "
+            "INSERT INTO archived_message_fts(rowid, message) VALUES (new.id, new.message); END"
+        )
+        op.execute(
+            "CREATE TRIGGER archived_message_fts_ad AFTER DELETE ON archived_message_search BEGIN "
+            "INSERT INTO archived_message_fts(archived_message_fts, rowid, message) VALUES ('delete', old.id, old.message); END"
+        )
+
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE archived_message_search ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('english', message)) STORED"
+        )
+        op.execute("CREATE INDEX ix_archived_message_search_vector ON archived_message_search USING gin (search_vector)")
+
+    # Messages archived before this index existed are added by `python archive_history.py --reindex`
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS archived_message_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS archived_message_fts_ai")
+        op.execute("DROP TABLE IF EXISTS archived_message_fts")
+
+    with op.batch_alter_table('archived_message_search', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_message_search_workspace_id'))
+
+    op.drop_table('archived_message_search')
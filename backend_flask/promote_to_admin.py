@@ -1,34 +1,31 @@
 """
-Script to promote a user to admin role
-Usage: python promote_to_admin.py <email>
+Script to promote one or more users to admin role
+Usage: python promote_to_admin.py <email> [<email> ...]
 """
 
 import sys
 from app import create_app
-from app.models import User
-from app.extensions import db
+from app.utils.user_management import set_roles
 
-def promote_to_admin(email):
+def promote_to_admin(*emails):
     app = create_app()
     with app.app_context():
-        user = User.query.filter_by(email=email).first()
-        if not user:
+        report = set_roles('admin', emails=emails)
+        
+        for email in report['not_found']:
             print(f"[X] User with email '{email}' not found")
-            return
         
-        if user.role == 'admin':
-            print(f"[✓] User '{email}' is already an admin")
-            return
+        if report['unchanged']:
+            print(f"[✓] {len(report['unchanged'])} user(s) already admin")
         
-        user.role = 'admin'
-        db.session.commit()
-        print(f"[✓] Successfully promoted '{email}' to admin role")
-        return True
+        if report['updated']:
+            print(f"[✓] Successfully promoted {len(report['updated'])} user(s) to admin role")
+            return True
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
-        print("Usage: python promote_to_admin.py <email>")
+        print("Usage: python promote_to_admin.py <email> [<email> ...]")
         sys.exit(1)
     
-    email = sys.argv[1].strip().lower()
-    promote_to_admin(email)
+    emails = [email.strip().lower() for email in sys.argv[1:]]
+    promote_to_admin(*emails)
@@ -0,0 +1,48 @@
+"""
+Script to fill the database with synthetic users, projects, workspaces and chat for scale testing
+Usage: python seed_data.py [--scale N] [--users N] [--workspaces N] [--messages-per-workspace N] ...
+       python seed_data.py --help   (lists every count)
+Seeded accounts log in with the password 'password123'.
+"""
+
+import argparse
+import time
+from app import create_app
+from app.utils.seed import SEED_DEFAULTS, SEED_PASSWORD, seed_database
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset with bulk inserts")
+    for name, default in SEED_DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None, help=f"default {default}")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the top-level counts (users, topics, workspaces), e.g. --scale 10")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a reproducible dataset")
+    parser.add_argument("--days", type=int, default=180, help="spread timestamps over this many days")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT batch")
+    parser.add_argument("--no-blobs", action="store_true", help="skip the sparse placeholder upload files")
+    return parser.parse_args()
+
+def run_seed(args):
+    counts = {}
+    for name in SEED_DEFAULTS:
+        value = getattr(args, name)
+        if value is not None:
+            counts[name] = value
+        elif name in ('users', 'topics', 'workspaces'):
+            counts[name] = int(SEED_DEFAULTS[name] * args.scale)
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        inserted = seed_database(
+            seed=args.seed, days=args.days, batch_size=args.batch_size, blobs=not args.no_blobs, **counts
+        )
+        elapsed = time.perf_counter() - started
+
+        for table, rows in inserted.items():
+            print(f"[✓] {table}: {rows} rows")
+        print(f"[✓] {sum(inserted.values())} rows in {elapsed:.1f}s (password for seeded users: {SEED_PASSWORD})")
+        print("Run `python analytics_maintenance.py --rebuild-days N` to roll up the seeded analytics events")
+
+if __name__ == '__main__':
+    run_seed(parse_args())
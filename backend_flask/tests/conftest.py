@@ -0,0 +1,111 @@
+import os
+import sys
+
+# Must be set before the app package reads its Config
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-with-at-least-32-bytes")
+# No background sweeps against the per-test databases
+os.environ["INVITE_SWEEP_SECONDS"] = "0"
+os.environ["REAPER_INTERVAL_SECONDS"] = "0"
+# Cheapest bcrypt cost, hashed inline: fixtures hash passwords for every test
+os.environ["BCRYPT_LOG_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.extensions import db
+from app.utils.cache import CACHES
+from app.models import (
+    User, ProjectTopic, SavedProject, ProjectPhase, PhaseTask,
+    Workspace, WorkspaceMember, WorkspaceFile
+)
+
+pytest_plugins = ["query_budget"]
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    # Every test gets a fresh database, so nothing cached by an earlier test may leak in
+    for cache in CACHES:
+        cache.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _user(email):
+    user = User(email=email, full_name=email.split("@")[0], role="student")
+    user.set_password("secret123")
+    db.session.add(user)
+    return user
+
+
+@pytest.fixture
+def dataset(app):
+    """A student with several saved projects, workspaces, members and files"""
+    student = _user("student@example.com")
+    others = [_user(f"member{i}@example.com") for i in range(6)]
+    db.session.flush()
+
+    saved_ids = []
+    for p in range(5):
+        topic = ProjectTopic(
+            title=f"Topic {p}", description="A project", difficulty="Beginner",
+            duration="6 months", tags=["seed"]
+        )
+        db.session.add(topic)
+        db.session.flush()
+        saved = SavedProject(user_id=student.id, project_topic_id=topic.id)
+        db.session.add(saved)
+        db.session.flush()
+        saved_ids.append(saved.id)
+        for order in range(1, 4):
+            phase = ProjectPhase(saved_project_id=saved.id, phase_name=f"Phase {order}", phase_order=order)
+            db.session.add(phase)
+            db.session.flush()
+            for t in range(4):
+                db.session.add(PhaseTask(
+                    phase_id=phase.id, task_name=f"Task {t}", task_order=t, is_completed=t % 2 == 0
+                ))
+
+    workspace_ids = []
+    for w in range(5):
+        # The student owns three workspaces; the other two belong to (and are shared among) other users
+        owner = student if w < 3 else others[w]
+        workspace = Workspace(name=f"Workspace {w}", owner_id=owner.id, member_count=4)
+        db.session.add(workspace)
+        db.session.flush()
+        workspace_ids.append(workspace.id)
+        members = [owner] + [u for u in others + [student] if u is not owner][:3]
+        for member in members:
+            db.session.add(WorkspaceMember(
+                workspace_id=workspace.id, user_id=member.id,
+                role="owner" if member is owner else "member"
+            ))
+
+    for f in range(8):
+        db.session.add(WorkspaceFile(
+            workspace_id=workspace_ids[0], uploaded_by=others[f % 4].id,
+            filename=f"file{f}.txt", original_filename=f"file{f}.txt",
+            file_size=100, file_type="text/plain", file_path=f"/nonexistent/file{f}.txt"
+        ))
+    db.session.commit()
+
+    return {
+        "headers": {"Authorization": f"Bearer {create_access_token(identity=str(student.id))}"},
+        "student_id": student.id,
+        "saved_project_ids": saved_ids,
+        "workspace_ids": workspace_ids,
+    }
@@ -0,0 +1,69 @@
+"""Pytest plugin: fail an endpoint test when a request runs more SQL than its declared budget.
+
+    def test_listing(client, auth_headers, query_budget):
+        query_budget(client.get, "/api/workspaces/", budget=6, headers=auth_headers)
+
+The report groups the offending statements by fingerprint, so an N+1 shows up
+as one statement repeated once per row.
+"""
+import threading
+from collections import Counter
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.utils.query_stats import fingerprint
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request runs more statements than its budget"""
+
+
+class QueryRecorder:
+    """Collect every statement the engine runs on this thread while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self._thread = threading.get_ident()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        # Background tasks (chat writer, sweepers) share the engine but are not part of the request
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "after_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "after_cursor_execute", self._record)
+
+    def __len__(self):
+        return len(self.statements)
+
+    def report(self, limit=10):
+        """Statements grouped by fingerprint, most repeated first"""
+        counts = Counter(fingerprint(statement) for statement in self.statements)
+        return "\n".join(
+            f"  {times:>4}x  {statement[:300]}" for statement, times in counts.most_common(limit)
+        )
+
+
+def assert_query_budget(call, url, budget, **kwargs):
+    """Run `call(url, **kwargs)` (e.g. client.get) and fail if it exceeds `budget` queries"""
+    with QueryRecorder(db.engine) as recorder:
+        response = call(url, **kwargs)
+
+    if len(recorder) > budget:
+        raise QueryBudgetExceeded(
+            f"{url} ran {len(recorder)} queries (budget {budget}), by statement:\n{recorder.report()}"
+        )
+    return response
+
+
+@pytest.fixture
+def query_budget(app):
+    """The assert_query_budget helper; needs the app fixture for db.engine"""
+    return assert_query_budget
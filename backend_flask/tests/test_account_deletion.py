@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import User, Workspace, WorkspaceMember
+from app.utils.reaper import reaper
+
+
+def _admin():
+    admin = User(email="admin@example.com", full_name="admin", role="admin")
+    admin.set_password("secret123")
+    db.session.add(admin)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+
+
+def test_reaper_is_disabled_by_a_zero_interval(app):
+    app.config["REAPER_INTERVAL_SECONDS"] = 0
+    reaper.start(app)
+    assert reaper._app is None
+
+
+def test_deletion_by_another_worker_rejects_tokens_at_once(client, dataset):
+    assert client.get("/api/auth/me", headers=dataset["headers"]).status_code == 200
+
+    # Another worker tombstones the account: nothing in this process is invalidated
+    db.session.get(User, dataset["student_id"]).deleted_at = datetime.utcnow()
+    db.session.commit()
+
+    assert client.get("/api/auth/me", headers=dataset["headers"]).status_code == 401
+
+
+def test_deleted_user_is_locked_out_then_reaped(client, dataset):
+    admin_headers = _admin()
+    student_id = dataset["student_id"]
+    owned, joined = dataset["workspace_ids"][:3], dataset["workspace_ids"][3:]
+    for workspace_id in joined:
+        db.session.add(WorkspaceMember(workspace_id=workspace_id, user_id=student_id, role="member"))
+        db.session.get(Workspace, workspace_id).member_count += 1
+    db.session.commit()
+    counts = {w: db.session.get(Workspace, w).member_count for w in joined}
+
+    response = client.delete(f"/api/admin/users/{student_id}", headers=admin_headers)
+    assert response.status_code == 202
+
+    # Tombstoned: the existing token stops working straight away, the rows are still there
+    assert client.get("/api/workspaces/", headers=dataset["headers"]).status_code == 401
+    assert db.session.get(User, student_id) is not None
+
+    assert reaper.reap_all() == {"workspaces": 3, "users": 1}
+
+    db.session.expire_all()
+    assert db.session.get(User, student_id) is None
+    assert all(db.session.get(Workspace, w) is None for w in owned)
+    for workspace_id in joined:
+        assert db.session.get(Workspace, workspace_id).member_count == counts[workspace_id] - 1
+    assert WorkspaceMember.query.filter_by(user_id=student_id).count() == 0
+
+    # A second pass finds nothing left to do and changes no counters
+    assert reaper.reap_all() == {"workspaces": 0, "users": 0}
+    assert {w: db.session.get(Workspace, w).member_count for w in joined} == {w: c - 1 for w, c in counts.items()}
+
+
+def test_admin_views_leave_out_deleted_accounts(client, dataset):
+    admin_headers = _admin()
+    student_id = dataset["student_id"]
+    total = client.get("/api/admin/stats/overview", headers=admin_headers).get_json()["total_users"]
+
+    assert client.delete(f"/api/admin/users/{student_id}", headers=admin_headers).status_code == 202
+
+    assert client.get("/api/admin/stats/overview", headers=admin_headers).get_json()["total_users"] == total - 1
+    listed = client.get("/api/admin/users?per_page=100", headers=admin_headers).get_json()["users"]
+    assert student_id not in [user["id"] for user in listed]
+    exported = client.get("/api/admin/export/users?format=jsonl", headers=admin_headers).get_data(as_text=True)
+    assert "student@example.com" not in exported
+
+    response = client.patch(f"/api/admin/users/{student_id}/role", json={"role": "admin"}, headers=admin_headers)
+    assert response.status_code == 404
+    report = client.patch(
+        "/api/admin/users/roles", json={"role": "admin", "user_ids": [student_id]}, headers=admin_headers
+    ).get_json()["report"]
+    assert report["not_found"] == [student_id]
+    assert db.session.get(User, student_id).role == "student"
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import User, UserActivity
+
+
+def test_event_timestamps_with_an_offset_are_stored_and_bucketed_in_utc(client):
+    admin = User(email="admin@example.com", full_name="admin", role="admin")
+    admin.set_password("secret123")
+    db.session.add(admin)
+    db.session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+
+    day = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
+    response = client.post("/api/analytics/events", json={
+        "activity_type": "project_view", "created_at": f"{day}T10:30:00+02:00"
+    }, headers=headers)
+    assert response.status_code == 201
+
+    assert UserActivity.query.one().created_at == datetime.fromisoformat(f"{day}T08:30:00")
+
+    # Query bounds with an offset are converted too: 09:00+01:00 .. 11:00+01:00 is 08:00 .. 10:00 UTC
+    response = client.get(
+        "/api/analytics/timeseries",
+        query_string={"granularity": "hour", "start": f"{day}T09:00:00+01:00", "end": f"{day}T11:00:00+01:00"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["series"]["project_view"] == [
+        {"bucket": f"{day}T08:00:00", "count": 1},
+        {"bucket": f"{day}T09:00:00", "count": 0},
+    ]
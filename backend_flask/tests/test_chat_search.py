@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import WorkspaceMessage
+from app.utils.archive import archive_table, reindex_archived_messages
+
+
+def test_search_finds_archived_messages(app, client, dataset, tmp_path):
+    app.config["ARCHIVE_FOLDER"] = str(tmp_path)
+    workspace_id = dataset["workspace_ids"][0]
+    user_id = dataset["student_id"]
+    old = datetime.utcnow() - timedelta(days=400)
+    for i, text in enumerate(["kickoff notes", "the rubric is final", "lunch?", "rubric questions", "fresh start"]):
+        db.session.add(WorkspaceMessage(
+            workspace_id=workspace_id, user_id=user_id, message=text,
+            created_at=old + timedelta(minutes=i) if i < 3 else datetime.utcnow()
+        ))
+    db.session.commit()
+
+    result = archive_table("workspace_message", datetime.utcnow() - timedelta(days=30))
+    assert result["rows_archived"] == 3
+    assert WorkspaceMessage.query.filter_by(workspace_id=workspace_id).count() == 2
+
+    response = client.get(f"/api/chat/{workspace_id}/search?q=rubric&context=1", headers=dataset["headers"])
+    assert response.status_code == 200
+    hits = {hit["message"]["message"]: hit for hit in response.get_json()["results"]}
+    assert set(hits) == {"the rubric is final", "rubric questions"}
+
+    archived = hits["the rubric is final"]
+    assert archived["message"]["archived"] is True
+    assert [m["message"] for m in archived["context_before"]] == ["kickoff notes"]
+    assert [m["message"] for m in archived["context_after"]] == ["lunch?"]
+
+    # The live hit's earlier context continues into the archive
+    live = hits["rubric questions"]
+    assert "archived" not in live["message"]
+    assert [m["message"] for m in live["context_before"]] == ["lunch?"]
+    assert [m["message"] for m in live["context_after"]] == ["fresh start"]
+
+    # Rebuilding the index from the segments finds the same archived hit
+    assert reindex_archived_messages() == 3
+    response = client.get(f"/api/chat/{workspace_id}/search?q=rubric", headers=dataset["headers"])
+    assert len(response.get_json()["results"]) == 2
+
+
+def test_substring_fallback_matches_wildcards_literally(app, client, dataset, monkeypatch):
+    workspace_id = dataset["workspace_ids"][0]
+    for text in ["we are 100% done", "100 tasks left", "snake_case names", "snakeXcase"]:
+        db.session.add(WorkspaceMessage(workspace_id=workspace_id, user_id=dataset["student_id"], message=text))
+    db.session.commit()
+    # Pretend the database has no full-text support
+    monkeypatch.setattr(db.engine.dialect, "name", "other")
+
+    def search(query):
+        response = client.get(f"/api/chat/{workspace_id}/search", query_string={"q": query}, headers=dataset["headers"])
+        return [hit["message"]["message"] for hit in response.get_json()["results"]]
+
+    assert search("100%") == ["we are 100% done"]
+    assert search("snake_case") == ["snake_case names"]
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.chat.writer import MessageWriter, _PendingMessage
+from app.models import WorkspaceMessage
+from app.utils.emitter import room_emitter
+
+
+def _pending(workspace_id, user_id, message):
+    return _PendingMessage({
+        'workspace_id': workspace_id,
+        'user_id': user_id,
+        'message': message,
+        'message_type': 'text',
+        'created_at': datetime.utcnow()
+    }, 'student', 'student@example.com', None)
+
+
+def test_failed_batch_is_retried_row_by_row(app, dataset, monkeypatch):
+    broadcasts = []
+    monkeypatch.setattr(room_emitter, 'emit', lambda event, payload, workspace_id, skip_sid=None: broadcasts.append(payload))
+    writer = MessageWriter()
+    writer._app = app
+
+    workspace_id, student_id = dataset['workspace_ids'][0], dataset['student_id']
+    # The NULL message slipped past submit's validation and fails the multi-row INSERT
+    batch = [_pending(workspace_id, student_id, 'first'), _pending(workspace_id, student_id, None),
+             _pending(workspace_id, student_id, 'third')]
+    writer._flush(batch)
+
+    assert batch[0].future.result()['message'] == 'first'
+    assert batch[2].future.result()['message'] == 'third'
+    with pytest.raises(IntegrityError):
+        batch[1].future.result()
+
+    stored = WorkspaceMessage.query.order_by(WorkspaceMessage.id).all()
+    assert [m.message for m in stored] == ['first', 'third']
+    assert [p['id'] for p in broadcasts] == [m.id for m in stored]
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Workspace, WorkspaceInvite
+from app.utils.invites import create_invites, expire_invites, invite_sweeper
+
+
+def test_sweeper_is_disabled_by_a_zero_interval(app):
+    app.config["INVITE_SWEEP_SECONDS"] = 0
+    invite_sweeper.start(app)
+    assert invite_sweeper._app is None
+
+
+def test_expire_invites_marks_only_overdue_pending_invites(app, dataset):
+    workspace = db.session.get(Workspace, dataset["workspace_ids"][0])
+    emails = [f"invitee{i}@example.com" for i in range(6)]
+    report = create_invites(workspace, dataset["student_id"], emails)
+    assert len(report["created"]) == 6
+
+    invites = {invite.email: invite for invite in WorkspaceInvite.query.all()}
+    past = datetime.utcnow() - timedelta(minutes=1)
+    for email in emails[:4]:
+        invites[email].expires_at = past
+    invites[emails[3]].status = "accepted"
+    db.session.commit()
+
+    # Batches of two: the three overdue pending invites take two rounds
+    assert expire_invites(batch_size=2) == 3
+    assert expire_invites(batch_size=2) == 0
+
+    db.session.expire_all()
+    statuses = {invite.email: invite.status for invite in WorkspaceInvite.query.all()}
+    assert statuses == {
+        emails[0]: "expired", emails[1]: "expired", emails[2]: "expired",
+        emails[3]: "accepted", emails[4]: "pending", emails[5]: "pending"
+    }
+    assert all(invites[email].responded_at is not None for email in emails[:3])
@@ -0,0 +1,33 @@
+import pytest
+
+from app import create_app
+from app.config import Config
+
+
+@pytest.mark.parametrize("debug", [False, True])
+def test_metrics_without_a_token_are_not_served_even_in_debug_mode(monkeypatch, debug):
+    monkeypatch.setattr(Config, "METRICS_TOKEN", "")
+    monkeypatch.setattr(Config, "METRICS_PUBLIC", False)
+    app = create_app()
+    # `flask run --debug` flips debug only after the factory has run
+    app.debug = debug
+
+    assert app.test_client().get("/metrics").status_code == 404
+
+
+def test_metrics_require_the_configured_token(monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_TOKEN", "scrape-me")
+    client = create_app().test_client()
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+
+
+def test_metrics_public_opt_in_serves_without_a_token(monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_TOKEN", "")
+    monkeypatch.setattr(Config, "METRICS_PUBLIC", True)
+
+    assert create_app().test_client().get("/metrics").status_code == 200
@@ -0,0 +1,31 @@
+import bcrypt
+
+from app.utils import passwords
+
+
+def test_bulk_hashing_goes_through_the_bounded_pool_queue(app, monkeypatch):
+    app.config["PASSWORD_HASH_WORKERS"] = 1
+    app.config["PASSWORD_HASH_QUEUE_FACTOR"] = 1
+    monkeypatch.setattr(passwords, "_pool", None)
+    acquired = []
+
+    real_get_pool = passwords._get_pool
+
+    def get_pool():
+        pool = real_get_pool()
+        pending = passwords._pending
+        real_acquire = pending.acquire
+        monkeypatch.setattr(pending, "acquire", lambda *a, **k: acquired.append(1) or real_acquire(*a, **k))
+        return pool
+    monkeypatch.setattr(passwords, "_get_pool", get_pool)
+
+    words = [f"password{i}" for i in range(passwords.BULK_CHUNK_SIZE * 2 + 1)]
+    try:
+        hashes = passwords.hash_passwords(words)
+    finally:
+        passwords._pool.shutdown()
+
+    assert [bcrypt.checkpw(w.encode(), h.encode()) for w, h in zip(words, hashes)] == [True] * len(words)
+    # One queue slot per chunk, all released again (a queue of 1 would deadlock otherwise)
+    assert len(acquired) == 3
+    assert passwords._pending.acquire(blocking=False)
@@ -0,0 +1,28 @@
+import pytest
+
+from query_budget import QueryBudgetExceeded
+
+# Budgets for the seeded `dataset` (5 saved projects x 3 phases, 5 workspaces, 8 files).
+# They pin today's query counts: lower them when an N+1 is fixed, never raise them silently.
+# Each includes the one deleted-account check made for every authenticated request.
+BUDGETS = [
+    ("get_favourites", lambda d: "/api/favourites/", 27),
+    ("get_workspaces", lambda d: "/api/workspaces/", 14),
+    ("get_progress", lambda d: f"/api/progress/{d['saved_project_ids'][0]}", 19),
+    ("get_files", lambda d: f"/api/files/{d['workspace_ids'][0]}/files", 8),
+]
+
+
+@pytest.mark.parametrize("endpoint, url, budget", BUDGETS, ids=[b[0] for b in BUDGETS])
+def test_endpoint_within_query_budget(client, dataset, query_budget, endpoint, url, budget):
+    response = query_budget(client.get, url(dataset), budget, headers=dataset["headers"])
+    assert response.status_code == 200
+
+
+def test_budget_report_lists_repeated_statements(client, dataset, query_budget):
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        query_budget(client.get, "/api/favourites/", 1, headers=dataset["headers"])
+
+    message = str(excinfo.value)
+    assert "(budget 1)" in message
+    assert "5x  SELECT project_topic" in message
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import WorkspaceActivity, WorkspaceMessage
+from app.utils.archive import run_archive
+
+
+def test_timeline_continues_past_the_archive_cutoff(app, client, dataset, tmp_path):
+    app.config["ARCHIVE_FOLDER"] = str(tmp_path)
+    workspace_id = dataset["workspace_ids"][0]
+    user_id = dataset["student_id"]
+    now = datetime.utcnow()
+    old = now - timedelta(days=400)
+
+    for i in range(3):
+        db.session.add(WorkspaceMessage(
+            workspace_id=workspace_id, user_id=user_id, message=f"old {i}", created_at=old + timedelta(minutes=2 * i)
+        ))
+        db.session.add(WorkspaceMessage(
+            workspace_id=workspace_id, user_id=user_id, message=f"new {i}", created_at=now - timedelta(minutes=3 - i)
+        ))
+    db.session.add(WorkspaceActivity(
+        workspace_id=workspace_id, user_id=user_id, activity_type="member_joined",
+        description="old activity", created_at=old + timedelta(minutes=3)
+    ))
+    db.session.commit()
+    run_archive(days=30)
+    assert WorkspaceMessage.query.filter_by(workspace_id=workspace_id).count() == 3
+
+    items, cursor = [], None
+    while True:
+        url = f"/api/workspaces/{workspace_id}/timeline?limit=2&types=message,activity"
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""), headers=dataset["headers"])
+        assert response.status_code == 200
+        page = response.get_json()
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+
+    assert [item["data"].get("message") or item["data"]["description"] for item in items] == [
+        "new 2", "new 1", "new 0", "old 2", "old activity", "old 1", "old 0"
+    ]
+    assert [item["data"].get("archived", False) for item in items] == [False] * 3 + [True] * 4
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import User, WorkspaceMessage
+from app.utils.unread import count_new_messages
+
+
+def _post(workspace_id, user_id, count):
+    rows = [{'workspace_id': workspace_id, 'user_id': user_id, 'message': f'm{i}',
+             'message_type': 'text', 'created_at': datetime.utcnow()} for i in range(count)]
+    db.session.add_all(WorkspaceMessage(**row) for row in rows)
+    count_new_messages(rows)
+    db.session.commit()
+
+
+def test_unread_counters_follow_new_messages_and_reads(client, dataset):
+    headers, student_id = dataset["headers"], dataset["student_id"]
+    workspace_id = dataset["workspace_ids"][0]
+    other_id = User.query.filter(User.id != student_id).first().id
+
+    # Opens the cursor at the current end of the workspace
+    assert client.post(f"/api/workspaces/{workspace_id}/read", headers=headers).json["unread_messages"] == 0
+
+    _post(workspace_id, other_id, 3)
+    _post(workspace_id, student_id, 1)  # own messages never count
+    unread = client.get("/api/workspaces/unread", headers=headers).json["unread"]
+    assert [(u["workspace_id"], u["unread_messages"]) for u in unread] == [(workspace_id, 3)]
+
+    # Reading up to an older id recounts what is left; a huge id is clamped to the newest message
+    first_id = WorkspaceMessage.query.order_by(WorkspaceMessage.id).first().id
+    response = client.post(f"/api/workspaces/{workspace_id}/read", json={"message_id": first_id}, headers=headers)
+    assert response.json["unread_messages"] == 2
+    response = client.post(f"/api/workspaces/{workspace_id}/read", json={"message_id": 10**12}, headers=headers)
+    assert response.json["unread_messages"] == 0
+    assert response.json["last_read_message_id"] == db.session.query(db.func.max(WorkspaceMessage.id)).scalar()
+
+    # Later messages are still unread after the clamped read
+    _post(workspace_id, other_id, 1)
+    assert client.get("/api/workspaces/unread", headers=headers).json["unread"][0]["unread_messages"] == 1
+
+
+def test_mark_read_rejects_invalid_ids(client, dataset):
+    url = f"/api/workspaces/{dataset['workspace_ids'][0]}/read"
+    for bad in (-1, "5", True, 1.5):
+        response = client.post(url, json={"message_id": bad}, headers=dataset["headers"])
+        assert response.status_code == 400
+    assert client.post(url, json={"activity_id": -3}, headers=dataset["headers"]).status_code == 400
@@ -0,0 +1,56 @@
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import User
+
+
+def _user(email, role="student", full_name=None):
+    user = User(email=email, full_name=full_name or email.split("@")[0], role=role)
+    user.set_password("secret123")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _headers(user):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+def test_update_import_keeps_roles_not_given_in_the_file(client):
+    admin = _user("admin@example.com", role="admin")
+    other_admin = _user("other@example.com", role="admin")
+    student = _user("student@example.com")
+
+    csv = (
+        "email,full_name,role\n"
+        "other@example.com,Other Admin,\n"
+        "student@example.com,Promoted,admin\n"
+        "new@example.com,New User,\n"
+    )
+    response = client.post(
+        "/api/admin/users/import",
+        json={"csv": csv, "update_existing": True, "default_role": "student"},
+        headers=_headers(admin)
+    )
+    assert response.status_code == 201, response.get_json()
+
+    db.session.expire_all()
+    other = db.session.get(User, other_admin.id)
+    assert other.role == "admin"
+    assert other.full_name == "Other Admin"
+    assert db.session.get(User, student.id).role == "admin"
+    assert User.query.filter_by(email="new@example.com").one().role == "student"
+
+
+def test_import_refuses_to_change_the_importing_admins_role(client):
+    admin = _user("admin@example.com", role="admin")
+
+    response = client.post(
+        "/api/admin/users/import",
+        json={"users": [{"email": "admin@example.com", "role": "student"}], "update_existing": True},
+        headers=_headers(admin)
+    )
+    assert response.status_code == 400
+    assert response.get_json()["report"]["errors"][0]["message"] == "cannot change your own role"
+    db.session.expire_all()
+    assert db.session.get(User, admin.id).role == "admin"
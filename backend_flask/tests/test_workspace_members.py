@@ -0,0 +1,33 @@
+from app.extensions import db
+from app.models import Workspace, WorkspaceMember
+from app.utils.discovery import _hours
+
+
+def test_removing_a_member_updates_the_discovery_counters(app, client, dataset):
+    workspace_id = dataset["workspace_ids"][0]
+    count = db.session.get(Workspace, workspace_id).member_count
+    member = WorkspaceMember.query.filter_by(workspace_id=workspace_id, role="member").first()
+
+    response = client.delete(f"/api/workspaces/{workspace_id}/members/{member.id}", headers=dataset["headers"])
+    assert response.status_code == 200
+
+    db.session.expire_all()
+    after = db.session.get(Workspace, workspace_id)
+    assert after.member_count == count - 1
+    # Removal logs activity, so the score is recency plus the new member count
+    weight = app.config["DISCOVERY_MEMBER_WEIGHT_HOURS"]
+    assert after.discovery_score == _hours(after.last_activity_at) + after.member_count * weight
+
+
+def test_member_of_another_workspace_cannot_be_removed_through_this_one(client, dataset):
+    # The student owns workspaces 0-2; workspace 3 belongs to someone else
+    own_id, other_id = dataset["workspace_ids"][0], dataset["workspace_ids"][3]
+    counts = {w.id: (w.member_count, w.discovery_score) for w in Workspace.query}
+    foreign = WorkspaceMember.query.filter_by(workspace_id=other_id, role="member").first()
+
+    response = client.delete(f"/api/workspaces/{own_id}/members/{foreign.id}", headers=dataset["headers"])
+    assert response.status_code == 404
+
+    db.session.expire_all()
+    assert db.session.get(WorkspaceMember, foreign.id) is not None
+    assert {w.id: (w.member_count, w.discovery_score) for w in Workspace.query} == counts
@@ -1,7 +1,8 @@
-from app import create_app
+from app import create_app, start_background_tasks
 from app.extensions import socketio
 
 app = create_app()
 
 if __name__ == "__main__":
+    start_background_tasks(app)
     socketio.run(app, host="0.0.0.0", port=5000, debug=True)